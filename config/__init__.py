@@ -12,8 +12,61 @@ from .settings import (
     TELEGRAM_OWNER_ID,
     FACEBOOK_HEADERS,
     REDDIT_HEADERS,
+    ADMISSION_DEGRADE_DOWNLOAD_BYTES,
+    ADMISSION_DEGRADE_EXTRACTIONS,
+    ADMISSION_DEGRADE_LOOP_LAG,
+    ADMISSION_ENABLED,
+    ADMISSION_SHED_DOWNLOAD_BYTES,
+    ADMISSION_SHED_EXTRACTIONS,
+    ADMISSION_SHED_LOOP_LAG,
+    CIRCUIT_BREAKER_ENABLED,
+    CIRCUIT_BREAKER_FAILURE_RATE,
+    CIRCUIT_BREAKER_HALF_OPEN_PROBES,
+    CIRCUIT_BREAKER_MIN_CALLS,
+    CIRCUIT_BREAKER_OPEN_SECONDS,
+    CIRCUIT_BREAKER_SLOW_CALL_SECONDS,
+    CIRCUIT_BREAKER_WINDOW,
+    FACEBOOK_ALBUM_CONCURRENCY,
+    FACEBOOK_ALBUM_MAX_PAGES,
     FACEBOOK_COOKIE_PATH,
+    FACEBOOK_HEDGE_AUTH_GRACE,
+    FACEBOOK_HEDGE_DELAY,
+    FACEBOOK_HEDGE_ENABLED,
+    FACEBOOK_PARSE_EXECUTOR,
+    FACEBOOK_PARSE_WORKERS,
+    FACEBOOK_PUBLIC_FIRST_KINDS,
+    FACEBOOK_REDIRECT_CACHE_ENABLED,
+    FACEBOOK_REDIRECT_CACHE_MAX_ENTRIES,
+    FACEBOOK_REDIRECT_CACHE_TTL,
+    FACEBOOK_STREAMING,
+    FACEBOOK_STRATEGY_ADAPTIVE,
+    FACEBOOK_STRATEGY_MIN_ATTEMPTS,
+    FACEBOOK_STRATEGY_PROBE_INTERVAL,
+    FACEBOOK_STRATEGY_SKIP_BELOW,
+    FACEBOOK_STRATEGY_WEIGHT,
+    REDDIT_BATCH_ENABLED,
+    REDDIT_BATCH_MAX,
+    REDDIT_BATCH_WINDOW,
     REDDIT_COOKIE_PATH,
+    REDDIT_HEDGE_DELAY,
+    REDDIT_HEDGE_ENABLED,
+    RESULT_CACHE_ENABLED,
+    RESULT_CACHE_MAX_ENTRIES,
+    RESULT_CACHE_NEGATIVE_TTL,
+    RESULT_CACHE_PLATFORM_TTLS,
+    RESULT_CACHE_TTL,
+    RESULT_STORE_ENABLED,
+    RESULT_STORE_MAX_BYTES,
+    RESULT_STORE_PATH,
+    ROUTER_HANDLER_TIMEOUT,
+    ROUTER_MAX_CONCURRENCY,
+    ROUTER_MAX_URLS_PER_MESSAGE,
+    ROUTER_MULTI_URL,
+    ROUTER_REQUEST_TIMEOUT,
+    SCHEDULER_CHAT_BACKLOG,
+    SCHEDULER_CHAT_CONCURRENCY,
+    SCHEDULER_INLINE_RESERVED,
+    SCHEDULER_SLOTS,
 )
 
 __all__ = [
@@ -27,7 +80,60 @@ __all__ = [
     "TELEGRAM_OWNER_ID",
     "FACEBOOK_HEADERS",
     "REDDIT_HEADERS",
+    "ADMISSION_DEGRADE_DOWNLOAD_BYTES",
+    "ADMISSION_DEGRADE_EXTRACTIONS",
+    "ADMISSION_DEGRADE_LOOP_LAG",
+    "ADMISSION_ENABLED",
+    "ADMISSION_SHED_DOWNLOAD_BYTES",
+    "ADMISSION_SHED_EXTRACTIONS",
+    "ADMISSION_SHED_LOOP_LAG",
     "FACEBOOK_PARAMS_TO_KEEP",
+    "FACEBOOK_ALBUM_CONCURRENCY",
+    "FACEBOOK_ALBUM_MAX_PAGES",
     "FACEBOOK_COOKIE_PATH",
+    "FACEBOOK_HEDGE_AUTH_GRACE",
+    "FACEBOOK_HEDGE_DELAY",
+    "FACEBOOK_HEDGE_ENABLED",
+    "FACEBOOK_PARSE_EXECUTOR",
+    "FACEBOOK_PARSE_WORKERS",
+    "FACEBOOK_PUBLIC_FIRST_KINDS",
+    "FACEBOOK_REDIRECT_CACHE_ENABLED",
+    "FACEBOOK_REDIRECT_CACHE_MAX_ENTRIES",
+    "FACEBOOK_REDIRECT_CACHE_TTL",
+    "FACEBOOK_STREAMING",
+    "FACEBOOK_STRATEGY_ADAPTIVE",
+    "FACEBOOK_STRATEGY_MIN_ATTEMPTS",
+    "FACEBOOK_STRATEGY_PROBE_INTERVAL",
+    "FACEBOOK_STRATEGY_SKIP_BELOW",
+    "FACEBOOK_STRATEGY_WEIGHT",
+    "REDDIT_BATCH_ENABLED",
+    "REDDIT_BATCH_MAX",
+    "REDDIT_BATCH_WINDOW",
     "REDDIT_COOKIE_PATH",
+    "REDDIT_HEDGE_DELAY",
+    "REDDIT_HEDGE_ENABLED",
+    "RESULT_CACHE_ENABLED",
+    "RESULT_CACHE_MAX_ENTRIES",
+    "RESULT_CACHE_NEGATIVE_TTL",
+    "RESULT_CACHE_PLATFORM_TTLS",
+    "RESULT_CACHE_TTL",
+    "RESULT_STORE_ENABLED",
+    "RESULT_STORE_MAX_BYTES",
+    "RESULT_STORE_PATH",
+    "ROUTER_HANDLER_TIMEOUT",
+    "ROUTER_MAX_CONCURRENCY",
+    "ROUTER_MAX_URLS_PER_MESSAGE",
+    "ROUTER_MULTI_URL",
+    "ROUTER_REQUEST_TIMEOUT",
+    "SCHEDULER_CHAT_BACKLOG",
+    "SCHEDULER_CHAT_CONCURRENCY",
+    "SCHEDULER_INLINE_RESERVED",
+    "SCHEDULER_SLOTS",
+    "CIRCUIT_BREAKER_ENABLED",
+    "CIRCUIT_BREAKER_FAILURE_RATE",
+    "CIRCUIT_BREAKER_HALF_OPEN_PROBES",
+    "CIRCUIT_BREAKER_MIN_CALLS",
+    "CIRCUIT_BREAKER_OPEN_SECONDS",
+    "CIRCUIT_BREAKER_SLOW_CALL_SECONDS",
+    "CIRCUIT_BREAKER_WINDOW",
 ]
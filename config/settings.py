@@ -8,6 +8,9 @@ from typing import Any
 
 CONFIG_PATH = Path(__file__).resolve().parent.parent / "config.toml"
 DEFAULT_TELEGRAM_MAX_MEDIA_BYTES = 50 * 1024 * 1024
+DEFAULT_RESULT_STORE_MAX_BYTES = 64 * 1024 * 1024
+DEFAULT_ADMISSION_DEGRADE_DOWNLOAD_BYTES = 256 * 1024 * 1024
+DEFAULT_ADMISSION_SHED_DOWNLOAD_BYTES = 512 * 1024 * 1024
 DEFAULT_USER_AGENT = (
     "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/147.0.0.0 Safari/537.36"
 )
@@ -58,6 +61,25 @@ def _positive_int(section: dict[str, Any], key: str, *, default: int) -> int:
     return value
 
 
+def _positive_number(section: dict[str, Any], key: str, *, default: float) -> float:
+    value = _number(section, key, default=default)
+    if value <= 0:
+        raise ConfigError(f"{key} must be a positive number")
+    return float(value)
+
+
+def _fraction(section: dict[str, Any], key: str, *, default: float) -> float:
+    value = _number(section, key, default=default)
+    if not 0 < value <= 1:
+        raise ConfigError(f"{key} must be greater than 0 and at most 1")
+    return float(value)
+
+
+def _number_table(section: dict[str, Any], key: str, *, default: dict[str, float]) -> dict[str, float]:
+    table = _section(section, key) if key in section else {}
+    return {**default, **{name: _positive_number(table, name, default=0) for name in table}}
+
+
 def _int(section: dict[str, Any], key: str, *, default: int = 0) -> int:
     value = section.get(key, default)
     if not isinstance(value, int) or isinstance(value, bool):
@@ -65,6 +87,13 @@ def _int(section: dict[str, Any], key: str, *, default: int = 0) -> int:
     return value
 
 
+def _bool(section: dict[str, Any], key: str, *, default: bool) -> bool:
+    value = section.get(key, default)
+    if not isinstance(value, bool):
+        raise ConfigError(f"{key} must be true or false")
+    return value
+
+
 def _id_set(section: dict[str, Any], key: str) -> set[int]:
     value = section.get(key, [])
     if not isinstance(value, list):
@@ -77,6 +106,13 @@ def _id_set(section: dict[str, Any], key: str) -> set[int]:
     return ids
 
 
+def _string_set(section: dict[str, Any], key: str, *, default: list[str]) -> frozenset[str]:
+    value = section.get(key, default)
+    if not isinstance(value, list) or not all(isinstance(item, str) and item for item in value):
+        raise ConfigError(f"{key} must be a list of non-empty strings")
+    return frozenset(value)
+
+
 def _negative_id_set(section: dict[str, Any], key: str) -> set[int]:
     ids = _id_set(section, key)
     invalid = [item for item in ids if item >= 0]
@@ -88,6 +124,13 @@ def _negative_id_set(section: dict[str, Any], key: str) -> set[int]:
 _CONFIG = _load_config()
 _HTTP = _section(_CONFIG, "http")
 _TELEGRAM = _section(_CONFIG, "telegram")
+_ROUTER = _section(_CONFIG, "router")
+_CACHE = _section(_CONFIG, "cache")
+_CIRCUIT_BREAKER = _section(_CONFIG, "circuit_breaker")
+_SCHEDULER = _section(_CONFIG, "scheduler")
+_ADMISSION = _section(_CONFIG, "admission")
+_FACEBOOK = _section(_CONFIG, "facebook")
+_REDDIT = _section(_CONFIG, "reddit")
 
 # HTTP Configuration
 HTTP_TIMEOUT = float(_number(_HTTP, "timeout", default=10.0))
@@ -105,6 +148,99 @@ TELEGRAM_MAX_MEDIA_BYTES = _positive_int(
     default=DEFAULT_TELEGRAM_MAX_MEDIA_BYTES,
 )
 
+# Message routing
+ROUTER_MULTI_URL = _bool(_ROUTER, "multi_url", default=False)
+ROUTER_MAX_URLS_PER_MESSAGE = _positive_int(_ROUTER, "max_urls_per_message", default=10)
+ROUTER_MAX_CONCURRENCY = _positive_int(_ROUTER, "max_concurrency", default=4)
+ROUTER_HANDLER_TIMEOUT = _positive_number(_ROUTER, "handler_timeout", default=20)
+ROUTER_REQUEST_TIMEOUT = _positive_number(_ROUTER, "request_timeout", default=30)
+
+# Extraction result cache
+RESULT_CACHE_ENABLED = _bool(_CACHE, "enabled", default=True)
+RESULT_CACHE_MAX_ENTRIES = _positive_int(_CACHE, "max_entries", default=1024)
+RESULT_CACHE_TTL = _positive_number(_CACHE, "ttl", default=900)
+RESULT_CACHE_NEGATIVE_TTL = _positive_number(_CACHE, "negative_ttl", default=60)
+RESULT_CACHE_PLATFORM_TTLS = _number_table(
+    _CACHE,
+    "platform_ttl",
+    default={"facebook": 600, "instagram": 900, "reddit": 1800},
+)
+RESULT_STORE_ENABLED = _bool(_CACHE, "persistent", default=True)
+RESULT_STORE_PATH = Path(_string(_CACHE, "store_path", default="/app/data/result_cache.sqlite3"))
+RESULT_STORE_MAX_BYTES = _positive_int(_CACHE, "store_max_bytes", default=DEFAULT_RESULT_STORE_MAX_BYTES)
+
+# Work scheduling lanes
+SCHEDULER_SLOTS = _positive_int(_SCHEDULER, "slots", default=8)
+SCHEDULER_INLINE_RESERVED = _int(_SCHEDULER, "inline_reserved", default=2)
+if not 0 <= SCHEDULER_INLINE_RESERVED < SCHEDULER_SLOTS:
+    raise ConfigError("inline_reserved must be at least 0 and less than slots")
+SCHEDULER_CHAT_CONCURRENCY = _positive_int(_SCHEDULER, "chat_concurrency", default=2)
+SCHEDULER_CHAT_BACKLOG = _positive_int(_SCHEDULER, "chat_backlog", default=20)
+
+# Admission control; each signal degrades to link-only replies, then sheds inline queries
+ADMISSION_ENABLED = _bool(_ADMISSION, "enabled", default=True)
+ADMISSION_DEGRADE_EXTRACTIONS = _positive_int(_ADMISSION, "degrade_extractions", default=16)
+ADMISSION_SHED_EXTRACTIONS = _positive_int(_ADMISSION, "shed_extractions", default=32)
+ADMISSION_DEGRADE_DOWNLOAD_BYTES = _positive_int(
+    _ADMISSION,
+    "degrade_download_bytes",
+    default=DEFAULT_ADMISSION_DEGRADE_DOWNLOAD_BYTES,
+)
+ADMISSION_SHED_DOWNLOAD_BYTES = _positive_int(
+    _ADMISSION,
+    "shed_download_bytes",
+    default=DEFAULT_ADMISSION_SHED_DOWNLOAD_BYTES,
+)
+ADMISSION_DEGRADE_LOOP_LAG = _positive_number(_ADMISSION, "degrade_loop_lag", default=0.5)
+ADMISSION_SHED_LOOP_LAG = _positive_number(_ADMISSION, "shed_loop_lag", default=2.0)
+if (
+    ADMISSION_SHED_EXTRACTIONS < ADMISSION_DEGRADE_EXTRACTIONS
+    or ADMISSION_SHED_DOWNLOAD_BYTES < ADMISSION_DEGRADE_DOWNLOAD_BYTES
+    or ADMISSION_SHED_LOOP_LAG < ADMISSION_DEGRADE_LOOP_LAG
+):
+    raise ConfigError("admission shed_* marks must not be lower than their degrade_* marks")
+
+# Per-extractor circuit breakers
+CIRCUIT_BREAKER_ENABLED = _bool(_CIRCUIT_BREAKER, "enabled", default=True)
+CIRCUIT_BREAKER_WINDOW = _positive_int(_CIRCUIT_BREAKER, "window", default=20)
+CIRCUIT_BREAKER_MIN_CALLS = _positive_int(_CIRCUIT_BREAKER, "min_calls", default=10)
+CIRCUIT_BREAKER_FAILURE_RATE = _fraction(_CIRCUIT_BREAKER, "failure_rate", default=0.5)
+CIRCUIT_BREAKER_SLOW_CALL_SECONDS = _positive_number(_CIRCUIT_BREAKER, "slow_call_seconds", default=15)
+CIRCUIT_BREAKER_OPEN_SECONDS = _positive_number(_CIRCUIT_BREAKER, "open_seconds", default=60)
+CIRCUIT_BREAKER_HALF_OPEN_PROBES = _positive_int(_CIRCUIT_BREAKER, "half_open_probes", default=1)
+
+# Facebook extraction
+FACEBOOK_STREAMING = _bool(_FACEBOOK, "streaming", default=True)
+FACEBOOK_PARSE_WORKERS = _int(_FACEBOOK, "parse_workers", default=2)
+if FACEBOOK_PARSE_WORKERS < 0:
+    raise ConfigError("parse_workers must be 0 or more")
+FACEBOOK_PARSE_EXECUTOR = _string(_FACEBOOK, "parse_executor", default="thread")
+if FACEBOOK_PARSE_EXECUTOR not in {"thread", "process"}:
+    raise ConfigError('parse_executor must be "thread" or "process"')
+FACEBOOK_REDIRECT_CACHE_ENABLED = _bool(_FACEBOOK, "redirect_cache", default=True)
+FACEBOOK_REDIRECT_CACHE_TTL = _positive_number(_FACEBOOK, "redirect_cache_ttl", default=86400)
+FACEBOOK_REDIRECT_CACHE_MAX_ENTRIES = _positive_int(_FACEBOOK, "redirect_cache_max_entries", default=4096)
+FACEBOOK_HEDGE_ENABLED = _bool(_FACEBOOK, "hedge", default=True)
+FACEBOOK_HEDGE_DELAY = _positive_number(_FACEBOOK, "hedge_delay", default=1.5)
+FACEBOOK_HEDGE_AUTH_GRACE = _positive_number(_FACEBOOK, "hedge_auth_grace", default=0.3)
+FACEBOOK_PUBLIC_FIRST_KINDS = _string_set(_FACEBOOK, "public_first_kinds", default=["reel"])
+FACEBOOK_STRATEGY_ADAPTIVE = _bool(_FACEBOOK, "adaptive_strategy", default=True)
+FACEBOOK_STRATEGY_WEIGHT = _fraction(_FACEBOOK, "strategy_weight", default=0.2)
+FACEBOOK_STRATEGY_MIN_ATTEMPTS = _positive_int(_FACEBOOK, "strategy_min_attempts", default=10)
+FACEBOOK_STRATEGY_SKIP_BELOW = _fraction(_FACEBOOK, "strategy_skip_below", default=0.05)
+FACEBOOK_STRATEGY_PROBE_INTERVAL = _positive_int(_FACEBOOK, "strategy_probe_interval", default=20)
+FACEBOOK_ALBUM_CONCURRENCY = _positive_int(_FACEBOOK, "album_concurrency", default=4)
+FACEBOOK_ALBUM_MAX_PAGES = _positive_int(_FACEBOOK, "album_max_pages", default=10)
+
+# Reddit extraction
+REDDIT_HEDGE_ENABLED = _bool(_REDDIT, "hedge", default=True)
+REDDIT_HEDGE_DELAY = _positive_number(_REDDIT, "hedge_delay", default=0.75)
+REDDIT_BATCH_ENABLED = _bool(_REDDIT, "batch", default=True)
+REDDIT_BATCH_WINDOW = _positive_number(_REDDIT, "batch_window", default=0.03)
+REDDIT_BATCH_MAX = _positive_int(_REDDIT, "batch_max", default=100)
+if REDDIT_BATCH_MAX > 100:
+    raise ConfigError("batch_max must be at most 100")
+
 # Facebook Request Headers
 FACEBOOK_HEADERS = {
     "User-Agent": USER_AGENT,
@@ -2,14 +2,26 @@
 
 from .registry import build_handlers
 from .router import MessageRouter
-from .types import HandlerResult, LinkFixResult, MediaMetadata, MediaResult, MessageHandler
+from .types import (
+    HandlerResult,
+    LinkFixResult,
+    MediaMetadata,
+    MediaRendition,
+    MediaResult,
+    MessageHandler,
+    RoutedResult,
+    UrlExtractor,
+)
 
 __all__ = [
     "HandlerResult",
     "LinkFixResult",
     "MediaMetadata",
+    "MediaRendition",
     "MediaResult",
     "MessageHandler",
+    "RoutedResult",
+    "UrlExtractor",
     "build_handlers",
     "MessageRouter",
 ]
@@ -0,0 +1,113 @@
+"""Global admission control and load shedding."""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import logging
+import time
+from collections.abc import Callable, Sequence
+from dataclasses import dataclass
+from enum import IntEnum
+
+logger = logging.getLogger(__name__)
+
+
+class LoadLevel(IntEnum):
+    NORMAL = 0
+    DEGRADED = 1
+    SHEDDING = 2
+
+
+@dataclass(frozen=True)
+class LoadSignal:
+    """One load measurement with its high-water marks.
+
+    Attributes:
+        name: Signal name shown in stats
+        read: Returns the current value
+        degrade_at: Value at which media uploads give way to link-only replies
+        shed_at: Value at which inline queries are dropped as well
+    """
+
+    name: str
+    read: Callable[[], float]
+    degrade_at: float
+    shed_at: float
+
+    def level(self, value: float) -> LoadLevel:
+        if value >= self.shed_at:
+            return LoadLevel.SHEDDING
+        if value >= self.degrade_at:
+            return LoadLevel.DEGRADED
+        return LoadLevel.NORMAL
+
+
+class LoopLagMonitor:
+    """Measure how late the event loop wakes a periodic sleeper."""
+
+    def __init__(self, interval: float = 0.5, *, clock: Callable[[], float] = time.monotonic) -> None:
+        self.interval = interval
+        self.lag = 0.0
+        self._clock = clock
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            started = self._clock()
+            await asyncio.sleep(self.interval)
+            self.lag = max(0.0, self._clock() - started - self.interval)
+
+
+class AdmissionController:
+    """Decide how much work to accept from the worst of several load signals.
+
+    Under ``DEGRADED`` load messages get link-only replies instead of media
+    uploads. Under ``SHEDDING`` load inline queries are dropped as well.
+    """
+
+    def __init__(self, signals: Sequence[LoadSignal]) -> None:
+        self.signals = tuple(signals)
+        self.degraded_replies = 0
+        self.shed_inline_queries = 0
+        self._last_level = LoadLevel.NORMAL
+
+    def level(self) -> LoadLevel:
+        level = max((signal.level(signal.read()) for signal in self.signals), default=LoadLevel.NORMAL)
+        if level != self._last_level:
+            log = logger.warning if level > self._last_level else logger.info
+            log("Load level changed from %s to %s.", self._last_level.name.lower(), level.name.lower())
+            self._last_level = level
+        return level
+
+    def allow_media(self) -> bool:
+        """Return whether a message may download and upload media right now."""
+        if self.level() >= LoadLevel.DEGRADED:
+            self.degraded_replies += 1
+            return False
+        return True
+
+    def allow_inline(self) -> bool:
+        """Return whether an inline query may be answered right now."""
+        if self.level() >= LoadLevel.SHEDDING:
+            self.shed_inline_queries += 1
+            return False
+        return True
+
+    def stats(self) -> dict[str, dict[str, object]]:
+        values: dict[str, object] = {"level": self.level().name.lower()}
+        values.update((signal.name, signal.read()) for signal in self.signals)
+        values["degraded_replies"] = self.degraded_replies
+        values["shed_inline_queries"] = self.shed_inline_queries
+        return {"admission": values}
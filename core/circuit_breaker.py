@@ -0,0 +1,114 @@
+"""Per-extractor circuit breakers."""
+
+from __future__ import annotations
+
+import logging
+import time
+from collections import deque
+from collections.abc import Callable
+from enum import Enum
+
+logger = logging.getLogger(__name__)
+
+
+class BreakerState(str, Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+
+class CircuitBreaker:
+    """Rolling failure-rate and latency breaker for one extractor.
+
+    The breaker remembers the last ``window`` calls. Calls recorded as failed or
+    taking longer than ``slow_call_seconds`` count as failures. Once at
+    least ``min_calls`` are recorded and the failure rate reaches
+    ``failure_rate``, the breaker opens and rejects calls for ``open_seconds``.
+    It then lets ``half_open_probes`` calls through: a successful probe closes
+    it, a failed one opens it again.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        window: int = 20,
+        min_calls: int = 10,
+        failure_rate: float = 0.5,
+        slow_call_seconds: float = 10.0,
+        open_seconds: float = 60.0,
+        half_open_probes: int = 1,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.name = name
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.open_seconds = open_seconds
+        self.half_open_probes = half_open_probes
+        self._clock = clock
+        self._calls: deque[tuple[bool, float]] = deque(maxlen=window)
+        self._state = BreakerState.CLOSED
+        self._opened_at = 0.0
+        self._probes = 0
+        self.rejected = 0
+        self.opened = 0
+
+    @property
+    def state(self) -> BreakerState:
+        if self._state is BreakerState.OPEN and self._clock() - self._opened_at >= self.open_seconds:
+            self._state = BreakerState.HALF_OPEN
+            self._probes = 0
+        return self._state
+
+    def allow(self) -> bool:
+        """Return whether a call may start, reserving a probe slot when half-open."""
+        state = self.state
+        if state is BreakerState.CLOSED:
+            return True
+        if state is BreakerState.HALF_OPEN and self._probes < self.half_open_probes:
+            self._probes += 1
+            return True
+        self.rejected += 1
+        return False
+
+    def record(self, succeeded: bool, latency: float) -> None:
+        """Record the outcome of a call started after allow() returned True."""
+        failed = not succeeded or latency > self.slow_call_seconds
+        if self._state is BreakerState.HALF_OPEN:
+            self._probes = max(0, self._probes - 1)
+            if failed:
+                self._open()
+            else:
+                logger.info("Circuit breaker for %s closed after a successful probe.", self.name)
+                self._state = BreakerState.CLOSED
+                self._calls.clear()
+                self._calls.append((True, latency))
+            return
+
+        self._calls.append((not failed, latency))
+        if self._state is BreakerState.CLOSED and len(self._calls) >= self.min_calls:
+            failures = sum(1 for ok, _ in self._calls if not ok)
+            if failures / len(self._calls) >= self.failure_rate:
+                self._open()
+
+    def release(self) -> None:
+        """Return a probe slot for a call that was cancelled before it finished."""
+        if self._state is BreakerState.HALF_OPEN:
+            self._probes = max(0, self._probes - 1)
+
+    def stats(self) -> str:
+        calls = len(self._calls)
+        failures = sum(1 for ok, _ in self._calls if not ok)
+        latency = sum(elapsed for _, elapsed in self._calls) / calls if calls else 0.0
+        return (
+            f"{self.state.value}, {failures}/{calls} failed, avg {latency:.2f}s, "
+            f"opened {self.opened}x, rejected {self.rejected}"
+        )
+
+    def _open(self) -> None:
+        logger.warning("Circuit breaker for %s opened for %.0f seconds.", self.name, self.open_seconds)
+        self._state = BreakerState.OPEN
+        self._opened_at = self._clock()
+        self._probes = 0
+        self.opened += 1
@@ -0,0 +1,77 @@
+"""Extraction time budgets shared through the async call stack."""
+
+from __future__ import annotations
+
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import Context, ContextVar, copy_context
+
+_DEADLINE: ContextVar[float | None] = ContextVar("extraction_deadline", default=None)
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised instead of starting new work once the extraction budget is spent."""
+
+
+@contextmanager
+def deadline_scope(seconds: float | None = None, *, until: float | None = None) -> Iterator[float | None]:
+    """Tighten the current deadline for the enclosed block.
+
+    Nested scopes can only shorten the budget. Tasks created inside the block
+    inherit it through their copied context.
+
+    Args:
+        seconds: Budget relative to now, or None for no additional limit
+        until: Absolute ``time.monotonic()`` deadline, or None for no additional limit
+    """
+    deadline = _DEADLINE.get()
+    for candidate in (time.monotonic() + seconds if seconds is not None else None, until):
+        if candidate is not None:
+            deadline = candidate if deadline is None else min(deadline, candidate)
+    token = _DEADLINE.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _DEADLINE.reset(token)
+
+
+def detached_context() -> Context:
+    """Return a copy of the current context without its deadline.
+
+    Work shared by callers with different budgets starts in it and sets its own.
+    """
+    context = copy_context()
+    context.run(_DEADLINE.set, None)
+    return context
+
+
+def current_deadline() -> float | None:
+    """Return the current absolute ``time.monotonic()`` deadline, or None when unbounded."""
+    return _DEADLINE.get()
+
+
+def remaining() -> float | None:
+    """Return seconds left in the current budget, or None when unbounded."""
+    deadline = _DEADLINE.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+def check_deadline() -> None:
+    """Raise DeadlineExceeded when the current budget is spent."""
+    left = remaining()
+    if left is not None and left <= 0:
+        raise DeadlineExceeded("extraction deadline exceeded")
+
+
+def request_timeout(default: float) -> float:
+    """Return a per-request timeout clipped to the remaining budget.
+
+    Raises:
+        DeadlineExceeded: The budget is already spent, so no request should start
+    """
+    check_deadline()
+    left = remaining()
+    return default if left is None else min(default, left)
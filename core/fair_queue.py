@@ -0,0 +1,162 @@
+"""Per-chat fair queuing with deficit round robin."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict, deque
+from collections.abc import AsyncIterator, Callable, Hashable
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+
+logger = logging.getLogger(__name__)
+
+
+class WorkDropped(Exception):
+    """Raised to a queued job that was pushed out of a full per-chat backlog."""
+
+
+@dataclass
+class _Job:
+    cost: int
+    future: asyncio.Future[None]
+
+
+@dataclass
+class _ChatQueue:
+    active: int = 0
+    deficit: int = 0
+    waiters: deque[_Job] = field(default_factory=deque)
+
+
+class FairQueue:
+    """Share a pool of work slots fairly between chats.
+
+    Chats take turns in deficit round robin order. Each turn adds ``quantum`` to
+    a chat's deficit, and a queued job starts once the deficit covers its cost,
+    so a message with ten links waits ten times as long for its turn as a
+    message with one. Each chat holds at most ``per_chat_limit`` slots and
+    queues at most ``max_backlog`` jobs; the oldest queued job is dropped when a
+    new one arrives at a full backlog.
+    """
+
+    def __init__(
+        self,
+        max_active: int,
+        *,
+        per_chat_limit: int,
+        max_backlog: int,
+        quantum: int = 1,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.max_active = max_active
+        self.per_chat_limit = per_chat_limit
+        self.max_backlog = max_backlog
+        self.quantum = quantum
+        self._clock = clock
+        self._chats: dict[Hashable, _ChatQueue] = {}
+        self._ring: OrderedDict[Hashable, None] = OrderedDict()
+        self.active = 0
+        self.granted = 0
+        self.dropped = 0
+        self.wait_max = 0.0
+
+    @asynccontextmanager
+    async def slot(self, chat_id: Hashable, cost: int = 1) -> AsyncIterator[None]:
+        """Hold one slot for a chat for the duration of the block.
+
+        Raises:
+            WorkDropped: The job was pushed out of the chat backlog before it started
+        """
+        queue = self._chats.setdefault(chat_id, _ChatQueue())
+        await self._acquire(chat_id, queue, max(1, cost))
+        try:
+            yield
+        finally:
+            queue.active -= 1
+            self.active -= 1
+            self._forget_if_idle(chat_id, queue)
+            self._dispatch()
+
+    def stats(self) -> dict[str, dict[str, object]]:
+        return {
+            "chat_fairness": {
+                "active": self.active,
+                "queued": sum(len(queue.waiters) for queue in self._chats.values()),
+                "chats_waiting": len(self._ring),
+                "granted": self.granted,
+                "dropped": self.dropped,
+                "max_wait_ms": self.wait_max * 1000,
+            }
+        }
+
+    async def _acquire(self, chat_id: Hashable, queue: _ChatQueue, cost: int) -> None:
+        queued_at = self._clock()
+        job = _Job(cost, asyncio.get_running_loop().create_future())
+        if len(queue.waiters) >= self.max_backlog:
+            oldest = queue.waiters.popleft()
+            self.dropped += 1
+            logger.warning("Chat %s backlog is full; dropping its oldest queued job.", chat_id)
+            if not oldest.future.done():
+                oldest.future.set_exception(WorkDropped(f"chat {chat_id} backlog is full"))
+        queue.waiters.append(job)
+        self._ring.setdefault(chat_id)
+        self._dispatch()
+        try:
+            await job.future
+        except asyncio.CancelledError:
+            if job.future.done() and not job.future.cancelled() and job.future.exception() is None:
+                queue.active -= 1
+                self.active -= 1
+            elif job in queue.waiters:
+                queue.waiters.remove(job)
+            self._forget_if_idle(chat_id, queue)
+            self._dispatch()
+            raise
+        except WorkDropped:
+            self._forget_if_idle(chat_id, queue)
+            raise
+        waited = self._clock() - queued_at
+        self.granted += 1
+        self.wait_max = max(self.wait_max, waited)
+
+    def _dispatch(self) -> None:
+        while self.active < self.max_active:
+            eligible = [
+                chat_id
+                for chat_id in self._ring
+                if self._chats[chat_id].waiters and self._chats[chat_id].active < self.per_chat_limit
+            ]
+            if not eligible:
+                return
+            for chat_id in eligible:
+                if self.active >= self.max_active:
+                    return
+                queue = self._chats[chat_id]
+                queue.deficit += self.quantum
+                while (
+                    queue.waiters
+                    and queue.active < self.per_chat_limit
+                    and self.active < self.max_active
+                    and queue.waiters[0].cost <= queue.deficit
+                ):
+                    job = queue.waiters.popleft()
+                    if job.future.done():
+                        continue
+                    queue.deficit -= job.cost
+                    queue.active += 1
+                    self.active += 1
+                    job.future.set_result(None)
+                if queue.waiters:
+                    self._ring.move_to_end(chat_id)
+                else:
+                    queue.deficit = 0
+                    self._ring.pop(chat_id, None)
+
+    def _forget_if_idle(self, chat_id: Hashable, queue: _ChatQueue) -> None:
+        if not queue.waiters:
+            queue.deficit = 0
+            self._ring.pop(chat_id, None)
+            if not queue.active:
+                self._chats.pop(chat_id, None)
@@ -0,0 +1,64 @@
+"""Hostname suffix index for handler dispatch."""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+from urllib.parse import urlparse
+
+RE_URL = re.compile(r"https?://[^\s<>\"']+", re.IGNORECASE)
+
+
+@dataclass
+class _TrieNode:
+    children: dict[str, _TrieNode] = field(default_factory=dict)
+    values: list[int] = field(default_factory=list)
+
+
+class HostIndex:
+    """Suffix trie from registered domains to handler positions.
+
+    A domain registered as ``example.com`` matches ``example.com`` and every
+    subdomain such as ``www.example.com``. Lookups return positions in
+    ascending order so callers can keep their configured priority.
+    """
+
+    def __init__(self) -> None:
+        self._root = _TrieNode()
+
+    def add(self, domain: str, value: int) -> None:
+        """Register a handler position for a domain and its subdomains."""
+        node = self._root
+        for label in _reversed_labels(domain):
+            node = node.children.setdefault(label, _TrieNode())
+        if value not in node.values:
+            node.values.append(value)
+
+    def lookup(self, hostname: str) -> tuple[int, ...]:
+        """Return handler positions registered for the hostname or any parent domain."""
+        matches: set[int] = set()
+        node = self._root
+        for label in _reversed_labels(hostname):
+            node = node.children.get(label)
+            if node is None:
+                break
+            matches.update(node.values)
+        return tuple(sorted(matches))
+
+
+def extract_urls(text: str) -> list[str]:
+    """Return http(s) URLs in message order."""
+    return RE_URL.findall(text)
+
+
+def url_hostname(url: str) -> str | None:
+    """Return the lowercase hostname of a URL, or None when it cannot be parsed."""
+    try:
+        hostname = urlparse(url).hostname
+    except ValueError:
+        return None
+    return hostname.lower() if hostname else None
+
+
+def _reversed_labels(hostname: str) -> list[str]:
+    return [label for label in reversed(hostname.lower().strip(".").split(".")) if label]
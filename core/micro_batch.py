@@ -0,0 +1,124 @@
+"""Micro-batching of keyed lookups that arrive close together."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections import Counter
+from collections.abc import Awaitable, Callable, Hashable, Mapping, Sequence
+from typing import Generic, TypeVar
+
+from .deadline import current_deadline, deadline_scope, detached_context
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+logger = logging.getLogger(__name__)
+
+
+class MicroBatcher(Generic[K, V]):
+    """Collect lookups for ``window`` seconds and resolve them with one batch call.
+
+    The first lookup of a batch opens the window. The batch is sent when the
+    window closes or once it holds ``max_batch`` distinct keys. ``resolve``
+    returns values for the keys it found; missing keys resolve to None, and a
+    failed or cancelled batch raises an error to every waiting caller. Callers
+    asking for the same key share one slot in the batch, and cancelling a caller
+    does not cancel the batch. ``resolve`` runs under the tightest deadline
+    among the batch's callers.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        resolve: Callable[[Sequence[K]], Awaitable[Mapping[K, V]]],
+        *,
+        window: float,
+        max_batch: int,
+    ) -> None:
+        self.name = name
+        self.resolve = resolve
+        self.window = window
+        self.max_batch = max_batch
+        self._pending: dict[K, asyncio.Future[V | None]] = {}
+        self._deadline: float | None = None
+        self._timer: asyncio.TimerHandle | None = None
+        self._flushes: set[asyncio.Task[None]] = set()
+        self.batches = 0
+        self.keys = 0
+        self.errors = 0
+        self._sizes: Counter[str] = Counter()
+
+    async def get(self, key: K) -> V | None:
+        """Return key's value from the batch it joins, or None when the batch did not find it."""
+        if (deadline := current_deadline()) is not None:
+            self._deadline = deadline if self._deadline is None else min(self._deadline, deadline)
+        future = self._pending.get(key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            self._pending[key] = future
+            if len(self._pending) >= self.max_batch:
+                self._flush()
+            elif self._timer is None:
+                self._timer = loop.call_later(self.window, self._flush)
+        return await asyncio.shield(future)
+
+    def stats(self) -> dict[str, dict[str, object]]:
+        values: dict[str, object] = {"batches": self.batches, "keys": self.keys, "errors": self.errors}
+        values.update((f"size_{bucket}", self._sizes[bucket]) for bucket in sorted(self._sizes, key=_bucket_order))
+        return {self.name: values}
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, {}
+        deadline, self._deadline = self._deadline, None
+        if not batch:
+            return
+        self.batches += 1
+        self.keys += len(batch)
+        self._sizes[_size_bucket(len(batch))] += 1
+        # The batch answers several callers, so it runs under their tightest deadline rather than the flusher's.
+        task = asyncio.create_task(self._resolve(batch, deadline), context=detached_context())
+        self._flushes.add(task)
+        task.add_done_callback(self._flushes.discard)
+
+    async def _resolve(self, batch: dict[K, asyncio.Future[V | None]], deadline: float | None) -> None:
+        try:
+            with deadline_scope(until=deadline):
+                values = await self.resolve(list(batch))
+        # Whatever the resolver raises belongs to every caller in the batch, not to this task.
+        except Exception as e:  # noqa: BLE001
+            self.errors += 1
+            logger.warning("%s batch of %d failed: %r.", self.name, len(batch), e)
+            self._fail(batch, e)
+            return
+        except BaseException:
+            # Cancelled, e.g. at shutdown: release waiting callers instead of leaving them to their deadlines.
+            self.errors += 1
+            self._fail(batch, RuntimeError(f"{self.name} batch was cancelled"))
+            raise
+        for key, future in batch.items():
+            if not future.done():
+                future.set_result(values.get(key))
+
+    def _fail(self, batch: dict[K, asyncio.Future[V | None]], error: BaseException) -> None:
+        for future in batch.values():
+            if not future.done():
+                future.set_exception(error)
+                # Callers that already left never retrieve the error.
+                future.exception()
+
+
+def _size_bucket(size: int) -> str:
+    """Return a power-of-two histogram bucket such as ``3_to_4``."""
+    if size <= 2:
+        return str(size)
+    upper = 1 << (size - 1).bit_length()
+    return f"{upper // 2 + 1}_to_{upper}"
+
+
+def _bucket_order(bucket: str) -> int:
+    return int(bucket.split("_")[0])
@@ -0,0 +1,115 @@
+"""Cache of resolved redirect chains."""
+
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Protocol
+
+
+@dataclass(frozen=True)
+class Redirect:
+    """Where a URL's redirect chain ends and how many hops it took."""
+
+    target: str
+    hops: int
+
+
+class RedirectStore(Protocol):
+    """Persistent backing store for resolved redirects."""
+
+    async def get_redirect(self, key: tuple[str, str]) -> tuple[Redirect, float] | None: ...
+
+    async def put_redirect(self, key: tuple[str, str], redirect: Redirect, ttl: float) -> None:
+        """Store redirect for ttl seconds, or delete it when ttl is not positive."""
+
+
+@dataclass
+class _Entry:
+    redirect: Redirect
+    expires_at: float
+
+
+class RedirectCache:
+    """LRU cache from a starting URL to the end of its redirect chain.
+
+    Keys are ``(scope, normalized_url)`` tuples, where the scope separates
+    chains that depend on the request, such as authenticated and public
+    fetches. Entries live for ``ttl`` seconds. With a ``store``, misses fall
+    back to it and new entries are written through, so chains survive restarts
+    and are shared by bot processes using the same store.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        max_entries: int,
+        ttl: float,
+        store: RedirectStore | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.store = store
+        self._clock = clock
+        self._entries: OrderedDict[tuple[str, str], _Entry] = OrderedDict()
+        self.hits = 0
+        self.store_hits = 0
+        self.misses = 0
+        self.hops_saved = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def get(self, key: tuple[str, str]) -> Redirect | None:
+        """Return the cached end of key's redirect chain, or None on a miss."""
+        entry = self._entries.get(key)
+        if entry is not None and entry.expires_at <= self._clock():
+            del self._entries[key]
+            entry = None
+        if entry is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            self.hops_saved += entry.redirect.hops
+            return entry.redirect
+        if self.store is not None and (stored := await self.store.get_redirect(key)):
+            redirect, ttl = stored
+            self._remember(key, redirect, ttl)
+            self.store_hits += 1
+            self.hops_saved += redirect.hops
+            return redirect
+        self.misses += 1
+        return None
+
+    async def put(self, key: tuple[str, str], redirect: Redirect) -> None:
+        """Remember where key's redirect chain ends."""
+        self._remember(key, redirect, self.ttl)
+        if self.store is not None:
+            await self.store.put_redirect(key, redirect, self.ttl)
+
+    async def forget(self, key: tuple[str, str]) -> None:
+        """Drop a cached chain whose target stopped working."""
+        entry = self._entries.pop(key, None)
+        if self.store is not None and entry is not None:
+            await self.store.put_redirect(key, entry.redirect, 0)
+
+    def stats(self) -> dict[str, dict[str, object]]:
+        return {
+            self.name: {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "store_hits": self.store_hits,
+                "misses": self.misses,
+                "hops_saved": self.hops_saved,
+            }
+        }
+
+    def _remember(self, key: tuple[str, str], redirect: Redirect, ttl: float) -> None:
+        self._entries[key] = _Entry(redirect, self._clock() + ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
@@ -1,14 +1,22 @@
 """Explicit handler factory."""
 
+from typing import Protocol
+
+from .redirect_cache import RedirectStore
+from .strategy_stats import StrategyStore
 from .types import MessageHandler
 
 
-def build_handlers() -> list[MessageHandler]:
-    """Build handlers in the fixed routing order."""
+class ExtractorStore(RedirectStore, StrategyStore, Protocol):
+    """Persistent state shared by extractors across restarts."""
+
+
+def build_handlers(*, store: ExtractorStore | None = None) -> list[MessageHandler]:
+    """Build handlers in the fixed routing order; store persists extractor redirects and strategy scores."""
     from handlers.link_fixers import build_link_fixers
     from handlers.media_extractors import build_media_extractors
 
     return [
-        *build_media_extractors(),
+        *build_media_extractors(store=store),
         *build_link_fixers(),
     ]
@@ -0,0 +1,143 @@
+"""Bounded in-memory cache of extraction results."""
+
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Hashable, Mapping
+from dataclasses import dataclass
+from urllib.parse import parse_qsl, urlparse
+
+from .types import HandlerResult, MediaResult
+
+# Facebook CDN URLs carry their signature expiry as a hex Unix timestamp in ``oe``.
+# Stop serving a cached result this many seconds before the first URL expires.
+SIGNED_URL_EXPIRY_MARGIN = 60.0
+
+
+@dataclass(frozen=True)
+class CachedResult:
+    """A cache hit; ``result`` is None for a cached negative lookup."""
+
+    result: HandlerResult | None
+    ttl: float | None = None
+
+
+@dataclass
+class _Entry:
+    result: HandlerResult | None
+    expires_at: float
+
+
+class TtlPolicy:
+    """Per-platform and negative TTLs of handler results, capped by signed media URL expiry.
+
+    Shared by the in-memory cache and the persistent store, so either works without the other.
+    """
+
+    def __init__(
+        self,
+        *,
+        default_ttl: float,
+        negative_ttl: float,
+        ttls: Mapping[str, float] | None = None,
+        wall_clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.default_ttl = default_ttl
+        self.negative_ttl = negative_ttl
+        self.ttls = dict(ttls or {})
+        self._wall_clock = wall_clock
+
+    def ttl_for(self, handler_name: str, result: HandlerResult | None) -> float:
+        """Return how long a result may be served, capped by signed media URL expiry."""
+        if result is None:
+            return self.negative_ttl
+        ttl = self.ttls.get(handler_name, self.default_ttl)
+        if isinstance(result, MediaResult) and (expires_at := signed_url_expiry(result)) is not None:
+            ttl = min(ttl, expires_at - self._wall_clock() - SIGNED_URL_EXPIRY_MARGIN)
+        return ttl
+
+
+class ResultCache:
+    """LRU cache of handler results, kept for as long as ``ttl_policy`` allows.
+
+    Keys are ``(handler_name, canonical_url)`` tuples; the handler name selects
+    the TTL from the policy.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_entries: int,
+        ttl_policy: TtlPolicy,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.max_entries = max_entries
+        self.ttl_policy = ttl_policy
+        self._clock = clock
+        self._entries: OrderedDict[Hashable, _Entry] = OrderedDict()
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: tuple[str, str]) -> CachedResult | None:
+        """Return a fresh cached result for key, or None on a miss."""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        if entry.expires_at <= self._clock():
+            del self._entries[key]
+            self.expirations += 1
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        if entry.result is None:
+            self.negative_hits += 1
+        else:
+            self.hits += 1
+        return CachedResult(entry.result)
+
+    def put(self, key: tuple[str, str], result: HandlerResult | None, ttl: float | None = None) -> None:
+        """Store a result, or a negative entry for None, evicting the least recently used entries."""
+        policy_ttl = self.ttl_policy.ttl_for(key[0], result)
+        ttl = policy_ttl if ttl is None else min(ttl, policy_ttl)
+        if ttl <= 0:
+            self._entries.pop(key, None)
+            return
+        self._entries[key] = _Entry(result, self._clock() + ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "negative_hits": self.negative_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+def signed_url_expiry(result: MediaResult) -> float | None:
+    """Return the earliest ``oe=`` signature expiry among a result's media and rendition URLs."""
+    expiries = []
+    rendition_urls = (rendition.url for group in result.renditions for rendition in group)
+    for url in (*result.urls, *rendition_urls, result.metadata.thumbnail):
+        if not url:
+            continue
+        params = dict(parse_qsl(urlparse(url).query))
+        if oe := params.get("oe"):
+            try:
+                expiries.append(float(int(oe, 16)))
+            except ValueError:
+                continue
+    return min(expiries, default=None)
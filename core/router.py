@@ -2,9 +2,21 @@
 
 import asyncio
 import logging
-from typing import Sequence
+import time
+from collections.abc import AsyncIterator, Mapping
+from typing import TYPE_CHECKING, Sequence
 
-from .types import HandlerResult, MessageHandler
+from utils.text import canonical_url
+
+from .circuit_breaker import CircuitBreaker
+from .deadline import deadline_scope, detached_context, remaining
+from .host_index import HostIndex, extract_urls, url_hostname
+from .result_cache import ResultCache, TtlPolicy
+from .single_flight import SingleFlight
+from .types import HandlerResult, MediaMetadata, MediaResult, MessageHandler, RoutedResult, UrlExtractor
+
+if TYPE_CHECKING:
+    from services.result_store import ResultStore
 
 logger = logging.getLogger(__name__)
 
@@ -12,19 +24,58 @@ logger = logging.getLogger(__name__)
 class MessageRouter:
     """Routes messages to appropriate handlers."""
 
-    def __init__(self, handlers: Sequence[MessageHandler]):
+    def __init__(
+        self,
+        handlers: Sequence[MessageHandler],
+        *,
+        multi_url: bool = False,
+        max_urls_per_message: int = 10,
+        max_concurrency: int = 4,
+        cache: ResultCache | None = None,
+        store: "ResultStore | None" = None,
+        ttl_policy: TtlPolicy | None = None,
+        handler_timeout: float | None = None,
+        request_timeout: float | None = None,
+        breakers: Mapping[str, CircuitBreaker] | None = None,
+    ):
         """
         Initialize router with handlers.
 
         Args:
             handlers: List of handler instances
+            multi_url: Resolve every supported URL in a message instead of only the first match
+            max_urls_per_message: Upper bound on URLs resolved from one message in multi-URL mode
+            max_concurrency: Upper bound on concurrent extractions for one message in multi-URL mode
+            cache: Optional result cache consulted before every URL extraction
+            store: Optional persistent store behind the cache, shared across restarts and processes
+            ttl_policy: How long results are kept; defaults to the cache's policy, and results
+                are only written to the store when one is known
+            handler_timeout: Seconds one extraction may take, or None for no limit
+            request_timeout: Seconds all work for one message may take, or None for no limit
+            breakers: Optional circuit breakers keyed by extractor name
         """
         self.handlers = handlers
+        self.multi_url = multi_url
+        self.max_urls_per_message = max_urls_per_message
+        self.max_concurrency = max_concurrency
+        self.cache = cache
+        self.store = store
+        self.ttl_policy = ttl_policy if ttl_policy is not None or cache is None else cache.ttl_policy
+        self.handler_timeout = handler_timeout
+        self.request_timeout = request_timeout
+        self.breakers = dict(breakers or {})
+        self.failures = 0
+        self.timeouts = 0
+        self._host_index = HostIndex()
+        self._wildcard_positions: tuple[int, ...] = ()
+        self._extractor_positions: frozenset[int] = frozenset()
+        self._single_flight: SingleFlight[HandlerResult | None] = SingleFlight()
+        self._build_host_index()
         logger.debug("Router initialized with %d handlers.", len(handlers))
 
     async def handle(self, text: str) -> HandlerResult | None:
         """
-        Process text through all handlers concurrently until one matches.
+        Process text through handlers whose domains appear in it until one matches.
 
         Args:
             text: Message text to process
@@ -32,9 +83,151 @@ class MessageRouter:
         Returns:
             First matching result in configured handler order, or None if no handler matched
         """
-        tasks = [asyncio.create_task(self._handle_one(handler, text)) for handler in self.handlers]
+        with deadline_scope(self.request_timeout):
+            return await self._first_result(self._candidate_handlers(text), text)
+
+    async def stream(self, text: str) -> AsyncIterator[RoutedResult]:
+        """
+        Yield results for a message as soon as each one is ready.
+
+        In multi-URL mode every supported URL is extracted concurrently, bounded by
+        ``max_concurrency``. Each result carries the position of its link in the
+        message, so a slow page never holds back a fast one. Handlers that rewrite
+        the whole text, such as link fixers, contribute at most one result.
+
+        Args:
+            text: Message text to process
+
+        Yields:
+            Routed results in completion order
+        """
+        if not self.multi_url:
+            result = await self.handle(text)
+            if result is not None:
+                yield RoutedResult(index=0, url=None, result=result)
+            return
+
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        text_handlers, text_index, url_jobs = self._plan_message(text)
+        # Tasks copy the current context, so each one inherits the message deadline.
+        with deadline_scope(self.request_timeout):
+            tasks = [
+                asyncio.create_task(self._extract_url(index, url, extractors, semaphore))
+                for index, url, extractors in url_jobs
+            ]
+            if text_handlers:
+                tasks.append(asyncio.create_task(self._text_result(text_index, text_handlers, text)))
         try:
-            for handler, task in zip(self.handlers, tasks, strict=True):
+            for next_result in asyncio.as_completed(tasks):
+                routed = await next_result
+                if routed is not None:
+                    yield routed
+        finally:
+            self._cancel_pending(tasks)
+            await self._finish_tasks(tasks)
+
+    @property
+    def in_flight(self) -> int:
+        """Number of distinct extractions currently running."""
+        return self._single_flight.in_flight
+
+    def message_cost(self, text: str) -> int:
+        """Return how many extractions a message may start, or 0 when no handler would see it."""
+        if not self._candidate_handlers(text):
+            return 0
+        if not self.multi_url:
+            return 1
+        return max(1, min(len(extract_urls(text)), self.max_urls_per_message))
+
+    def stats(self) -> dict[str, dict[str, object]]:
+        """Return runtime counters grouped by component."""
+        sections = {
+            "extractions": {"failures": self.failures, "timeouts": self.timeouts},
+            "single_flight": self._single_flight.stats(),
+        }
+        if self.cache is not None:
+            sections["cache"] = self.cache.stats()
+        if self.store is not None:
+            sections["result_store"] = self.store.stats()
+        if self.breakers:
+            sections["circuit_breakers"] = {name: breaker.stats() for name, breaker in self.breakers.items()}
+        return sections
+
+    def _build_host_index(self) -> None:
+        wildcard_positions = []
+        extractor_positions = set()
+        for position, handler in enumerate(self.handlers):
+            if isinstance(handler, UrlExtractor):
+                extractor_positions.add(position)
+            domains = getattr(handler, "domains", ())
+            if not domains:
+                wildcard_positions.append(position)
+                continue
+            for domain in domains:
+                self._host_index.add(domain, position)
+        self._wildcard_positions = tuple(wildcard_positions)
+        self._extractor_positions = frozenset(extractor_positions)
+
+    def _positions_for_url(self, url: str) -> tuple[int, ...]:
+        hostname = url_hostname(url)
+        if not hostname:
+            return ()
+        return self._host_index.lookup(hostname)
+
+    def _candidate_handlers(self, text: str) -> list[MessageHandler]:
+        """Return handlers whose domains appear in the text, in configured order."""
+        positions = set(self._wildcard_positions)
+        for url in extract_urls(text):
+            positions.update(self._positions_for_url(url))
+        return [self.handlers[position] for position in sorted(positions)]
+
+    def _plan_message(
+        self,
+        text: str,
+    ) -> tuple[list[MessageHandler], int, list[tuple[int, str, list[tuple[UrlExtractor, str]]]]]:
+        """Split a message into whole-text handlers and one extraction job per unique URL."""
+        text_positions = {
+            position for position in self._wildcard_positions if position not in self._extractor_positions
+        }
+        text_index: int | None = 0 if text_positions else None
+        url_jobs: list[tuple[int, str, list[tuple[UrlExtractor, str]]]] = []
+        seen_urls: set[str] = set()
+
+        for index, raw_url in enumerate(extract_urls(text)):
+            extractors: list[tuple[UrlExtractor, str]] = []
+            for position in sorted({*self._positions_for_url(raw_url), *self._wildcard_positions}):
+                if position not in self._extractor_positions:
+                    if position not in text_positions:
+                        text_positions.add(position)
+                        text_index = index if text_index is None else min(text_index, index)
+                    continue
+                handler = self.handlers[position]
+                if url := handler.match_url(raw_url):
+                    extractors.append((handler, url))
+            if not extractors:
+                continue
+            job_url = extractors[0][1]
+            if job_url in seen_urls:
+                continue
+            if len(url_jobs) >= self.max_urls_per_message:
+                logger.debug("Skipping URLs beyond the %d per-message limit.", self.max_urls_per_message)
+                break
+            seen_urls.add(job_url)
+            url_jobs.append((index, job_url, extractors))
+
+        text_handlers = [self.handlers[position] for position in sorted(text_positions)]
+        return text_handlers, text_index or 0, url_jobs
+
+    async def _first_result(self, handlers: Sequence[MessageHandler], text: str) -> HandlerResult | None:
+        """Run handlers concurrently and return the first non-empty result in their given order."""
+        if not handlers:
+            return None
+        if len(handlers) == 1:
+            return await self._handle_one(handlers[0], text)
+
+        tasks = [asyncio.create_task(self._handle_one(handler, text)) for handler in handlers]
+        try:
+            for handler, task in zip(handlers, tasks, strict=True):
                 result = await task
                 if result is not None:
                     logger.debug("Matched handler %s.", handler.name)
@@ -47,18 +240,125 @@ class MessageRouter:
         finally:
             await self._finish_tasks(tasks)
 
+    async def _text_result(
+        self,
+        index: int,
+        handlers: Sequence[MessageHandler],
+        text: str,
+    ) -> RoutedResult | None:
+        result = await self._first_result(handlers, text)
+        return RoutedResult(index=index, url=None, result=result) if result is not None else None
+
+    async def _extract_url(
+        self,
+        index: int,
+        url: str,
+        extractors: Sequence[tuple[UrlExtractor, str]],
+        semaphore: asyncio.Semaphore,
+    ) -> RoutedResult | None:
+        async with semaphore:
+            for extractor, extractor_url in extractors:
+                result = await self._extract_one(extractor, extractor_url)
+                if result is not None:
+                    logger.debug("Matched handler %s for link %d.", extractor.name, index + 1)
+                    return RoutedResult(index=index, url=url, result=result)
+        return None
+
+    async def _extract_one(self, extractor: UrlExtractor, url: str) -> HandlerResult | None:
+        """Extract one URL from cache, or share the work with concurrent requests for the same link."""
+        key = (extractor.name, canonical_url(url))
+        if self.cache is not None and (cached := self.cache.get(key)):
+            return cached.result
+        try:
+            # The shared extraction runs under the handler deadline only; each caller waits within its own budget.
+            async with asyncio.timeout(remaining()):
+                return await self._single_flight.run(
+                    key, lambda: self._extract_and_store(extractor, url, key), context=detached_context()
+                )
+        except TimeoutError:
+            self.timeouts += 1
+            logger.warning("Ran out of time waiting for handler %s.", extractor.name)
+            return None
+
+    async def _extract_and_store(
+        self,
+        extractor: UrlExtractor,
+        url: str,
+        key: tuple[str, str],
+    ) -> HandlerResult | None:
+        if self.store is not None and (stored := await self.store.get(key)):
+            if self.cache is not None:
+                self.cache.put(key, stored.result, stored.ttl)
+            return stored.result
+
+        breaker = self.breakers.get(extractor.name)
+        if breaker and not breaker.allow():
+            # Fail fast to a link-only result so the reply still carries the source link; it is not cached.
+            logger.debug("Circuit breaker for %s is open; skipping extraction.", extractor.name)
+            return MediaResult(urls=(), metadata=MediaMetadata(original_url=url))
+
+        try:
+            result = await self._extract_guarded(extractor, url, breaker)
+        except TimeoutError:
+            return None
+        if self.cache is not None:
+            self.cache.put(key, result)
+        if self.store is not None and self.ttl_policy is not None:
+            await self.store.put(key, result, self.ttl_policy.ttl_for(extractor.name, result))
+        return result
+
+    async def _extract_guarded(
+        self,
+        extractor: UrlExtractor,
+        url: str,
+        breaker: CircuitBreaker | None = None,
+    ) -> HandlerResult | None:
+        """Run one extraction within its deadline; timeouts are re-raised so they are never cached.
+
+        Only errors and timeouts count against the breaker; a link without media is a valid answer.
+        """
+        started = time.monotonic()
+        result = None
+        failed = False
+        try:
+            with deadline_scope(self.handler_timeout):
+                async with asyncio.timeout(remaining()):
+                    result = await extractor.extract(url)
+        except asyncio.CancelledError:
+            if breaker:
+                breaker.release()
+            raise
+        except TimeoutError:
+            self.timeouts += 1
+            logger.warning("Handler %s ran out of time.", extractor.name)
+            if breaker:
+                breaker.record(False, time.monotonic() - started)
+            raise
+        # An extractor bug must only fail its own link, never the rest of the message.
+        except Exception as e:  # noqa: BLE001
+            failed = True
+            self.failures += 1
+            logger.error("Handler %s failed with %s.", extractor.name, type(e).__name__)
+        if breaker:
+            breaker.record(not failed, time.monotonic() - started)
+        return result
+
     async def _handle_one(self, handler: MessageHandler, text: str) -> HandlerResult | None:
+        if isinstance(handler, UrlExtractor):
+            url = handler.match_url(text)
+            return await self._extract_one(handler, url) if url else None
         try:
             return await handler.handle(text)
-        except Exception as e:
+        # A failing link fixer must not stop the other handlers from answering.
+        except Exception as e:  # noqa: BLE001
             logger.error("Handler %s failed with %s.", handler.name, type(e).__name__)
             return None
 
-    def _cancel_pending(self, tasks: Sequence[asyncio.Task[HandlerResult | None]]) -> None:
+    def _cancel_pending(self, tasks: Sequence[asyncio.Task]) -> None:
         for task in tasks:
             if not task.done():
                 task.cancel()
 
-    async def _finish_tasks(self, tasks: Sequence[asyncio.Task[HandlerResult | None]]) -> None:
+    async def _finish_tasks(self, tasks: Sequence[asyncio.Task]) -> None:
         if tasks:
             await asyncio.gather(*tasks, return_exceptions=True)
@@ -0,0 +1,118 @@
+"""Priority lanes sharing a fixed pool of work slots."""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import deque
+from collections.abc import AsyncIterator, Callable, Sequence
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+
+
+@dataclass
+class Lane:
+    """One class of work; earlier lanes are served first.
+
+    Attributes:
+        name: Lane name used by callers and in stats
+        reserved: Slots kept free for this lane while it is below the reservation
+        limit: Upper bound on slots this lane may hold, or None for the whole pool
+    """
+
+    name: str
+    reserved: int = 0
+    limit: int | None = None
+    active: int = 0
+    granted: int = 0
+    wait_total: float = 0.0
+    wait_max: float = 0.0
+    waiters: deque[asyncio.Future[None]] = field(default_factory=deque)
+
+
+class LaneScheduler:
+    """Grant work slots to lanes in priority order with per-lane reservations.
+
+    A lane may take a free slot unless that would eat into capacity reserved for
+    another lane that is below its reservation. Released slots go to the first
+    lane, in configured order, that has waiters and may run.
+    """
+
+    def __init__(self, slots: int, lanes: Sequence[Lane], *, clock: Callable[[], float] = time.monotonic) -> None:
+        if sum(lane.reserved for lane in lanes) > slots:
+            raise ValueError("lane reservations exceed the slot pool")
+        self.slots = slots
+        self.lanes = {lane.name: lane for lane in lanes}
+        self._clock = clock
+
+    @property
+    def active(self) -> int:
+        return sum(lane.active for lane in self.lanes.values())
+
+    @asynccontextmanager
+    async def slot(self, lane_name: str) -> AsyncIterator[None]:
+        """Hold one slot in a lane for the duration of the block."""
+        lane = self.lanes[lane_name]
+        await self._acquire(lane)
+        try:
+            yield
+        finally:
+            lane.active -= 1
+            self._dispatch()
+
+    def stats(self) -> dict[str, dict[str, object]]:
+        return {
+            f"{lane.name}_lane": {
+                "active": lane.active,
+                "queued": len(lane.waiters),
+                "granted": lane.granted,
+                "avg_wait_ms": lane.wait_total / lane.granted * 1000 if lane.granted else 0.0,
+                "max_wait_ms": lane.wait_max * 1000,
+            }
+            for lane in self.lanes.values()
+        }
+
+    async def _acquire(self, lane: Lane) -> None:
+        queued_at = self._clock()
+        if not any(other.waiters for other in self.lanes.values()) and self._can_run(lane):
+            self._grant(lane, queued_at)
+            return
+
+        waiter: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        lane.waiters.append(waiter)
+        self._dispatch()
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                lane.active -= 1
+                self._dispatch()
+            elif waiter in lane.waiters:
+                lane.waiters.remove(waiter)
+            raise
+        self._record_wait(lane, queued_at)
+
+    def _can_run(self, lane: Lane) -> bool:
+        if lane.limit is not None and lane.active >= lane.limit:
+            return False
+        held_back = sum(max(0, other.reserved - other.active) for other in self.lanes.values() if other is not lane)
+        return self.slots - self.active - held_back > 0
+
+    def _grant(self, lane: Lane, queued_at: float) -> None:
+        lane.active += 1
+        self._record_wait(lane, queued_at)
+
+    def _record_wait(self, lane: Lane, queued_at: float) -> None:
+        waited = self._clock() - queued_at
+        lane.granted += 1
+        lane.wait_total += waited
+        lane.wait_max = max(lane.wait_max, waited)
+
+    def _dispatch(self) -> None:
+        for lane in self.lanes.values():
+            while lane.waiters and self._can_run(lane):
+                waiter = lane.waiters.popleft()
+                if waiter.done():
+                    continue
+                lane.active += 1
+                waiter.set_result(None)
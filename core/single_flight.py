@@ -0,0 +1,68 @@
+"""Coalescing of identical in-flight work."""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Callable, Coroutine, Hashable
+from contextvars import Context
+from dataclasses import dataclass
+from typing import Any, Generic, TypeVar
+
+T = TypeVar("T")
+
+
+@dataclass
+class _Call(Generic[T]):
+    task: asyncio.Task[T]
+    waiters: int = 0
+
+
+class SingleFlight(Generic[T]):
+    """Run one shared call per key and hand its result to every concurrent caller.
+
+    The shared call runs as its own task, in ``context`` when given and
+    otherwise in a copy of the first caller's context. Cancelling one caller
+    only detaches that caller; the shared call is cancelled when its last
+    caller leaves.
+    """
+
+    def __init__(self) -> None:
+        self._calls: dict[Hashable, _Call[T]] = {}
+        self.started = 0
+        self.coalesced = 0
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._calls)
+
+    async def run(
+        self,
+        key: Hashable,
+        factory: Callable[[], Coroutine[Any, Any, T]],
+        *,
+        context: Context | None = None,
+    ) -> T:
+        """Await the in-flight call for key, starting it with factory if none exists."""
+        call = self._calls.get(key)
+        if call is None:
+            call = _Call(asyncio.create_task(factory(), context=context))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda _task: self._forget(key, call))
+            self.started += 1
+        else:
+            self.coalesced += 1
+
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                call.task.cancel()
+
+    def stats(self) -> dict[str, int]:
+        return {"in_flight": self.in_flight, "started": self.started, "coalesced": self.coalesced}
+
+    def _forget(self, key: Hashable, call: _Call[T]) -> None:
+        if self._calls.get(key) is call:
+            del self._calls[key]
@@ -0,0 +1,141 @@
+"""Learned success rates and latencies of alternative fetch strategies."""
+
+from __future__ import annotations
+
+import asyncio
+from collections import Counter
+from collections.abc import Sequence
+from dataclasses import dataclass
+from typing import Protocol
+
+_MIN_SUCCESS_RATE = 0.01
+
+
+@dataclass(frozen=True)
+class StrategyScore:
+    """Rolling outcome of one strategy for one kind of request.
+
+    Attributes:
+        attempts: Completed attempts seen so far
+        success_rate: Exponentially weighted share of attempts that found media
+        latency: Exponentially weighted attempt duration in seconds
+    """
+
+    attempts: int = 0
+    success_rate: float = 0.0
+    latency: float = 0.0
+
+    def updated(self, success: bool, latency: float, weight: float) -> StrategyScore:
+        if not self.attempts:
+            return StrategyScore(1, float(success), latency)
+        return StrategyScore(
+            self.attempts + 1,
+            self.success_rate + weight * (float(success) - self.success_rate),
+            self.latency + weight * (latency - self.latency),
+        )
+
+    @property
+    def expected_cost(self) -> float:
+        """Seconds spent per successful attempt."""
+        return self.latency / max(self.success_rate, _MIN_SUCCESS_RATE)
+
+
+class StrategyStore(Protocol):
+    """Persistent backing store for strategy scores."""
+
+    async def load_strategies(self, name: str) -> dict[tuple[str, str], StrategyScore]: ...
+
+    async def put_strategy(self, name: str, key: tuple[str, str], score: StrategyScore) -> None: ...
+
+
+class StrategyStats:
+    """Order alternative strategies for each kind of request from their outcomes.
+
+    Scores are keyed by ``(kind, strategy)``. A kind keeps the caller's
+    default order until every strategy has ``min_attempts`` for it; after that
+    the strategies are tried cheapest first, by seconds spent per success.
+    Strategies whose success rate fell below ``skip_below`` are left out, except
+    on every ``probe_interval``-th plan for the kind, when they are tried last
+    so a path that recovers is noticed. With a ``store``, scores are loaded on
+    first use and written through, so they survive restarts.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        weight: float,
+        min_attempts: int,
+        skip_below: float,
+        probe_interval: int,
+        store: StrategyStore | None = None,
+    ) -> None:
+        self.name = name
+        self.weight = weight
+        self.min_attempts = min_attempts
+        self.skip_below = skip_below
+        self.probe_interval = probe_interval
+        self.store = store
+        self._scores: dict[tuple[str, str], StrategyScore] = {}
+        self._plans: Counter[str] = Counter()
+        self._loaded = store is None
+        self._load_lock = asyncio.Lock()
+        self.reordered = 0
+        self.skipped = 0
+        self.probes = 0
+
+    def score(self, kind: str, strategy: str) -> StrategyScore:
+        return self._scores.get((kind, strategy), StrategyScore())
+
+    async def plan(self, kind: str, default: Sequence[str]) -> tuple[str, ...]:
+        """Return the strategies to try for kind, in order."""
+        await self._load()
+        scores = {strategy: self.score(kind, strategy) for strategy in default}
+        if any(score.attempts < self.min_attempts for score in scores.values()):
+            return tuple(default)
+
+        ordered = sorted(default, key=lambda strategy: scores[strategy].expected_cost)
+        if ordered != list(default):
+            self.reordered += 1
+        failing = [strategy for strategy in ordered if scores[strategy].success_rate < self.skip_below]
+        if not failing or len(failing) == len(ordered):
+            return tuple(ordered)
+
+        working = [strategy for strategy in ordered if strategy not in failing]
+        self._plans[kind] += 1
+        if self._plans[kind] % self.probe_interval == 0:
+            self.probes += 1
+            return (*working, *failing)
+        self.skipped += len(failing)
+        return tuple(working)
+
+    async def record(self, kind: str, strategy: str, success: bool, latency: float) -> None:
+        """Fold one completed attempt into the strategy's score."""
+        key = (kind, strategy)
+        score = self.score(kind, strategy).updated(success, latency, self.weight)
+        self._scores[key] = score
+        if self.store is not None:
+            await self.store.put_strategy(self.name, key, score)
+
+    def stats(self) -> dict[str, dict[str, object]]:
+        return {
+            self.name: {
+                **{
+                    f"{kind}_{strategy}": f"{score.attempts} tries, {score.success_rate:.0%} ok, {score.latency:.2f}s"
+                    for (kind, strategy), score in sorted(self._scores.items())
+                },
+                "reordered": self.reordered,
+                "skipped": self.skipped,
+                "probes": self.probes,
+            }
+        }
+
+    async def _load(self) -> None:
+        if self._loaded:
+            return
+        async with self._load_lock:
+            if self._loaded or self.store is None:
+                return
+            for key, score in (await self.store.load_strategies(self.name)).items():
+                self._scores.setdefault(key, score)
+            self._loaded = True
@@ -19,12 +19,40 @@ class MediaMetadata:
     title: str | None = None
 
 
+@dataclass(frozen=True)
+class MediaRendition:
+    """One encoding of a media item and what is known about its size."""
+
+    url: str
+    bandwidth: int | None = None
+    duration: float | None = None
+
+    @property
+    def estimated_bytes(self) -> int | None:
+        """Size estimated from bandwidth in bits per second and duration in seconds."""
+        if not self.bandwidth or not self.duration:
+            return None
+        return int(self.bandwidth * self.duration / 8)
+
+
 @dataclass(frozen=True)
 class MediaResult:
-    """Direct media URLs extracted from a source page."""
+    """Direct media URLs extracted from a source page.
+
+    ``renditions`` lists alternative encodings of some URLs, best first and
+    starting with the URL itself, so delivery can fall back to a smaller one.
+    """
 
     urls: tuple[str, ...]
     metadata: MediaMetadata
+    renditions: tuple[tuple[MediaRendition, ...], ...] = ()
+
+    def renditions_for(self, url: str) -> tuple[MediaRendition, ...]:
+        """Return the known encodings of url, best first."""
+        for group in self.renditions:
+            if group and group[0].url == url:
+                return group
+        return (MediaRendition(url),)
 
 
 HandlerResult: TypeAlias = LinkFixResult | MediaResult
@@ -32,9 +60,14 @@ HandlerResult: TypeAlias = LinkFixResult | MediaResult
 
 @runtime_checkable
 class MessageHandler(Protocol):
-    """Protocol for message handlers."""
+    """Protocol for message handlers.
+
+    ``domains`` lists the hostnames a handler can act on; subdomains match too.
+    Handlers with no domains are offered every message.
+    """
 
     name: str
+    domains: tuple[str, ...]
 
     async def handle(self, text: str) -> HandlerResult | None:
         """
@@ -47,3 +80,25 @@ class MessageHandler(Protocol):
             HandlerResult if handled, None if not applicable
         """
         ...
+
+
+@runtime_checkable
+class UrlExtractor(MessageHandler, Protocol):
+    """Protocol for handlers that resolve one URL at a time."""
+
+    def match_url(self, text: str) -> str | None:
+        """Return the first normalized URL this handler accepts in the text."""
+        ...
+
+    async def extract(self, url: str) -> HandlerResult | None:
+        """Resolve a URL returned by match_url."""
+        ...
+
+
+@dataclass(frozen=True)
+class RoutedResult:
+    """One handler result and the position of the link it came from."""
+
+    index: int
+    url: str | None
+    result: HandlerResult
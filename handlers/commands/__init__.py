@@ -1,16 +1,20 @@
 """Bot command registration."""
 
+from collections.abc import Sequence
+
 from telegram.ext import Application
 
 from services.access_control import AccessControl
 
 from .access import load_access_commands
 from .menu import setup_bot_menu
+from .stats import StatsSource, load_stats_commands
 
 
-def load_commands(app: Application, access_control: AccessControl) -> None:
+def load_commands(app: Application, access_control: AccessControl, stats_sources: Sequence[StatsSource]) -> None:
     """Load command handlers into the application."""
     load_access_commands(app, access_control)
+    load_stats_commands(app, access_control, stats_sources)
 
 
-__all__ = ["load_commands", "setup_bot_menu"]
+__all__ = ["StatsSource", "load_commands", "setup_bot_menu"]
@@ -21,6 +21,7 @@ OWNER_GROUP_COMMANDS = (
 OWNER_PRIVATE_COMMANDS = (
     *OWNER_GROUP_COMMANDS,
     BotCommand("status", "Show access status"),
+    BotCommand("stats", "Show runtime stats"),
 )
 
 
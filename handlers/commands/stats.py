@@ -0,0 +1,65 @@
+"""Owner-only runtime stats command."""
+
+import logging
+from collections.abc import Mapping, Sequence
+from typing import Protocol, runtime_checkable
+
+from telegram import Update
+from telegram.ext import Application, CommandHandler, ContextTypes
+
+from services.access_control import AccessControl
+from utils.telegram_log import chat_label, user_label
+
+logger = logging.getLogger(__name__)
+
+
+@runtime_checkable
+class StatsSource(Protocol):
+    """Component that reports runtime counters grouped by section."""
+
+    def stats(self) -> Mapping[str, Mapping[str, object]]: ...
+
+
+def load_stats_commands(app: Application, access_control: AccessControl, sources: Sequence[StatsSource]) -> None:
+    """Register the owner stats command."""
+    app.add_handler(CommandHandler("stats", runtime_stats(access_control, sources)))
+
+
+def runtime_stats(access_control: AccessControl, sources: Sequence[StatsSource]):
+    async def callback(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+        user = update.effective_user
+        chat = update.effective_chat
+        logger.info("Command /stats from %s in %s.", user_label(user), chat_label(chat))
+        if not user or user.id != access_control.owner_id:
+            logger.info("Owner command from %s in %s blocked; user is not owner.", user_label(user), chat_label(chat))
+            return
+        if not update.message:
+            return
+        if not chat or chat.type != "private":
+            await update.message.reply_text("Use /stats in private chat.")
+            return
+        sections: dict[str, Mapping[str, object]] = {}
+        for source in sources:
+            sections.update(source.stats())
+        await update.message.reply_text(format_stats(sections))
+
+    return callback
+
+
+def format_stats(sections: Mapping[str, Mapping[str, object]]) -> str:
+    """Render component counters as a compact plain-text report."""
+    lines = ["Runtime stats"]
+    for section, values in sections.items():
+        lines.extend(("", _label(section)))
+        lines.extend(f"  {_label(key)}: {_value(value)}" for key, value in values.items())
+    return "\n".join(lines)
+
+
+def _label(key: str) -> str:
+    return key.replace("_", " ").capitalize()
+
+
+def _value(value: object) -> str:
+    if isinstance(value, float):
+        return f"{value:.2f}"
+    return str(value)
@@ -12,6 +12,7 @@ class LinkFixer(MessageHandler):
     def __init__(self, rule: LinkFixerRule):
         self.name = rule.name
         self.description = rule.description
+        self.domains = rule.domains
         self.pattern = re.compile(rule.pattern)
         self.replacement = rule.replacement
 
@@ -8,6 +8,7 @@ class LinkFixerRule:
     """Configuration for a link fixer service."""
 
     name: str
+    domains: tuple[str, ...]
     pattern: str
     replacement: str
     description: str = ""
@@ -16,24 +17,28 @@ class LinkFixerRule:
 LINK_FIXERS = [
     LinkFixerRule(
         name="x",
+        domains=("x.com", "twitter.com"),
         pattern=r"https?://(?:www\.)?(?:x|twitter)\.com",
         replacement="https://fixupx.com",
         description="X/Twitter -> fixupx.com",
     ),
     LinkFixerRule(
         name="tiktok",
+        domains=("tiktok.com",),
         pattern=r"https?://(?:www\.|vt\.)?tiktok\.com",
         replacement="https://www.tfxktok.com",
         description="TikTok -> tfxktok.com",
     ),
     LinkFixerRule(
         name="youtube",
+        domains=("youtube.com", "youtu.be"),
         pattern=r"https?://(?:www\.|m\.)?(?:youtube\.com|youtu\.be)",
         replacement="https://koutube.com",
         description="YouTube -> koutube.com",
     ),
     LinkFixerRule(
         name="pixiv",
+        domains=("pixiv.net",),
         pattern=r"https?://(?:www\.)?pixiv\.net",
         replacement="https://phixiv.net",
         description="Pixiv -> phixiv.net",
@@ -1,15 +1,17 @@
 """Media extractor handlers for complex media extraction."""
 
+from core.registry import ExtractorStore
+
 from .base import MediaExtractor
 from .facebook import FacebookExtractor
 from .instagram import InstagramExtractor
 from .reddit import RedditExtractor
 
 
-def build_media_extractors() -> list[MediaExtractor]:
+def build_media_extractors(*, store: ExtractorStore | None = None) -> list[MediaExtractor]:
     """Build media extractors in routing priority order."""
     return [
-        FacebookExtractor(),
+        FacebookExtractor(redirect_store=store, strategy_store=store),
         InstagramExtractor(),
         RedditExtractor(),
     ]
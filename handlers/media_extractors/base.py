@@ -14,10 +14,12 @@ class MediaExtractor(ABC, MessageHandler):
 
     Attributes:
         name: Unique handler name
+        domains: Hostnames routed to this extractor, including subdomains
         url_pattern: Regex pattern to match URLs
     """
 
     name: str = ""
+    domains: tuple[str, ...] = ()
     url_pattern: re.Pattern = re.compile("")
 
     async def handle(self, text: str) -> HandlerResult | None:
@@ -30,6 +32,22 @@ class MediaExtractor(ABC, MessageHandler):
         Returns:
             HandlerResult with media URLs and metadata, or None if no match
         """
+        url = self.match_url(text)
+        if not url:
+            return None
+
+        return await self.extract(url)
+
+    def match_url(self, text: str) -> str | None:
+        """
+        Find the first URL in text that this extractor can handle.
+
+        Args:
+            text: Message text or a single URL
+
+        Returns:
+            Normalized, validated URL, or None if no match
+        """
         match = self.url_pattern.search(text)
         if not match:
             return None
@@ -37,9 +55,11 @@ class MediaExtractor(ABC, MessageHandler):
         url = self._normalize_url(match.group(1))
         if not self._validate_url(url):
             return None
+        return url
 
-        result = await self._extract_media(url)
-        return result
+    async def extract(self, url: str) -> HandlerResult | None:
+        """Extract media from a URL previously returned by match_url."""
+        return await self._extract_media(url)
 
     @abstractmethod
     async def _extract_media(self, url: str) -> HandlerResult | None:
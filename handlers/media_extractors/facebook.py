@@ -1,22 +1,51 @@
 """Facebook media extractor."""
 
+from __future__ import annotations
+
+import asyncio
 import json
 import logging
 import re
-from contextlib import suppress
+import time
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
+from functools import cached_property
 from typing import Any
 from urllib.parse import parse_qsl, urlencode, urlparse, urlunparse
 
 import httpx
 import jmespath
 from lxml import html
-from lxml.etree import HTMLParser, ParserError
-
-from config import FACEBOOK_HEADERS, FACEBOOK_PARAMS_TO_KEEP, HTTP_TIMEOUT
-from core.types import MediaMetadata, MediaResult
+from lxml.etree import HTMLParser, HTMLPullParser, ParserError, XMLSyntaxError
+
+from config import (
+    FACEBOOK_ALBUM_CONCURRENCY,
+    FACEBOOK_ALBUM_MAX_PAGES,
+    FACEBOOK_HEADERS,
+    FACEBOOK_HEDGE_AUTH_GRACE,
+    FACEBOOK_HEDGE_DELAY,
+    FACEBOOK_HEDGE_ENABLED,
+    FACEBOOK_PARAMS_TO_KEEP,
+    FACEBOOK_PUBLIC_FIRST_KINDS,
+    FACEBOOK_REDIRECT_CACHE_ENABLED,
+    FACEBOOK_REDIRECT_CACHE_MAX_ENTRIES,
+    FACEBOOK_REDIRECT_CACHE_TTL,
+    FACEBOOK_STRATEGY_ADAPTIVE,
+    FACEBOOK_STRATEGY_MIN_ATTEMPTS,
+    FACEBOOK_STRATEGY_PROBE_INTERVAL,
+    FACEBOOK_STRATEGY_SKIP_BELOW,
+    FACEBOOK_STRATEGY_WEIGHT,
+    FACEBOOK_STREAMING,
+    HTTP_TIMEOUT,
+)
+from core.deadline import DeadlineExceeded, request_timeout
+from core.redirect_cache import Redirect, RedirectCache, RedirectStore
+from core.strategy_stats import StrategyStats, StrategyStore
+from core.types import MediaMetadata, MediaRendition, MediaResult
 from services.facebook_auth import get_facebook_cookies
 from services.http import get_client
+from services.parse_pool import get_parse_executor, run_parse
+from utils.json_index import JsonIndex
 from utils.text import strip_url_params
 
 from .base import MediaExtractor
@@ -26,7 +55,9 @@ logger = logging.getLogger(__name__)
 RE_FACEBOOK = re.compile(r"(https?://(?:www\.|m\.|touch\.)?facebook\.com/\S+)")
 
 _MAX_REDIRECTS = 10
-_JSON_PARSER = HTMLParser(no_network=True, remove_comments=True, remove_pis=True, recover=True)
+_MALFORMED = object()
+_PARSER_OPTIONS = {"no_network": True, "remove_comments": True, "remove_pis": True, "recover": True}
+_JSON_PARSER = HTMLParser(**_PARSER_OPTIONS)
 
 # JSON script candidates for every supported page shape:
 # - /reel/{id}: short-form playback lives under video.creation_story.
@@ -49,6 +80,13 @@ _MEDIA_SCRIPT_XPATH = (
 # /permalink.php?story_fbid=...&id=..., and /{page}/posts/{pfbid}.
 _ROUTE_SCRIPT_XPATH = '//script[@type="application/json" and @data-sjs][contains(., "initialRouteInfo")]/text()'
 
+# The same script selection as the XPaths above, applied to scripts as they
+# close while a page is streamed.
+_MEDIA_SCRIPT_MARKERS = ("videoDeliveryLegacyFields", "currMedia", "node_v2", "attachments")
+_ROUTE_SCRIPT_MARKER = "initialRouteInfo"
+# Page kinds scoped to one media ID; a streamed page can stop once that media is found.
+_EARLY_STOP_KINDS = frozenset({"reel", "video", "photo", "story_card", "watch_video"})
+
 _REEL_QUERIES = (
     # Endpoint: /reel/{id}
     # JSON shape: video.creation_story.short_form_video_context.playback_video
@@ -155,6 +193,43 @@ _STORY_CARD_QUERIES = (
         "}"
     ),
 )
+
+
+@dataclass(frozen=True)
+class ExtractionPlan:
+    """Media queries for one page kind, each evaluated only at its anchor nodes.
+
+    Every query starts with a field lookup, so it can only match an object that
+    has that field. Running a plan over nodes gives the same results in the same
+    order as running every query against every node.
+    """
+
+    steps: tuple[tuple[str, Any], ...]
+
+    @classmethod
+    def compile(cls, queries: tuple[Any, ...]) -> "ExtractionPlan":
+        """Anchor each compiled query at the first field of its expression."""
+        return cls(tuple((_QUERY_ANCHOR.match(query.expression).group(), query) for query in queries))
+
+    @property
+    def anchors(self) -> tuple[str, ...]:
+        """Keys an object needs for any query in this plan to match it."""
+        return tuple(dict.fromkeys(anchor for anchor, _ in self.steps))
+
+    def run(self, nodes: list[dict[str, Any]]):
+        """Yield raw media shapes from nodes in node order, then query priority."""
+        for node in nodes:
+            for anchor, query in self.steps:
+                if anchor in node:
+                    yield from _iter_result_items(query.search(node))
+
+
+_QUERY_ANCHOR = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+_REEL_PLAN = ExtractionPlan.compile(_REEL_QUERIES)
+_VIDEO_PLAN = ExtractionPlan.compile(_VIDEO_QUERIES)
+_PHOTO_PLAN = ExtractionPlan.compile(_PHOTO_QUERIES)
+_STORY_ATTACHMENT_PLAN = ExtractionPlan.compile(_STORY_ATTACHMENT_QUERIES)
+_STORY_CARD_PLAN = ExtractionPlan.compile(_STORY_CARD_QUERIES)
 _WATCH_CAPTION_QUERY = jmespath.compile("creation_story.comet_sections.message.story.message.text")
 _WATCH_THUMBNAIL_QUERY = jmespath.compile(
     "first_frame_thumbnail || preferred_thumbnail.image.uri || thumbnailImage.uri || previewImage.uri || image.uri"
@@ -188,6 +263,20 @@ _STORY_TOKEN_FIELDS_QUERY = jmespath.compile(
     "node_v2.post_id,node_v2.story_fbid,node_v2.story_token,node_v2.url,node_v2.permalink_url,node_v2.www_url"
     "][]"
 )
+# Keys whose objects the lookups below start from; JsonIndex groups them in its single walk.
+_STORY_TOKEN_KEYS = ("post_id", "story_fbid", "story_token", "url", "permalink_url", "www_url", "node_v2")
+_INDEXED_KEYS = (
+    *_STORY_TOKEN_KEYS,
+    # Extraction plan anchors; see ExtractionPlan.
+    "video",
+    "currMedia",
+    "attachments",
+    "all_subattachments",
+    "params",
+    "mediaset_token",
+    "all_video_dash_prefetch_representations",
+    "initialRouteInfo",
+)
 _CANONICAL_STORY_QUERY = jmespath.compile(
     "{"
     "post_id:post_id,"
@@ -212,6 +301,7 @@ class MediaCandidate:
     url: str
     thumbnail: str | None = None
     caption: str | None = None
+    renditions: tuple[MediaRendition, ...] = ()
 
 
 @dataclass(frozen=True)
@@ -222,6 +312,14 @@ class StoryAlbumInfo:
     count: int
 
 
+@dataclass(frozen=True)
+class AlbumPage:
+    """Photos from one mediaset page and the cursors of the pages after it."""
+
+    candidates: tuple[MediaCandidate, ...]
+    cursors: tuple[str, ...] = ()
+
+
 @dataclass(frozen=True)
 class CanonicalStoryInfo:
     """Canonical story source metadata discovered from a video page."""
@@ -231,6 +329,176 @@ class CanonicalStoryInfo:
     caption: str | None = None
 
 
+class ScriptPayloads:
+    """Raw JSON script bodies of one page, each decoded at most once and only on demand."""
+
+    def __init__(self, scripts: list[str] | None = None) -> None:
+        self.scripts: list[str] = []
+        self._documents: dict[int, Any] = {}
+        for raw_json in scripts or ():
+            self.append(raw_json)
+
+    def append(self, raw_json: str) -> int:
+        """Add a script body without decoding it and return its position."""
+        self.scripts.append(raw_json)
+        return len(self.scripts) - 1
+
+    def matching(self, needles: tuple[str, ...]) -> list[int]:
+        """Return positions of scripts whose raw text mentions any needle."""
+        return [
+            position for position, raw_json in enumerate(self.scripts) if any(needle in raw_json for needle in needles)
+        ]
+
+    def documents(self, positions: list[int] | None = None) -> list[Any]:
+        """Decode the scripts at positions, or all of them, in page order."""
+        if positions is None:
+            positions = range(len(self.scripts))
+        documents = []
+        for position in positions:
+            if position not in self._documents:
+                self._documents[position] = _decode_script(self.scripts[position])
+            if self._documents[position] is not _MALFORMED:
+                documents.append(self._documents[position])
+        return documents
+
+    @property
+    def decoded(self) -> int:
+        """Number of scripts decoded so far."""
+        return len(self._documents)
+
+
+class ParsedPage:
+    """A fetched Facebook page parsed once and shared by every extraction stage.
+
+    Script JSON is decoded and indexed on first use, so pages that are answered
+    from OpenGraph tags alone never pay for it. Media lookups for one linked ID
+    or story decode the scripts that mention it first; the rest of the page is
+    decoded only when those hold no media or a metadata fallback has to search
+    all of it.
+    """
+
+    def __init__(
+        self,
+        tree: Any,
+        media_scripts: ScriptPayloads | None = None,
+        route_scripts: ScriptPayloads | None = None,
+    ) -> None:
+        self.tree = tree
+        self.media_scripts = media_scripts or ScriptPayloads(_script_texts(tree, _MEDIA_SCRIPT_XPATH))
+        self.route_scripts = route_scripts or ScriptPayloads(_script_texts(tree, _ROUTE_SCRIPT_XPATH))
+        self._scoped_media: dict[tuple[str, ...], JsonIndex] = {}
+        self._story_indexes: dict[int, StoryTokenIndex] = {}
+
+    @cached_property
+    def media(self) -> JsonIndex:
+        """Index of every media script payload."""
+        return _json_index(self.media_scripts.documents())
+
+    @cached_property
+    def route(self) -> JsonIndex:
+        """Index of the route script payloads."""
+        return _json_index(self.route_scripts.documents())
+
+    @cached_property
+    def story_tokens(self) -> tuple[str, ...]:
+        """Canonical story tokens advertised by the route payloads."""
+        return _route_story_tokens(self.route)
+
+    def media_for(self, url: str) -> JsonIndex:
+        """Index of the media payloads most likely to hold media for url.
+
+        These are the scripts whose raw text names the linked media ID or story
+        token. Callers fall back to ``media`` when they hold nothing.
+        """
+        needles = _media_needles(url, self.story_tokens)
+        if needles is None:
+            return self.media
+        if needles not in self._scoped_media:
+            self._scoped_media[needles] = _json_index(
+                self.media_scripts.documents(self.media_scripts.matching(needles))
+            )
+        return self._scoped_media[needles]
+
+    def story_index(self, index: JsonIndex) -> StoryTokenIndex:
+        """Story token index over ``media`` or a ``media_for`` index, built once per index."""
+        if id(index) not in self._story_indexes:
+            self._story_indexes[id(index)] = StoryTokenIndex(index)
+        return self._story_indexes[id(index)]
+
+
+class PageStream:
+    """Incrementally parse a streamed Facebook page.
+
+    Matching JSON scripts are collected as soon as their closing tag arrives.
+    Pages scoped to one media ID are complete once the route payload and a
+    candidate for that ID have arrived, so titles and story tokens are still
+    available when the rest of the page is skipped. Feeding only tokenizes the
+    HTML and picks out scripts that mention the linked ID; decoding them is left
+    to ``has_linked_media`` so callers can run it on a parse worker.
+    """
+
+    def __init__(self, url: str) -> None:
+        self.url = url
+        self._parser = HTMLPullParser(events=("end",), tag="script", **_PARSER_OPTIONS)
+        self._early_stop = _page_kind(url) in _EARLY_STOP_KINDS
+        self._needles = _media_needles(url) if self._early_stop else ()
+        self.media_scripts = ScriptPayloads()
+        self.route_scripts = ScriptPayloads()
+
+    def feed(self, chunk: str) -> list[int]:
+        """Feed the next chunk of HTML and return positions of new scripts that may hold the linked media."""
+        new_media = self._read_scripts(chunk)
+        if not self._early_stop or not new_media or not self.route_scripts.scripts:
+            return []
+        if self._needles is None:
+            return new_media
+        return [
+            position
+            for position in new_media
+            if any(needle in self.media_scripts.scripts[position] for needle in self._needles)
+        ]
+
+    def has_linked_media(self, positions: list[int]) -> bool:
+        """Decode the media scripts at positions and return whether they hold the linked media."""
+        if not self.route_scripts.documents():
+            return False
+        return bool(_extract_media_candidates(self.media_scripts.documents(positions), self.url))
+
+    def _read_scripts(self, chunk: str) -> list[int]:
+        self._parser.feed(chunk)
+        new_media = []
+        for _, script in self._parser.read_events():
+            raw_json = script.text
+            if script.get("type") != "application/json" or script.get("data-sjs") is None or not raw_json:
+                continue
+            if not raw_json.strip():
+                continue
+            if "__bbox" in raw_json and any(marker in raw_json for marker in _MEDIA_SCRIPT_MARKERS):
+                new_media.append(self.media_scripts.append(raw_json))
+            if _ROUTE_SCRIPT_MARKER in raw_json:
+                self.route_scripts.append(raw_json)
+        return new_media
+
+    def close(self) -> ParsedPage | None:
+        """Finish parsing whatever has been fed so far."""
+        try:
+            tree = self._parser.close()
+        except (ParserError, XMLSyntaxError, ValueError) as e:
+            logger.debug("Failed to parse Facebook HTML: %r.", e)
+            return None
+        if tree is None:
+            return None
+        return ParsedPage(tree, self.media_scripts, self.route_scripts)
+
+
+@dataclass(frozen=True)
+class PageExtraction:
+    """Plain outcome of extracting one Facebook page, safe to return from a parse worker."""
+
+    result: MediaResult | None
+    album: StoryAlbumInfo | None = None
+
+
 class FacebookAuthExpired(RuntimeError):
     """Raised when authenticated Facebook cookies no longer reach content pages."""
 
@@ -359,20 +627,17 @@ def _allows_route_story_tokens(url: str) -> bool:
     return len(parts) >= 2 and parts[0] == "share"
 
 
-def _route_story_tokens(documents: list[Any]) -> tuple[str, ...]:
+def _route_story_tokens(documents: list[Any] | JsonIndex) -> tuple[str, ...]:
     """Extract canonical story tokens from Facebook route payloads."""
     tokens = []
-    for document in documents:
-        for node in _walk_json(document):
-            if not isinstance(node, dict):
-                continue
-            params = node.get("params")
-            if not isinstance(params, dict):
-                continue
-            for key in ("story_token", "story_fbid"):
-                story_token = params.get(key)
-                if isinstance(story_token, str) and story_token:
-                    tokens.append(story_token)
+    for node in _json_index(documents).with_key("params"):
+        params = node["params"]
+        if not isinstance(params, dict):
+            continue
+        for key in ("story_token", "story_fbid"):
+            story_token = params.get(key)
+            if isinstance(story_token, str) and story_token:
+                tokens.append(story_token)
     return tuple(dict.fromkeys(tokens))
 
 
@@ -386,19 +651,57 @@ def _story_tokens_for_url(url: str, story_tokens: tuple[str, ...] = ()) -> tuple
     return ()
 
 
-def _node_contains_story_token(node: dict[str, Any], story_token: str) -> bool:
-    """Return true when a JSON subtree belongs to the requested story token."""
-    with suppress(TypeError, ValueError):
-        return story_token in json.dumps(node, ensure_ascii=False)
-    return False
+class StoryTokenIndex:
+    """Story-shaped objects of one page, keyed by the story tokens they identify.
 
+    The fields in ``_STORY_TOKEN_FIELDS_QUERY`` are read once per object when
+    the index is built. Each field is keyed by its whole value and, for URLs,
+    by every path segment and query value, so most token lookups are a dict
+    read. Tokens that are no key, such as the tail of a prefixed ID or a
+    fragment of an encoded URL, fall back to a substring scan of the fields,
+    memoized per token.
+    """
 
-def _story_node_matches_token(node: dict[str, Any], story_token: str) -> bool:
-    """Return true when a story-shaped node itself identifies the requested story."""
-    for value in _STORY_TOKEN_FIELDS_QUERY.search(node) or ():
-        if isinstance(value, str) and story_token in value:
-            return True
-    return False
+    def __init__(self, index: JsonIndex) -> None:
+        self._fields: list[tuple[dict[str, Any], tuple[str, ...]]] = []
+        self._positions: dict[int, int] = {}
+        self._by_token: dict[str, list[dict[str, Any]]] = {}
+        for node in index.with_any_key(_STORY_TOKEN_KEYS):
+            if not (values := _story_token_values(node)):
+                continue
+            self._positions[id(node)] = len(self._fields)
+            self._fields.append((node, values))
+            for token in {token for value in values for token in _story_token_keys(value)}:
+                self._by_token.setdefault(token, []).append(node)
+
+    def nodes_for(self, story_token: str) -> list[dict[str, Any]]:
+        """Return objects whose identifying fields name or contain story_token, in document order."""
+        if story_token not in self._by_token:
+            self._by_token[story_token] = [
+                node for node, values in self._fields if any(story_token in value for value in values)
+            ]
+        return self._by_token[story_token]
+
+    def nodes_for_any(self, story_tokens: tuple[str, ...]) -> list[dict[str, Any]]:
+        """Return objects that identify any of story_tokens, in document order."""
+        if len(story_tokens) == 1:
+            return self.nodes_for(story_tokens[0])
+        matched = {id(node): node for story_token in story_tokens for node in self.nodes_for(story_token)}
+        return [matched[key] for key in sorted(matched, key=self._positions.__getitem__)]
+
+
+def _story_token_values(node: dict[str, Any]) -> tuple[str, ...]:
+    """Return the string fields that identify which story a node belongs to."""
+    return tuple(value for value in _STORY_TOKEN_FIELDS_QUERY.search(node) or () if isinstance(value, str))
+
+
+def _story_token_keys(value: str) -> set[str]:
+    """Return the tokens one identifying field can be looked up by."""
+    parsed = urlparse(value)
+    keys = {value}
+    keys.update(part for part in parsed.path.split("/") if part)
+    keys.update(item for _, item in parse_qsl(parsed.query) if item)
+    return keys
 
 
 def _media_file_key(url: str) -> str:
@@ -415,29 +718,48 @@ def _parse_html(html_content: str):
         return None
 
 
-def _script_json(tree, xpath: str) -> list[Any]:
-    """Load JSON payloads from script nodes selected by XPath."""
-    documents = []
-    for raw_json in tree.xpath(xpath):
-        if not isinstance(raw_json, str) or not raw_json.strip():
-            continue
-        try:
-            documents.append(json.loads(raw_json))
-        except json.JSONDecodeError:
-            logger.debug("Skipping malformed Facebook JSON script.")
-    return documents
+def _parse_page(html_content: str) -> ParsedPage | None:
+    """Parse a Facebook page for every extraction stage that needs it."""
+    tree = _parse_html(html_content)
+    if tree is None:
+        return None
+    return ParsedPage(tree)
 
 
-def _walk_json(value: Any):
-    """Yield a JSON value and all nested JSON containers."""
-    if isinstance(value, dict):
-        yield value
-        for child in value.values():
-            yield from _walk_json(child)
-    elif isinstance(value, list):
-        yield value
-        for child in value:
-            yield from _walk_json(child)
+def _script_texts(tree, xpath: str) -> list[str]:
+    """Collect raw JSON payloads from script nodes selected by XPath."""
+    return [raw_json for raw_json in tree.xpath(xpath) if isinstance(raw_json, str) and raw_json.strip()]
+
+
+def _decode_script(raw_json: str) -> Any:
+    """Decode one JSON script body, returning _MALFORMED when it is not JSON."""
+    try:
+        return json.loads(raw_json)
+    except json.JSONDecodeError:
+        logger.debug("Skipping malformed Facebook JSON script.")
+        return _MALFORMED
+
+
+def _media_needles(url: str, story_tokens: tuple[str, ...] = ()) -> tuple[str, ...] | None:
+    """Return strings every script holding media for url must contain, or None when any script may.
+
+    An empty tuple means no script can hold scoped media for url. Watch pages are
+    never scoped because DASH prefetch entries may omit their video ID.
+    """
+    kind = _page_kind(url)
+    if kind == "story":
+        return _story_tokens_for_url(url, story_tokens)
+    if kind in {"reel", "video", "photo", "story_card"}:
+        target_id = _url_media_id(url, kind)
+        return (target_id,) if target_id else ()
+    return None
+
+
+def _json_index(documents: list[Any] | JsonIndex) -> JsonIndex:
+    """Index decoded documents in one walk, reusing an index that is already built."""
+    if isinstance(documents, JsonIndex):
+        return documents
+    return JsonIndex(documents, _INDEXED_KEYS)
 
 
 def _iter_result_items(value: Any):
@@ -480,55 +802,49 @@ def _media_candidate(raw: dict[str, Any]) -> MediaCandidate | None:
         url=media_url,
         thumbnail=thumbnail,
         caption=_clean_text(raw.get("caption")),
+        renditions=_renditions(_clean_url(raw.get("hd")), _clean_url(raw.get("sd"))),
     )
 
 
-def _story_video_ids(
-    documents: list[Any],
-    story_tokens: tuple[str, ...],
-) -> tuple[str, ...]:
+def _story_video_ids(story_nodes: list[dict[str, Any]]) -> tuple[str, ...]:
     """Extract video IDs referenced by the requested story subtree."""
     video_ids = []
-    for document in documents:
-        for node in _walk_json(document):
-            if not isinstance(node, dict) or not any(_story_node_matches_token(node, token) for token in story_tokens):
+    for node in story_nodes:
+        for media in _iter_result_items(_STORY_ATTACHMENT_MEDIA_QUERY.search(node)):
+            if media.get("type") != "Video":
                 continue
-            for media in _iter_result_items(_STORY_ATTACHMENT_MEDIA_QUERY.search(node)):
-                if media.get("type") != "Video":
-                    continue
-                video_id = media.get("id")
-                if isinstance(video_id, str) and video_id:
-                    video_ids.append(video_id)
+            video_id = media.get("id")
+            if isinstance(video_id, str) and video_id:
+                video_ids.append(video_id)
     return tuple(dict.fromkeys(video_ids))
 
 
-def _canonical_story_info_for_video(documents: list[Any], video_id: str | None) -> CanonicalStoryInfo | None:
+def _canonical_story_info_for_video(
+    documents: list[Any] | JsonIndex,
+    video_id: str | None,
+) -> CanonicalStoryInfo | None:
     """Extract the group story source for a reel/video page when Facebook embeds it."""
     if not video_id:
         return None
 
-    for document in documents:
-        for node in _walk_json(document):
-            if not isinstance(node, dict):
-                continue
-
-            story = _CANONICAL_STORY_QUERY.search(node)
-            if not isinstance(story, dict) or not _canonical_story_references_video(story, video_id):
-                continue
+    for node in _json_index(documents).with_key("post_id"):
+        story = _CANONICAL_STORY_QUERY.search(node)
+        if not isinstance(story, dict) or not _canonical_story_references_video(story, video_id):
+            continue
 
-            post_id = story.get("post_id")
-            group_id = story.get("group_id")
-            if not isinstance(post_id, str) or not post_id or not group_id:
-                continue
+        post_id = story.get("post_id")
+        group_id = story.get("group_id")
+        if not isinstance(post_id, str) or not post_id or not group_id:
+            continue
 
-            group_name = _clean_text(story.get("group_name"))
-            caption = _clean_text(story.get("message"))
-            story_text = _clean_text(story.get("seo_title")) or _first_text_line(caption)
-            return CanonicalStoryInfo(
-                url=f"https://www.facebook.com/groups/{group_id}/permalink/{post_id}/",
-                title=" | ".join(part for part in (group_name, story_text) if part) or None,
-                caption=caption,
-            )
+        group_name = _clean_text(story.get("group_name"))
+        caption = _clean_text(story.get("message"))
+        story_text = _clean_text(story.get("seo_title")) or _first_text_line(caption)
+        return CanonicalStoryInfo(
+            url=f"https://www.facebook.com/groups/{group_id}/permalink/{post_id}/",
+            title=" | ".join(part for part in (group_name, story_text) if part) or None,
+            caption=caption,
+        )
     return None
 
 
@@ -576,17 +892,8 @@ def _story_photo_candidate(node: dict[str, Any]) -> MediaCandidate | None:
     )
 
 
-def _extract_scoped_story_photo_candidates(node: dict[str, Any]) -> list[MediaCandidate]:
-    """Extract all photo media from an already scoped story subtree."""
-    candidates = []
-    for child in _walk_json(node):
-        if isinstance(child, dict) and (candidate := _story_photo_candidate(child)):
-            candidates.append(candidate)
-    return candidates
-
-
 def _find_story_album_info(
-    documents: list[Any],
+    documents: list[Any] | JsonIndex,
     url: str,
     story_tokens: tuple[str, ...] = (),
 ) -> StoryAlbumInfo | None:
@@ -595,144 +902,163 @@ def _find_story_album_info(
     if not target_story_tokens:
         return None
 
-    for document in documents:
-        for node in _walk_json(document):
-            if not isinstance(node, dict):
-                continue
-            album_token = node.get("mediaset_token")
-            subattachments = node.get("all_subattachments")
-            if not isinstance(album_token, str) or not isinstance(subattachments, dict):
-                continue
-            node_url = str(node.get("url") or "")
-            if not any(story_token in node_url for story_token in target_story_tokens):
-                continue
-            count = subattachments.get("count")
-            nodes = subattachments.get("nodes") or []
-            if isinstance(count, int) and isinstance(nodes, list) and count > len(nodes):
-                return StoryAlbumInfo(album_token, count)
+    for node in _json_index(documents).with_key("mediaset_token"):
+        album_token = node["mediaset_token"]
+        subattachments = node.get("all_subattachments")
+        if not isinstance(album_token, str) or not isinstance(subattachments, dict):
+            continue
+        node_url = str(node.get("url") or "")
+        if not any(story_token in node_url for story_token in target_story_tokens):
+            continue
+        count = subattachments.get("count")
+        nodes = subattachments.get("nodes") or []
+        if isinstance(count, int) and isinstance(nodes, list) and count > len(nodes):
+            return StoryAlbumInfo(album_token, count)
     return None
 
 
-def _queries_for_url(url: str) -> tuple[Any, ...]:
-    """Select the narrowest structured media queries for a Facebook URL."""
+def _plan_for_url(url: str) -> ExtractionPlan:
+    """Select the narrowest structured media plan for a Facebook URL."""
     match _page_kind(url):
         case "reel":
-            return _REEL_QUERIES
+            return _REEL_PLAN
         case "video":
-            return _VIDEO_QUERIES
+            return _VIDEO_PLAN
         case "photo":
-            return _PHOTO_QUERIES
+            return _PHOTO_PLAN
         case "story_card":
-            return _STORY_CARD_QUERIES
+            return _STORY_CARD_PLAN
         case _:
-            return _STORY_ATTACHMENT_QUERIES
+            return _STORY_ATTACHMENT_PLAN
 
 
-def _extract_watch_video_candidate(documents: list[Any], target_id: str) -> MediaCandidate | None:
+def _extract_watch_video_candidate(index: JsonIndex, target_id: str) -> MediaCandidate | None:
     """Extract /watch/?v= media from DASH prefetch data for the current video page."""
-    if scoped_candidate := _extract_video_playback_candidate(documents, target_id):
+    if scoped_candidate := _extract_video_playback_candidate(index, target_id):
         return scoped_candidate
 
-    return _extract_dash_prefetch_video_candidate(documents, target_id)
+    return _extract_dash_prefetch_video_candidate(index, target_id)
 
 
-def _extract_dash_prefetch_video_candidate(documents: list[Any], target_id: str) -> MediaCandidate | None:
+def _extract_dash_prefetch_video_candidate(index: JsonIndex, target_id: str) -> MediaCandidate | None:
     """Extract a video candidate from DASH prefetch data for a known video ID."""
 
-    best_url = None
-    best_bandwidth = -1
+    representations = []
     thumbnail = None
     caption = None
+    duration = None
 
-    for document in documents:
-        for node in _walk_json(document):
-            if not isinstance(node, dict):
-                continue
+    for node in index.with_id(target_id):
+        thumbnail = thumbnail or _extract_video_thumbnail(index, node)
+        caption = caption or _clean_text(_WATCH_CAPTION_QUERY.search(node))
+        duration = duration or _video_duration(node)
 
-            if str(node.get("id")) == target_id:
-                thumbnail = thumbnail or _extract_video_thumbnail(node)
-                caption = caption or _clean_text(_WATCH_CAPTION_QUERY.search(node))
-
-            for prefetch in node.get("all_video_dash_prefetch_representations") or []:
-                if not isinstance(prefetch, dict):
-                    continue
-                prefetch_video_id = prefetch.get("video_id")
-                if prefetch_video_id is not None and str(prefetch_video_id) != target_id:
+    for node in index.with_key("all_video_dash_prefetch_representations"):
+        for prefetch in node["all_video_dash_prefetch_representations"] or []:
+            if not isinstance(prefetch, dict):
+                continue
+            prefetch_video_id = prefetch.get("video_id")
+            if prefetch_video_id is not None and str(prefetch_video_id) != target_id:
+                continue
+            for representation in prefetch.get("representations") or []:
+                if not isinstance(representation, dict):
                     continue
-                for representation in prefetch.get("representations") or []:
-                    if not isinstance(representation, dict):
-                        continue
-                    if representation.get("mime_type") != "video/mp4":
-                        continue
-                    media_url = _clean_url(representation.get("base_url"))
-                    if not media_url:
-                        continue
-                    bandwidth = representation.get("bandwidth")
-                    bandwidth = bandwidth if isinstance(bandwidth, int) else 0
-                    if bandwidth > best_bandwidth:
-                        best_url = media_url
-                        best_bandwidth = bandwidth
+                if rendition := _dash_rendition(representation):
+                    representations.append(rendition)
 
-    if not best_url:
+    if not representations:
         return None
-    return MediaCandidate(id=target_id, url=best_url, thumbnail=thumbnail, caption=caption)
+    renditions = _dash_renditions(representations, duration)
+    return MediaCandidate(
+        id=target_id, url=renditions[0].url, thumbnail=thumbnail, caption=caption, renditions=renditions
+    )
 
 
-def _extract_video_playback_candidate(documents: list[Any], target_id: str) -> MediaCandidate | None:
+def _extract_video_playback_candidate(index: JsonIndex, target_id: str) -> MediaCandidate | None:
     """Extract direct playback URLs from a scoped Facebook Video node."""
-    for document in documents:
-        for node in _walk_json(document):
-            if isinstance(node, dict) and str(node.get("id")) == target_id:
-                if candidate := _extract_video_playback_from_node(node, target_id):
-                    return candidate
+    for node in index.with_id(target_id):
+        if candidate := _extract_video_playback_from_node(index, node, target_id):
+            return candidate
     return None
 
 
-def _extract_video_playback_from_node(node: dict[str, Any], target_id: str) -> MediaCandidate | None:
+def _extract_video_playback_from_node(index: JsonIndex, node: dict[str, Any], target_id: str) -> MediaCandidate | None:
     """Extract progressive or DASH playback URLs from a Facebook Video subtree."""
-    thumbnail = _extract_video_thumbnail(node)
-    caption = _extract_json_text([node], _VIDEO_NODE_CAPTION_QUERIES)
+    subtree = index.subtree(node)
+    thumbnail = _extract_video_thumbnail(index, node)
+    caption = _extract_json_text(subtree, _VIDEO_NODE_CAPTION_QUERIES)
 
     legacy = node.get("videoDeliveryLegacyFields")
+    legacy_renditions: tuple[MediaRendition, ...] = ()
     if isinstance(legacy, dict):
-        media_url = _clean_url(legacy.get("browser_native_hd_url") or legacy.get("browser_native_sd_url"))
-        if media_url:
-            return MediaCandidate(id=target_id, url=media_url, thumbnail=thumbnail, caption=caption)
-
-    progressive_url = None
-    progressive_score = -1
-    dash_url = None
-    dash_bandwidth = -1
-    for child in _walk_json(node):
-        if not isinstance(child, dict):
-            continue
+        legacy_renditions = _renditions(
+            _clean_url(legacy.get("browser_native_hd_url")), _clean_url(legacy.get("browser_native_sd_url"))
+        )
 
+    progressive = []
+    dash = []
+    for child in subtree:
         if media_url := _clean_url(child.get("progressive_url")):
-            score = _progressive_quality_score(child)
-            if score > progressive_score:
-                progressive_url = media_url
-                progressive_score = score
-
-        if child.get("mime_type") == "video/mp4" and (media_url := _clean_url(child.get("base_url"))):
-            bandwidth = child.get("bandwidth")
-            bandwidth = bandwidth if isinstance(bandwidth, int) else 0
-            if bandwidth > dash_bandwidth:
-                dash_url = media_url
-                dash_bandwidth = bandwidth
-
-    media_url = progressive_url or dash_url
-    if not media_url:
+            progressive.append((_progressive_quality_score(child), media_url))
+        if rendition := _dash_rendition(child):
+            dash.append(rendition)
+
+    # Legacy and progressive URLs are muxed; DASH representations are kept as a last resort.
+    progressive.sort(key=lambda item: item[0], reverse=True)
+    renditions = _renditions(
+        *(rendition.url for rendition in legacy_renditions),
+        *(media_url for _, media_url in progressive),
+        *_dash_renditions(dash, _video_duration(node)),
+    )
+    if not renditions:
         return None
-    return MediaCandidate(id=target_id, url=media_url, thumbnail=thumbnail, caption=caption)
+    return MediaCandidate(
+        id=target_id, url=renditions[0].url, thumbnail=thumbnail, caption=caption, renditions=renditions
+    )
 
 
-def _extract_video_thumbnail(node: dict[str, Any]) -> str | None:
-    """Extract a video thumbnail from a scoped video subtree."""
-    if thumbnail := _clean_url(_WATCH_THUMBNAIL_QUERY.search(node)):
-        return thumbnail
+def _dash_rendition(node: dict[str, Any]) -> MediaRendition | None:
+    """Return an MP4 DASH representation with its bandwidth, if node is one."""
+    if node.get("mime_type") != "video/mp4" or not (media_url := _clean_url(node.get("base_url"))):
+        return None
+    bandwidth = node.get("bandwidth")
+    return MediaRendition(media_url, bandwidth=bandwidth if isinstance(bandwidth, int) else 0)
+
+
+def _dash_renditions(representations: list[MediaRendition], duration: float | None) -> tuple[MediaRendition, ...]:
+    """Order DASH representations by bandwidth and attach the video duration."""
+    ordered = sorted(representations, key=lambda rendition: rendition.bandwidth or 0, reverse=True)
+    return tuple(MediaRendition(rendition.url, rendition.bandwidth, duration) for rendition in ordered)
 
-    for child in _walk_json(node):
-        if isinstance(child, dict) and (thumbnail := _clean_url(_WATCH_THUMBNAIL_QUERY.search(child))):
+
+def _renditions(*sources: str | MediaRendition | None) -> tuple[MediaRendition, ...]:
+    """Collect distinct renditions in preference order."""
+    renditions = []
+    seen = set()
+    for source in sources:
+        rendition = MediaRendition(source) if isinstance(source, str) else source
+        if rendition is None or rendition.url in seen:
+            continue
+        seen.add(rendition.url)
+        renditions.append(rendition)
+    return tuple(renditions)
+
+
+def _video_duration(node: dict[str, Any]) -> float | None:
+    """Return a video's duration in seconds from its node."""
+    duration_ms = node.get("playable_duration_in_ms")
+    if isinstance(duration_ms, int | float) and duration_ms > 0:
+        return duration_ms / 1000
+    length = node.get("length_in_second")
+    if isinstance(length, int | float) and length > 0:
+        return float(length)
+    return None
+
+
+def _extract_video_thumbnail(index: JsonIndex, node: dict[str, Any]) -> str | None:
+    """Extract a video thumbnail from a scoped video subtree."""
+    for child in index.subtree(node):
+        if thumbnail := _clean_url(_WATCH_THUMBNAIL_QUERY.search(child)):
             return thumbnail
     return None
 
@@ -749,11 +1075,17 @@ def _progressive_quality_score(node: dict[str, Any]) -> int:
 
 
 def _extract_media_candidates(
-    documents: list[Any],
+    documents: list[Any] | JsonIndex,
     url: str,
     story_tokens: tuple[str, ...] = (),
+    story_index: StoryTokenIndex | None = None,
 ) -> list[MediaCandidate]:
-    """Extract page media from parsed Facebook frontend JSON documents."""
+    """Extract page media from parsed Facebook frontend JSON documents.
+
+    story_index, when given, must index the same documents; pages pass the one
+    they keep so it is not rebuilt for every extraction.
+    """
+    index = _json_index(documents)
     kind = _page_kind(url)
     target_id = _url_media_id(url, kind)
     target_story_tokens = _story_tokens_for_url(url, story_tokens) if kind == "story" else ()
@@ -768,88 +1100,104 @@ def _extract_media_candidates(
         if not target_id:
             logger.debug("Refusing watch extraction without a URL video ID: %s.", url)
             return []
-        candidate = _extract_watch_video_candidate(documents, target_id)
+        candidate = _extract_watch_video_candidate(index, target_id)
         return [candidate] if candidate else []
 
-    queries = _queries_for_url(url)
+    plan = _plan_for_url(url)
+    if kind == "story":
+        nodes = (story_index or StoryTokenIndex(index)).nodes_for_any(target_story_tokens)
+    elif kind == "story_card":
+        nodes = [node for node in index.with_id(target_id) if node.get("id") == target_id]
+    else:
+        nodes = index.with_any_key(plan.anchors)
+
     seen_urls = set()
     candidates: list[MediaCandidate] = []
-    for document in documents:
-        for node in _walk_json(document):
-            if kind == "story" and target_story_tokens:
-                if not isinstance(node, dict) or not any(
-                    _story_node_matches_token(node, token) for token in target_story_tokens
-                ):
-                    continue
-            if kind == "story_card" and (not isinstance(node, dict) or node.get("id") != target_id):
-                continue
-            for query in queries:
-                for raw in _iter_result_items(query.search(node)):
-                    candidate = _media_candidate(raw)
-                    if not candidate:
-                        continue
-                    if require_id_match and kind != "story_card" and candidate.id != target_id:
-                        continue
-                    if candidate.url in seen_urls:
-                        continue
-                    seen_urls.add(candidate.url)
-                    candidates.append(candidate)
+    for raw in plan.run(nodes):
+        candidate = _media_candidate(raw)
+        if not candidate:
+            continue
+        if require_id_match and kind != "story_card" and candidate.id != target_id:
+            continue
+        if candidate.url in seen_urls:
+            continue
+        seen_urls.add(candidate.url)
+        candidates.append(candidate)
     if not candidates and kind in {"reel", "video"} and target_id:
-        candidate = _extract_video_playback_candidate(documents, target_id)
+        candidate = _extract_video_playback_candidate(index, target_id)
         return [candidate] if candidate else []
     if not candidates and kind == "story" and target_story_tokens:
-        for video_id in _story_video_ids(documents, target_story_tokens):
-            candidate = _extract_video_playback_candidate(documents, video_id)
-            candidate = candidate or _extract_dash_prefetch_video_candidate(documents, video_id)
+        for video_id in _story_video_ids(nodes):
+            candidate = _extract_video_playback_candidate(index, video_id)
+            candidate = candidate or _extract_dash_prefetch_video_candidate(index, video_id)
             if candidate and candidate.url not in seen_urls:
                 seen_urls.add(candidate.url)
                 candidates.append(candidate)
     return candidates
 
 
-def _extract_album_candidates(html_content: str, expected_count: int) -> list[MediaCandidate]:
-    """Extract photo candidates from a dedicated Facebook mediaset page."""
-    tree = _parse_html(html_content)
-    if tree is None:
-        return []
+def _extract_album_page(html_content: str, expected_count: int) -> AlbumPage:
+    """Extract photo candidates and next-page cursors from a dedicated Facebook mediaset page."""
+    page = _parse_page(html_content)
+    if page is None:
+        return AlbumPage(())
+    return AlbumPage(tuple(_extract_album_candidates(page, expected_count)), _album_cursors(page.media))
+
+
+def _extract_album_candidates(page: ParsedPage, expected_count: int) -> list[MediaCandidate]:
+    """Extract photo candidates from a parsed mediaset page."""
 
-    documents = _script_json(tree, _MEDIA_SCRIPT_XPATH)
     seen_ids = set()
     seen_urls = set()
     candidates = []
-    for document in documents:
-        for candidate in _extract_scoped_story_photo_candidates(document):
-            if candidate.id and candidate.id in seen_ids:
-                continue
-            if candidate.url in seen_urls:
-                continue
-            if candidate.id:
-                seen_ids.add(candidate.id)
-            seen_urls.add(candidate.url)
-            candidates.append(candidate)
-            if len(candidates) >= expected_count:
-                return candidates
+    for node in page.media.with_typename("Photo"):
+        candidate = _story_photo_candidate(node)
+        if not candidate:
+            continue
+        if candidate.id and candidate.id in seen_ids:
+            continue
+        if candidate.url in seen_urls:
+            continue
+        if candidate.id:
+            seen_ids.add(candidate.id)
+        seen_urls.add(candidate.url)
+        candidates.append(candidate)
+        if len(candidates) >= expected_count:
+            return candidates
     return candidates
 
 
-def _extract_json_text(documents: list[Any], queries: tuple[Any, ...]) -> str | None:
+def _album_cursors(index: JsonIndex) -> tuple[str, ...]:
+    """Return end cursors of photo connections that have more pages."""
+    cursors = []
+    for node in index.with_key("page_info"):
+        page_info = node["page_info"]
+        if not isinstance(page_info, dict) or not page_info.get("has_next_page"):
+            continue
+        cursor = page_info.get("end_cursor")
+        if not isinstance(cursor, str) or not cursor or cursor in cursors:
+            continue
+        if any(child.get("__typename") == "Photo" for child in index.subtree(node)):
+            cursors.append(cursor)
+    return tuple(cursors)
+
+
+def _extract_json_text(nodes: list[dict[str, Any]], queries: tuple[Any, ...]) -> str | None:
     """Extract the first non-empty text value matching any query in priority order."""
     for query in queries:
-        for document in documents:
-            for node in _walk_json(document):
-                text = _clean_text(query.search(node))
-                if text:
-                    return text
+        for node in nodes:
+            text = _clean_text(query.search(node))
+            if text:
+                return text
     return None
 
 
-def _extract_route_title(documents: list[Any]) -> str | None:
+def _extract_route_title(documents: list[Any] | JsonIndex) -> str | None:
     """Extract the frontend route title without using generic UI title labels."""
-    for document in documents:
-        for node in _walk_json(document):
-            title = _clean_text(_TITLE_QUERY.search(node))
-            if title:
-                return title
+    for node in _json_index(documents).with_key("initialRouteInfo"):
+        title = _clean_text(_TITLE_QUERY.search(node))
+        if title:
+            return title
     return None
 
 
@@ -897,18 +1245,22 @@ def _extract_facebook_profile(tree, url: str) -> MediaResult | None:
     )
 
 
-def _extract_facebook_media(html_content: str, url: str, warn_missing: bool = True) -> MediaResult | None:
+def _extract_facebook_media(page: ParsedPage, url: str, warn_missing: bool = True) -> MediaResult | None:
     """Extract media and metadata from a fetched Facebook page."""
-    tree = _parse_html(html_content)
-    if tree is None:
-        return None
-
+    tree = page.tree
     if _is_profile_url(url) and (profile_result := _extract_facebook_profile(tree, url)):
         return profile_result
 
-    media_documents = _script_json(tree, _MEDIA_SCRIPT_XPATH)
-    route_documents = _script_json(tree, _ROUTE_SCRIPT_XPATH)
-    candidates = _extract_media_candidates(media_documents, url, story_tokens=_route_story_tokens(route_documents))
+    media_index = page.media_for(url)
+    candidates = _extract_media_candidates(
+        media_index, url, story_tokens=page.story_tokens, story_index=page.story_index(media_index)
+    )
+    if not candidates and media_index is not page.media:
+        # A story's video and DASH nodes can sit in scripts that never name the story token.
+        media_index = page.media
+        candidates = _extract_media_candidates(
+            media_index, url, story_tokens=page.story_tokens, story_index=page.story_index(media_index)
+        )
     if not candidates:
         if warn_missing:
             logger.warning("No structured Facebook media found for %s.", url)
@@ -917,9 +1269,7 @@ def _extract_facebook_media(html_content: str, url: str, warn_missing: bool = Tr
     kind = _page_kind(url)
     target_id = _url_media_id(url, kind)
     canonical_story_info = (
-        _canonical_story_info_for_video(media_documents, target_id)
-        if kind in {"reel", "video", "watch_video"}
-        else None
+        _canonical_story_info_for_video(media_index, target_id) if kind in {"reel", "video", "watch_video"} else None
     )
 
     thumbnail = next((candidate.thumbnail for candidate in candidates if candidate.thumbnail), None)
@@ -927,12 +1277,12 @@ def _extract_facebook_media(html_content: str, url: str, warn_missing: bool = Tr
 
     title = (
         (canonical_story_info.title if canonical_story_info else None)
-        or _extract_route_title(route_documents)
+        or _extract_route_title(page.route)
         or _extract_meta_content(tree, "og:title")
     )
 
     caption = next((candidate.caption for candidate in candidates if candidate.caption), None)
-    caption = caption or _extract_json_text(media_documents, _CAPTION_QUERIES)
+    caption = caption or _extract_json_text(page.media.nodes, _CAPTION_QUERIES)
     caption = caption or (canonical_story_info.caption if canonical_story_info else None)
     caption = caption or _extract_meta_content(tree, "og:description")
 
@@ -944,6 +1294,7 @@ def _extract_facebook_media(html_content: str, url: str, warn_missing: bool = Tr
             caption=caption,
             title=title,
         ),
+        renditions=tuple(candidate.renditions for candidate in candidates if len(candidate.renditions) > 1),
     )
 
 
@@ -952,25 +1303,52 @@ async def _fetch_facebook(
     url: str,
     cookies: httpx.Cookies | None = None,
     warn_missing: bool = True,
+    redirects: RedirectCache | None = None,
 ) -> MediaResult | None:
-    """Fetch a Facebook URL and extract public media from structured JSON."""
-    current_url = _normalize_facebook_url(url)
+    """Fetch a Facebook URL and extract public media from structured JSON.
+
+    With a redirect cache, a link whose redirect chain was resolved before
+    starts at the end of that chain. A cached target that now fails with an
+    HTTP error is forgotten and the chain is resolved again from the start.
+    """
+    start_url = _normalize_facebook_url(url)
+    key = ("auth" if cookies else "public", start_url)
+    cached = await redirects.get(key) if redirects is not None else None
+    if cached:
+        try:
+            return await _follow_facebook(
+                client, url, cached.target, cookies, warn_missing, redirects, key, cached.hops
+            )
+        except httpx.HTTPStatusError as e:
+            logger.debug("Cached Facebook redirect for %s failed; resolving it again: %r.", _safe_log_url(url), e)
+            await redirects.forget(key)
+    return await _follow_facebook(client, url, start_url, cookies, warn_missing, redirects, key)
+
 
+async def _follow_facebook(
+    client: httpx.AsyncClient,
+    url: str,
+    current_url: str,
+    cookies: httpx.Cookies | None,
+    warn_missing: bool,
+    redirects: RedirectCache | None,
+    redirect_key: tuple[str, str],
+    previous_hops: int = 0,
+) -> MediaResult | None:
+    """Follow redirects one hop at a time from current_url and extract the page they end on."""
     for redirect_count in range(_MAX_REDIRECTS + 1):
         if not _is_facebook_domain(current_url):
             logger.warning("Aborting request to non-Facebook domain: %s.", _safe_log_url(current_url))
             return None
 
-        response = await client.get(current_url, headers=FACEBOOK_HEADERS, cookies=cookies)
+        response, extraction = await _fetch_page(client, current_url, cookies, warn_missing)
         if not response.is_redirect:
-            response.raise_for_status()
             final_url = _normalize_facebook_url(str(response.url))
-            if cookies and _is_login_url(final_url):
-                raise FacebookAuthExpired("Facebook authenticated session expired")
-            result = _extract_facebook_media(response.text, final_url, warn_missing=warn_missing)
-            if result and cookies:
-                return await _expand_story_album_if_needed(client, result, response.text, final_url, cookies)
-            return result
+            if redirects is not None and redirect_count:
+                await redirects.put(redirect_key, Redirect(final_url, previous_hops + redirect_count))
+            if extraction.result and extraction.album:
+                return await _expand_story_album(client, extraction.result, extraction.album, final_url, cookies)
+            return extraction.result
 
         if redirect_count == _MAX_REDIRECTS:
             logger.error("Too many Facebook redirects for %s.", _safe_log_url(url))
@@ -988,53 +1366,129 @@ async def _fetch_facebook(
     return None
 
 
-async def _expand_story_album_if_needed(
+async def _fetch_page(
     client: httpx.AsyncClient,
-    result: MediaResult,
-    html_content: str,
     url: str,
-    cookies: httpx.Cookies,
-) -> MediaResult:
-    """Fetch a dedicated mediaset page when the story HTML embeds a partial album."""
-    if _page_kind(url) != "story":
-        return result
+    cookies: httpx.Cookies | None,
+    warn_missing: bool,
+) -> tuple[httpx.Response, PageExtraction | None]:
+    """GET one Facebook URL without following redirects, extracting the page it returns."""
+    async with client.stream(
+        "GET",
+        url,
+        headers=FACEBOOK_HEADERS,
+        cookies=cookies,
+        timeout=request_timeout(HTTP_TIMEOUT),
+    ) as response:
+        if response.is_redirect:
+            return response, None
+        response.raise_for_status()
+        final_url = _normalize_facebook_url(str(response.url))
+        if cookies and _is_login_url(final_url):
+            raise FacebookAuthExpired("Facebook authenticated session expired")
 
-    tree = _parse_html(html_content)
-    if tree is None:
-        return result
+        # Only authenticated fetches can reach the mediaset page used for album expansion.
+        find_album = bool(cookies)
+        if FACEBOOK_STREAMING and not isinstance(get_parse_executor(), ProcessPoolExecutor):
+            return response, await _stream_page(response, final_url, warn_missing, find_album)
+        await response.aread()
+        return response, await run_parse(_extract_page_html, response.text, final_url, warn_missing, find_album)
 
-    documents = _script_json(tree, _MEDIA_SCRIPT_XPATH)
-    route_documents = _script_json(tree, _ROUTE_SCRIPT_XPATH)
-    album_info = _find_story_album_info(documents, url, story_tokens=_route_story_tokens(route_documents))
-    if not album_info or len(result.urls) >= album_info.count:
-        return result
 
-    album_url = f"https://www.facebook.com/media/set/?set={album_info.token}&type=3"
-    try:
-        response = await client.get(album_url, headers=FACEBOOK_HEADERS, cookies=cookies)
-        response.raise_for_status()
-    except Exception as e:
-        logger.debug("Facebook album expansion fetch failed for %s: %r.", _safe_log_url(url), e)
-        return result
+async def _stream_page(
+    response: httpx.Response,
+    url: str,
+    warn_missing: bool,
+    find_album: bool,
+) -> PageExtraction:
+    """Extract a page while it downloads, closing the stream once the linked media is found.
+
+    The event loop feeds the HTML to the pull parser as it arrives, so no parse
+    worker waits on the network. Decoding candidate scripts and the final
+    extraction are CPU-bound and go to the parse workers.
+    """
+    stream = PageStream(url)
+    async for chunk in response.aiter_text():
+        new_media = stream.feed(chunk)
+        if new_media and await run_parse(stream.has_linked_media, new_media):
+            logger.debug("Found Facebook media before the end of %s; closing the stream.", _safe_log_url(url))
+            break
+    return await run_parse(_extract_page, stream.close(), url, warn_missing, find_album)
 
-    final_url = _normalize_facebook_url(str(response.url))
-    if _is_login_url(final_url):
-        raise FacebookAuthExpired("Facebook authenticated session expired")
 
-    album_candidates = _extract_album_candidates(response.text, album_info.count)
-    if len(album_candidates) <= len(result.urls):
-        return result
+def _extract_page_html(html_content: str, url: str, warn_missing: bool, find_album: bool) -> PageExtraction:
+    """Extract a fully downloaded page."""
+    return _extract_page(_parse_page(html_content), url, warn_missing, find_album)
 
+
+def _extract_page(page: ParsedPage | None, url: str, warn_missing: bool, find_album: bool) -> PageExtraction:
+    """Extract media from a parsed page, plus the partial album it embeds when asked."""
+    if page is None:
+        return PageExtraction(None)
+    result = _extract_facebook_media(page, url, warn_missing=warn_missing)
+    if not result or not find_album or _page_kind(url) != "story":
+        return PageExtraction(result)
+    album = _find_story_album_info(page.media_for(url), url, story_tokens=page.story_tokens)
+    if not album or len(result.urls) >= album.count:
+        return PageExtraction(result)
+    return PageExtraction(result, album)
+
+
+async def _expand_story_album(
+    client: httpx.AsyncClient,
+    result: MediaResult,
+    album_info: StoryAlbumInfo,
+    url: str,
+    cookies: httpx.Cookies | None,
+) -> MediaResult:
+    """Fetch the mediaset pages for a story that embeds a partial album.
+
+    Pages are fetched as their cursors are found, ``album_concurrency`` at a
+    time and at most ``album_max_pages`` in total. Photos are merged by media
+    file as each page arrives, and outstanding fetches are cancelled once the
+    album's advertised count is reached. A page that lands on the login wall
+    stops the expansion, and the photos merged so far are kept.
+    """
     seen_keys = {_media_file_key(media_url) for media_url in result.urls}
     expanded_urls = list(result.urls)
-    for candidate in album_candidates:
-        key = _media_file_key(candidate.url)
-        if key in seen_keys:
-            continue
-        seen_keys.add(key)
-        expanded_urls.append(candidate.url)
-        if len(expanded_urls) >= album_info.count:
-            break
+    queued: list[str | None] = [None]
+    seen_cursors: set[str | None] = {None}
+    pending: set[asyncio.Task[AlbumPage | None]] = set()
+    expired = False
+    try:
+        while (queued or pending) and not expired and len(expanded_urls) < album_info.count:
+            while queued and len(pending) < FACEBOOK_ALBUM_CONCURRENCY:
+                cursor = queued.pop(0)
+                pending.add(asyncio.create_task(_fetch_album_page(client, album_info, cursor, url, cookies)))
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                try:
+                    page = task.result()
+                except FacebookAuthExpired:
+                    logger.info(
+                        "Facebook session expired while expanding the album for %s; keeping %d media.",
+                        _safe_log_url(url),
+                        len(expanded_urls),
+                    )
+                    expired = True
+                    continue
+                if page is None:
+                    continue
+                for candidate in page.candidates:
+                    key = _media_file_key(candidate.url)
+                    if key in seen_keys or len(expanded_urls) >= album_info.count:
+                        continue
+                    seen_keys.add(key)
+                    expanded_urls.append(candidate.url)
+                for cursor in page.cursors:
+                    if cursor not in seen_cursors and len(seen_cursors) < FACEBOOK_ALBUM_MAX_PAGES:
+                        seen_cursors.add(cursor)
+                        queued.append(cursor)
+    finally:
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
 
     if len(expanded_urls) > len(result.urls):
         logger.info(
@@ -1043,16 +1497,87 @@ async def _expand_story_album_if_needed(
             len(result.urls),
             len(expanded_urls),
         )
-        return MediaResult(urls=tuple(expanded_urls), metadata=result.metadata)
+        return MediaResult(urls=tuple(expanded_urls), metadata=result.metadata, renditions=result.renditions)
     return result
 
 
+async def _fetch_album_page(
+    client: httpx.AsyncClient,
+    album_info: StoryAlbumInfo,
+    cursor: str | None,
+    url: str,
+    cookies: httpx.Cookies | None,
+) -> AlbumPage | None:
+    """Fetch and parse one mediaset page, or return None when it cannot be read."""
+    params = {"set": album_info.token, "type": "3"}
+    if cursor is not None:
+        params["cursor"] = cursor
+    try:
+        response = await client.get(
+            f"https://www.facebook.com/media/set/?{urlencode(params)}",
+            headers=FACEBOOK_HEADERS,
+            cookies=cookies,
+            timeout=request_timeout(HTTP_TIMEOUT),
+        )
+        response.raise_for_status()
+    except Exception as e:
+        logger.debug("Facebook album expansion fetch failed for %s: %r.", _safe_log_url(url), e)
+        return None
+
+    final_url = _normalize_facebook_url(str(response.url))
+    if _is_login_url(final_url):
+        raise FacebookAuthExpired("Facebook authenticated session expired")
+    return await run_parse(_extract_album_page, response.text, album_info.count)
+
+
 class FacebookExtractor(MediaExtractor):
     """Extract direct media URLs from public Facebook posts, reels, photos, and videos."""
 
     name = "facebook"
+    domains = ("facebook.com",)
     url_pattern = RE_FACEBOOK
 
+    def __init__(
+        self,
+        *,
+        redirect_store: RedirectStore | None = None,
+        strategy_store: StrategyStore | None = None,
+    ) -> None:
+        self.redirects = (
+            RedirectCache(
+                "facebook_redirects",
+                max_entries=FACEBOOK_REDIRECT_CACHE_MAX_ENTRIES,
+                ttl=FACEBOOK_REDIRECT_CACHE_TTL,
+                store=redirect_store,
+            )
+            if FACEBOOK_REDIRECT_CACHE_ENABLED
+            else None
+        )
+        self.strategies = (
+            StrategyStats(
+                "facebook_strategies",
+                weight=FACEBOOK_STRATEGY_WEIGHT,
+                min_attempts=FACEBOOK_STRATEGY_MIN_ATTEMPTS,
+                skip_below=FACEBOOK_STRATEGY_SKIP_BELOW,
+                probe_interval=FACEBOOK_STRATEGY_PROBE_INTERVAL,
+                store=strategy_store,
+            )
+            if FACEBOOK_STRATEGY_ADAPTIVE
+            else None
+        )
+        self.hedged_fetches = 0
+        self.public_hedge_wins = 0
+
+    def stats(self) -> dict[str, dict[str, object]]:
+        sections: dict[str, dict[str, object]] = {
+            "facebook_fetches": {"hedged": self.hedged_fetches, "public_hedge_wins": self.public_hedge_wins}
+        }
+        if self.redirects is not None:
+            sections.update(self.redirects.stats())
+        if self.strategies is not None:
+            sections.update(self.strategies.stats())
+        return sections
+
     def _validate_url(self, url: str) -> bool:
         """Validate Facebook domain."""
         return _is_facebook_domain(url)
@@ -1070,6 +1595,8 @@ class FacebookExtractor(MediaExtractor):
                 ) as temp_client:
                     return await self._extract_with_fallback(temp_client, url)
             return await self._extract_with_fallback(client, url)
+        except DeadlineExceeded:
+            raise
         except httpx.HTTPError as e:
             logger.error("HTTP error accessing %s: %r.", log_url, e)
         except Exception as e:
@@ -1077,33 +1604,114 @@ class FacebookExtractor(MediaExtractor):
         return None
 
     async def _extract_with_fallback(self, client: httpx.AsyncClient, url: str) -> MediaResult | None:
-        """Try authenticated cookies first when available, then public fetch."""
-        log_url = _safe_log_url(url)
+        """Try authenticated and public fetches in the order learned for the page kind."""
         try:
             cookies = await get_facebook_cookies()
         except Exception as e:
             logger.warning("Facebook auth setup failed; falling back to public fetch: %r.", e)
             cookies = None
 
-        if cookies:
-            try:
-                logger.debug("Trying authenticated Facebook fetch for %s.", log_url)
-                result = await _fetch_facebook(client, url, cookies=cookies, warn_missing=False)
-                if result:
-                    logger.info("Fetched %d Facebook media with saved auth from %s.", len(result.urls), log_url)
-                    return result
-            except FacebookAuthExpired:
-                logger.info("Facebook cookie file was not accepted for %s; falling back to public fetch.", log_url)
-            except Exception as e:
-                logger.warning("Facebook authenticated fetch failed; falling back to public fetch: %r.", e)
+        if not cookies:
+            return await self._fetch_public(client, url)
+        kind = _page_kind(url)
+        default = ("public", "auth") if kind in FACEBOOK_PUBLIC_FIRST_KINDS else ("auth", "public")
+        strategies = await self.strategies.plan(kind, default) if self.strategies is not None else default
+        if FACEBOOK_HEDGE_ENABLED and len(strategies) > 1:
+            return await self._fetch_hedged(client, url, cookies, public_first=strategies[0] == "public")
+        for strategy in strategies:
+            if strategy == "auth":
+                result = await self._fetch_authenticated(client, url, cookies)
+            else:
+                result = await self._fetch_public(client, url)
+            if result:
+                return result
+        return None
 
+    async def _fetch_hedged(
+        self,
+        client: httpx.AsyncClient,
+        url: str,
+        cookies: httpx.Cookies,
+        *,
+        public_first: bool = False,
+    ) -> MediaResult | None:
+        """Race the authenticated fetch against a delayed public one and keep the first media found.
+
+        The public fetch starts after ``hedge_delay`` seconds, at once when
+        public_first is set, or as soon as the authenticated fetch comes back
+        empty. A public win waits ``hedge_auth_grace`` seconds for authenticated
+        media before it is returned. The losing fetch is cancelled.
+        """
+        delay = 0 if public_first else FACEBOOK_HEDGE_DELAY
+        authenticated = asyncio.create_task(self._fetch_authenticated(client, url, cookies))
+        public: asyncio.Task[MediaResult | None] | None = None
+        try:
+            await asyncio.wait({authenticated}, timeout=delay)
+            if authenticated.done() and (result := authenticated.result()):
+                return result
+
+            self.hedged_fetches += 1
+            public = asyncio.create_task(self._fetch_public(client, url))
+            done, _ = await asyncio.wait({authenticated, public}, return_when=asyncio.FIRST_COMPLETED)
+            if authenticated in done:
+                return authenticated.result() or await public
+
+            public_result = public.result()
+            if not public_result:
+                return await authenticated
+            await asyncio.wait({authenticated}, timeout=FACEBOOK_HEDGE_AUTH_GRACE)
+            if authenticated.done() and (result := authenticated.result()):
+                return result
+            self.public_hedge_wins += 1
+            return public_result
+        finally:
+            pending = [task for task in (authenticated, public) if task is not None and not task.done()]
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
+    async def _fetch_authenticated(
+        self,
+        client: httpx.AsyncClient,
+        url: str,
+        cookies: httpx.Cookies,
+    ) -> MediaResult | None:
+        """Fetch with saved cookies, returning None when the public path should be tried."""
+        log_url = _safe_log_url(url)
+        started = time.monotonic()
+        result = None
+        try:
+            logger.debug("Trying authenticated Facebook fetch for %s.", log_url)
+            result = await _fetch_facebook(client, url, cookies=cookies, warn_missing=False, redirects=self.redirects)
+            if result:
+                logger.info("Fetched %d Facebook media with saved auth from %s.", len(result.urls), log_url)
+        except FacebookAuthExpired:
+            logger.info("Facebook cookie file was not accepted for %s; falling back to public fetch.", log_url)
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            logger.warning("Facebook authenticated fetch failed; falling back to public fetch: %r.", e)
+        await self._record(url, "auth", started, result)
+        return result or None
+
+    async def _fetch_public(self, client: httpx.AsyncClient, url: str) -> MediaResult | None:
+        """Fetch without cookies."""
+        log_url = _safe_log_url(url)
+        started = time.monotonic()
+        result = None
         try:
             logger.debug("Trying public Facebook fallback for %s.", log_url)
-            result = await _fetch_facebook(client, url)
+            result = await _fetch_facebook(client, url, redirects=self.redirects)
             if result:
                 logger.info("Fetched %d Facebook media with public fallback from %s.", len(result.urls), log_url)
-                return result
-            return None
+        except DeadlineExceeded:
+            raise
         except Exception as e:
             logger.warning("Facebook public fallback failed after auth miss: %r.", e)
-            return None
+        await self._record(url, "public", started, result)
+        return result or None
+
+    async def _record(self, url: str, strategy: str, started: float, result: MediaResult | None) -> None:
+        if self.strategies is not None:
+            await self.strategies.record(_page_kind(url), strategy, bool(result), time.monotonic() - started)
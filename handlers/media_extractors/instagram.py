@@ -11,6 +11,7 @@ import time
 import httpx
 
 from config import USER_AGENT, HTTP_TIMEOUT
+from core.deadline import DeadlineExceeded, request_timeout
 from core.types import MediaMetadata, MediaResult
 from services.http import get_client
 from .base import MediaExtractor
@@ -42,6 +43,7 @@ class InstagramExtractor(MediaExtractor):
     """Extract direct media from Instagram posts."""
 
     name = "instagram"
+    domains = ("instagram.com",)
     url_pattern = RE_INSTAGRAM
 
     async def _extract_media(self, url: str) -> MediaResult | None:
@@ -72,12 +74,14 @@ class InstagramExtractor(MediaExtractor):
                     response = await temp_client.post(
                         _CONVERT_ENDPOINT,
                         json=payload,
+                        timeout=request_timeout(HTTP_TIMEOUT),
                     )
             else:
                 response = await client.post(
                     _CONVERT_ENDPOINT,
                     json=payload,
                     headers=headers,
+                    timeout=request_timeout(HTTP_TIMEOUT),
                 )
 
             response.raise_for_status()
@@ -99,6 +103,8 @@ class InstagramExtractor(MediaExtractor):
                 ),
             )
 
+        except DeadlineExceeded:
+            raise
         except Exception as e:
             logger.error("Error extracting Instagram media from %s: %r.", url, e)
             return None
@@ -2,6 +2,11 @@
 
 from __future__ import annotations
 
+import asyncio
+import codecs
+import json
+from collections import Counter
+from collections.abc import Sequence
 from dataclasses import dataclass
 from html import unescape
 import logging
@@ -11,7 +16,17 @@ from urllib.parse import ParseResult, parse_qsl, urlencode, urlparse, urlunparse
 import httpx
 import jmespath
 
-from config import HTTP_TIMEOUT, REDDIT_HEADERS
+from config import (
+    HTTP_TIMEOUT,
+    REDDIT_BATCH_ENABLED,
+    REDDIT_BATCH_MAX,
+    REDDIT_BATCH_WINDOW,
+    REDDIT_HEADERS,
+    REDDIT_HEDGE_DELAY,
+    REDDIT_HEDGE_ENABLED,
+)
+from core.deadline import DeadlineExceeded, check_deadline, request_timeout
+from core.micro_batch import MicroBatcher
 from core.types import MediaMetadata, MediaResult
 from services.http import get_client
 from services.reddit_auth import get_reddit_cookies
@@ -39,6 +54,12 @@ _POST_METADATA_QUERY = jmespath.compile(
     "}"
 )
 _GALLERY_MEDIA_IDS_QUERY = jmespath.compile("gallery_items[].media_id")
+# /api/info returns a single listing of t3 children, one per post found.
+_INFO_CHILDREN_QUERY = jmespath.compile("data.children")
+# Only the post listing is read, so ask for as few comments as Reddit allows.
+_JSON_QUERY = urlencode({"raw_json": 1, "limit": 1, "depth": 1})
+_JSON_DECODER = json.JSONDecoder()
+_INFO_URL = "https://www.reddit.com/api/info.json"
 
 
 @dataclass(frozen=True)
@@ -52,12 +73,42 @@ class RedditPostMetadata:
     media_urls: tuple[str, ...] = ()
 
 
+@dataclass(frozen=True)
+class RedditEndpoint:
+    """One post JSON endpoint and the cookies to request it with."""
+
+    name: str
+    url: str
+    cookies: httpx.Cookies | None = None
+
+
 class RedditExtractor(MediaExtractor):
     """Extract Reddit media from Reddit's post JSON."""
 
     name = "reddit"
+    domains = ("reddit.com", "redd.it")
     url_pattern = RE_REDDIT
 
+    def __init__(self) -> None:
+        self.endpoint_starts: Counter[str] = Counter()
+        self.endpoint_wins: Counter[str] = Counter()
+        self.hedged_requests = 0
+        self.posts = (
+            MicroBatcher("reddit_batches", _fetch_post_info, window=REDDIT_BATCH_WINDOW, max_batch=REDDIT_BATCH_MAX)
+            if REDDIT_BATCH_ENABLED
+            else None
+        )
+
+    def stats(self) -> dict[str, dict[str, object]]:
+        endpoints: dict[str, object] = {
+            name: f"{self.endpoint_wins[name]}/{starts} wins" for name, starts in sorted(self.endpoint_starts.items())
+        }
+        endpoints["hedged_requests"] = self.hedged_requests
+        sections: dict[str, dict[str, object]] = {"reddit_endpoints": endpoints}
+        if self.posts is not None:
+            sections.update(self.posts.stats())
+        return sections
+
     def _validate_url(self, url: str) -> bool:
         """Validate Reddit domain."""
         return _is_reddit_domain(url)
@@ -67,76 +118,161 @@ class RedditExtractor(MediaExtractor):
         try:
             client = get_client()
             if client:
-                return await _fetch_reddit(client, url)
+                return await self._fetch_reddit(client, url)
             async with httpx.AsyncClient(
                 follow_redirects=False,
                 timeout=HTTP_TIMEOUT,
                 http2=True,
             ) as temp_client:
-                return await _fetch_reddit(temp_client, url)
+                return await self._fetch_reddit(temp_client, url)
+        except DeadlineExceeded:
+            raise
         except httpx.HTTPError as e:
             logger.error("HTTP error accessing Reddit URL %s: %r.", _safe_log_url(url), e)
         except Exception as e:
             logger.error("Unexpected error extracting Reddit media from %s: %r.", _safe_log_url(url), e)
         return None
 
-
-async def _fetch_reddit(client: httpx.AsyncClient, url: str) -> MediaResult | None:
-    """Fetch media and caption data directly from Reddit JSON."""
-    cookies = await get_reddit_cookies()
-    if _has_cookies(cookies):
+    async def _fetch_reddit(self, client: httpx.AsyncClient, url: str) -> MediaResult | None:
+        """Fetch media and caption data from a batched post lookup, then from the post's own JSON."""
+        post_id = _reddit_post_id(urlparse(url))
+        if self.posts is not None and post_id:
+            try:
+                metadata = await self.posts.get(post_id.lower())
+            except Exception as e:
+                # A batch bounded by another caller's tighter deadline can time out while this one still has time.
+                check_deadline()
+                logger.debug("Batched Reddit lookup failed for %s: %r.", _safe_log_url(url), e)
+            else:
+                if metadata is not None:
+                    return _media_result_from_metadata(metadata, url)
+
+        cookies = await get_reddit_cookies()
+        endpoints = _reddit_endpoints(url, cookies if _has_cookies(cookies) else None)
+        return _media_result_from_metadata(await self._fetch_first_media(client, endpoints), url)
+
+    async def _fetch_first_media(
+        self,
+        client: httpx.AsyncClient,
+        endpoints: tuple[RedditEndpoint, ...],
+    ) -> RedditPostMetadata | None:
+        """Return metadata from the first endpoint that finds media, cancelling the rest.
+
+        Endpoints start in order. With hedging, the next one starts after
+        ``hedge_delay`` seconds even while earlier ones are still running;
+        otherwise only once they have failed.
+        """
+        remaining = list(endpoints)
+        running: dict[asyncio.Task[RedditPostMetadata | None], RedditEndpoint] = {}
         try:
-            metadata = await _fetch_reddit_json_metadata(client, url, cookies=cookies)
-        except Exception as e:
-            logger.warning("Cookie-backed Reddit JSON fetch failed for %s: %r.", _safe_log_url(url), e)
-        else:
-            return _media_result_from_metadata(metadata, url)
-
-    try:
-        metadata = await _fetch_reddit_json_metadata(client, url, cookies=None)
-    except Exception as e:
-        logger.warning("Unauthenticated Reddit JSON fetch failed for %s: %r.", _safe_log_url(url), e)
+            while remaining or running:
+                if remaining:
+                    endpoint = remaining.pop(0)
+                    if running:
+                        self.hedged_requests += 1
+                    self.endpoint_starts[endpoint.name] += 1
+                    running[asyncio.create_task(_fetch_reddit_endpoint(client, endpoint))] = endpoint
+                delay = REDDIT_HEDGE_DELAY if REDDIT_HEDGE_ENABLED and remaining else None
+                done, _ = await asyncio.wait(running, timeout=delay, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    endpoint = running.pop(task)
+                    try:
+                        metadata = task.result()
+                    except DeadlineExceeded:
+                        raise
+                    except Exception as e:
+                        logger.warning(
+                            "%s Reddit JSON endpoint failed for %s: %r.",
+                            _auth_mode(endpoint).capitalize(),
+                            _safe_log_url(endpoint.url),
+                            e,
+                        )
+                        continue
+                    if metadata and metadata.media_urls:
+                        self.endpoint_wins[endpoint.name] += 1
+                        return metadata
+        finally:
+            for task in running:
+                task.cancel()
+            if running:
+                await asyncio.gather(*running, return_exceptions=True)
         return None
-    return _media_result_from_metadata(metadata, url)
-
-
-async def _fetch_reddit_json_metadata(
-    client: httpx.AsyncClient,
-    url: str,
-    *,
-    cookies: httpx.Cookies | None,
-) -> RedditPostMetadata | None:
-    """Fetch title/body/permalink/media from Reddit's public post JSON."""
-    auth_mode = "cookie-backed" if cookies else "unauthenticated"
-    last_error: Exception | None = None
-    for json_url in _reddit_json_urls(url, include_permalink=bool(cookies)):
+
+
+async def _fetch_reddit_endpoint(client: httpx.AsyncClient, endpoint: RedditEndpoint) -> RedditPostMetadata | None:
+    """Fetch title/body/permalink/media from one Reddit post JSON endpoint."""
+    async with client.stream(
+        "GET",
+        endpoint.url,
+        headers=REDDIT_HEADERS,
+        cookies=endpoint.cookies,
+        timeout=request_timeout(HTTP_TIMEOUT),
+    ) as response:
+        response.raise_for_status()
+        data = await _read_post_listing(response)
+    metadata = _metadata_from_json_data(data)
+    if not metadata:
+        logger.warning(
+            "%s Reddit JSON endpoint returned no post metadata for %s.",
+            _auth_mode(endpoint).capitalize(),
+            _safe_log_url(endpoint.url),
+        )
+    return metadata
+
+
+async def _fetch_post_info(post_ids: Sequence[str]) -> dict[str, RedditPostMetadata]:
+    """Fetch metadata for several posts with one /api/info call, keyed by post ID."""
+    cookies = await get_reddit_cookies()
+    params = {"id": ",".join(f"t3_{post_id}" for post_id in post_ids), "raw_json": 1}
+    client = get_client()
+    if client:
+        response = await _get_post_info(client, params, cookies)
+    else:
+        async with httpx.AsyncClient(follow_redirects=False, timeout=HTTP_TIMEOUT, http2=True) as temp_client:
+            response = await _get_post_info(temp_client, params, cookies)
+
+    posts = {}
+    for child in _INFO_CHILDREN_QUERY.search(response.json()) or []:
+        post_id = child.get("data", {}).get("id") if isinstance(child, dict) else None
+        if not isinstance(post_id, str):
+            continue
+        if metadata := _metadata_from_json_data([{"data": {"children": [child]}}]):
+            posts[post_id.lower()] = metadata
+    return posts
+
+
+async def _get_post_info(client: httpx.AsyncClient, params: dict, cookies: httpx.Cookies) -> httpx.Response:
+    response = await client.get(
+        _INFO_URL,
+        params=params,
+        headers=REDDIT_HEADERS,
+        cookies=cookies if _has_cookies(cookies) else None,
+        timeout=request_timeout(HTTP_TIMEOUT),
+    )
+    response.raise_for_status()
+    return response
+
+
+async def _read_post_listing(response: httpx.Response):
+    """Decode a post JSON body, stopping after the post listing of a ``[post, comments]`` array.
+
+    The comment listing that follows is never downloaded. Bodies that are not
+    arrays are decoded whole.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    text = ""
+    async for chunk in response.aiter_bytes():
+        text += decoder.decode(chunk)
+        body = text.lstrip()
+        if not body.startswith("["):
+            continue
+        listing_start = len(text) - len(body[1:].lstrip())
         try:
-            response = await client.get(
-                json_url,
-                headers=REDDIT_HEADERS,
-                cookies=cookies,
-                timeout=HTTP_TIMEOUT,
-            )
-            response.raise_for_status()
-            metadata = _metadata_from_json_data(response.json())
-            if metadata:
-                return metadata
-            logger.warning(
-                "%s Reddit JSON endpoint returned no post metadata for %s.",
-                auth_mode.capitalize(),
-                _safe_log_url(json_url),
-            )
-        except Exception as e:
-            last_error = e
-            logger.warning(
-                "%s Reddit JSON endpoint failed for %s: %r.",
-                auth_mode.capitalize(),
-                _safe_log_url(json_url),
-                e,
-            )
-    if last_error:
-        raise last_error
-    return None
+            listing, _ = _JSON_DECODER.raw_decode(text, listing_start)
+        except json.JSONDecodeError:
+            continue
+        return [listing]
+    return json.loads(text + decoder.decode(b"", final=True))
 
 
 def _metadata_from_json_data(data) -> RedditPostMetadata | None:
@@ -264,24 +400,37 @@ def _single_media_url(raw: dict) -> str | None:
     return None
 
 
-def _reddit_json_urls(url: str, *, include_permalink: bool = True) -> tuple[str, ...]:
-    """Return Reddit JSON endpoints in request order."""
+def _reddit_endpoints(url: str, cookies: httpx.Cookies | None) -> tuple[RedditEndpoint, ...]:
+    """Return cookie-backed endpoints, when there are cookies, then unauthenticated ones."""
+    endpoints = []
+    if cookies is not None:
+        endpoints.extend(
+            RedditEndpoint(f"cookie_{name}", json_url, cookies) for name, json_url in _reddit_json_urls(url)
+        )
+    endpoints.extend(
+        RedditEndpoint(f"public_{name}", json_url) for name, json_url in _reddit_json_urls(url, include_permalink=False)
+    )
+    return tuple(endpoints)
+
+
+def _reddit_json_urls(url: str, *, include_permalink: bool = True) -> tuple[tuple[str, str], ...]:
+    """Return named Reddit JSON endpoints in request order."""
     parsed = urlparse(url)
-    candidates = []
+    candidates = {}
 
     permalink_path = _permalink_json_path(parsed)
     if include_permalink and permalink_path:
-        candidates.append(_reddit_json_url("www.reddit.com", permalink_path))
+        candidates.setdefault(_reddit_json_url("www.reddit.com", permalink_path), "permalink")
 
     post_id = _reddit_post_id(parsed)
     compact_path = f"/comments/{post_id}.json" if post_id else _json_path(parsed.path)
-    candidates.append(_reddit_json_url("www.reddit.com", compact_path))
+    candidates.setdefault(_reddit_json_url("www.reddit.com", compact_path), "compact")
 
-    return tuple(dict.fromkeys(candidates))
+    return tuple((name, json_url) for json_url, name in candidates.items())
 
 
 def _reddit_json_url(hostname: str, path: str) -> str:
-    return urlunparse(("https", hostname, path, "", "raw_json=1", ""))
+    return urlunparse(("https", hostname, path, "", _JSON_QUERY, ""))
 
 
 def _reddit_post_id(parsed: ParseResult) -> str | None:
@@ -346,6 +495,10 @@ def _is_image_url(url: str) -> bool:
     return path.endswith((".jpg", ".jpeg", ".png", ".webp", ".gif"))
 
 
+def _auth_mode(endpoint: RedditEndpoint) -> str:
+    return "cookie-backed" if endpoint.cookies else "unauthenticated"
+
+
 def _has_cookies(cookies: httpx.Cookies) -> bool:
     """Return true when an httpx cookie jar contains at least one cookie."""
     return any(True for _ in cookies.jar)
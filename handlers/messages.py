@@ -1,5 +1,6 @@
 """Message and inline query handlers."""
 
+from contextlib import aclosing
 from html import escape
 import logging
 from urllib.parse import unquote, urlparse
@@ -15,8 +16,11 @@ from telegram import (
 from telegram.error import BadRequest, TelegramError
 from telegram.ext import ApplicationHandlerStop, ContextTypes
 
+from core.admission import AdmissionController
+from core.fair_queue import FairQueue, WorkDropped
 from core.router import MessageRouter
-from core.types import LinkFixResult, MediaResult
+from core.scheduler import LaneScheduler
+from core.types import HandlerResult, LinkFixResult, MediaResult
 from services.access_control import AccessControl
 from services.media_delivery import deliver_media
 from utils.telegram_errors import bot_absent_from_chat
@@ -151,8 +155,18 @@ def _safe_source_log_url(url: str | None) -> str:
     return strip_url_tracking(url) if url else "<missing-source>"
 
 
-def handle_telegram_message(router: MessageRouter, access_control: AccessControl):
-    """Build a Telegram message callback bound to a router."""
+def handle_telegram_message(
+    router: MessageRouter,
+    access_control: AccessControl,
+    scheduler: LaneScheduler,
+    fair_queue: FairQueue,
+    admission: AdmissionController,
+):
+    """Build a Telegram message callback bound to a router.
+
+    Extraction and delivery wait for their chat's turn in the fair queue, then
+    run in the message lane. Under load, media results are answered with links only.
+    """
 
     async def callback(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         if not update.message:
@@ -163,38 +177,59 @@ def handle_telegram_message(router: MessageRouter, access_control: AccessControl
             return
 
         text = update.message.text or ""
-        result = await router.handle(text)
-        if not result:
+        cost = router.message_cost(text)
+        if not cost:
             return
+        handled = False
+        try:
+            async with (
+                fair_queue.slot(update.message.chat_id, cost),
+                scheduler.slot("message"),
+                aclosing(router.stream(text)) as results,
+            ):
+                async for routed in results:
+                    if not handled:
+                        logger.info(
+                            "Message from %s in %s: handled.",
+                            user_label(update.effective_user),
+                            chat_label(update.effective_chat),
+                        )
+                    handled = True
+                    await _reply_with_result(update, routed.result, admission)
+        except WorkDropped:
+            logger.warning("Message from %s skipped under load.", chat_label(update.effective_chat))
 
-        logger.info(
-            "Message from %s in %s: handled.",
-            user_label(update.effective_user),
-            chat_label(update.effective_chat),
+    return callback
+
+
+async def _reply_with_result(update: Update, result: HandlerResult, admission: AdmissionController) -> None:
+    """Reply to a message with one fixed link or one extracted media set, or its source link under load."""
+    reply_to = update.message.message_id
+    if isinstance(result, LinkFixResult):
+        logger.info("Fixed link for %s.", user_label(update.effective_user))
+        await _reply_text_safely(
+            update,
+            result.content,
+            reply_to=reply_to,
         )
-        reply_to = update.message.message_id
-        if isinstance(result, LinkFixResult):
-            logger.info("Fixed link for %s.", user_label(update.effective_user))
-            await _reply_text_safely(
-                update,
-                result.content,
-                reply_to=reply_to,
-            )
-            return
+        return
 
-        if isinstance(result, MediaResult):
-            original_url = result.metadata.original_url
-            clean_url = strip_url_tracking(original_url)
-            media_caption = _format_media_caption(result.metadata.caption, clean_url)
-            norm_original = original_url.rstrip("/")
-            media_urls = [url for url in result.urls if url.rstrip("/") != norm_original]
-            logger.info(
-                "Extracted %d %s media from %s.",
-                len(media_urls),
-                _platform_name(original_url),
-                _safe_source_log_url(original_url),
-            )
+    if isinstance(result, MediaResult):
+        original_url = result.metadata.original_url
+        clean_url = strip_url_tracking(original_url)
+        media_caption = _format_media_caption(result.metadata.caption, clean_url)
+        norm_original = original_url.rstrip("/")
+        media_urls = [url for url in result.urls if url.rstrip("/") != norm_original]
+        logger.info(
+            "Extracted %d %s media from %s.",
+            len(media_urls),
+            _platform_name(original_url),
+            _safe_source_log_url(original_url),
+        )
 
+        if not admission.allow_media():
+            logger.warning("Overloaded; skipping media upload for %s.", _safe_source_log_url(original_url))
+        else:
             try:
                 delivered = await deliver_media(
                     update.message,
@@ -202,6 +237,7 @@ def handle_telegram_message(router: MessageRouter, access_control: AccessControl
                     media_caption,
                     reply_to,
                     parse_mode="HTML",
+                    renditions={url: result.renditions_for(url) for url in media_urls},
                 )
                 if delivered:
                     return
@@ -212,16 +248,14 @@ def handle_telegram_message(router: MessageRouter, access_control: AccessControl
                     type(e).__name__,
                 )
 
-            logger.warning("Falling back to a source-link reply for %s.", _safe_source_log_url(original_url))
-            await _reply_text_safely(
-                update,
-                media_caption or clean_url,
-                reply_to=reply_to,
-                disable_web_page_preview=True,
-                parse_mode="HTML" if media_caption else None,
-            )
-
-    return callback
+        logger.warning("Falling back to a source-link reply for %s.", _safe_source_log_url(original_url))
+        await _reply_text_safely(
+            update,
+            media_caption or clean_url,
+            reply_to=reply_to,
+            disable_web_page_preview=True,
+            parse_mode="HTML" if media_caption else None,
+        )
 
 
 def leave_unapproved_group(access_control: AccessControl):
@@ -248,8 +282,16 @@ def leave_unapproved_group(access_control: AccessControl):
     return callback
 
 
-def inline_query(router: MessageRouter, access_control: AccessControl):
-    """Build an inline query callback bound to a router and access control."""
+def inline_query(
+    router: MessageRouter,
+    access_control: AccessControl,
+    scheduler: LaneScheduler,
+    admission: AdmissionController,
+):
+    """Build an inline query callback bound to a router and access control.
+
+    Extraction runs in the inline lane. Queries are dropped while the bot is shedding load.
+    """
 
     async def callback(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         query_update = update.inline_query
@@ -277,7 +319,12 @@ def inline_query(router: MessageRouter, access_control: AccessControl):
             await context.bot.answer_inline_query(query_update.id, [])
             return
 
-        result = await router.handle(query)
+        if not admission.allow_inline():
+            logger.warning("Overloaded; dropping inline query from %s.", user_label(query_update.from_user))
+            return
+
+        async with scheduler.slot("inline"):
+            result = await router.handle(query)
         results = _build_inline_results(result)
 
         try:
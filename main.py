@@ -11,18 +11,58 @@ import os
 from telegram.ext import ApplicationBuilder, InlineQueryHandler, MessageHandler, filters
 
 from config.settings import (
+    ADMISSION_DEGRADE_DOWNLOAD_BYTES,
+    ADMISSION_DEGRADE_EXTRACTIONS,
+    ADMISSION_DEGRADE_LOOP_LAG,
+    ADMISSION_ENABLED,
+    ADMISSION_SHED_DOWNLOAD_BYTES,
+    ADMISSION_SHED_EXTRACTIONS,
+    ADMISSION_SHED_LOOP_LAG,
+    CIRCUIT_BREAKER_ENABLED,
+    CIRCUIT_BREAKER_FAILURE_RATE,
+    CIRCUIT_BREAKER_HALF_OPEN_PROBES,
+    CIRCUIT_BREAKER_MIN_CALLS,
+    CIRCUIT_BREAKER_OPEN_SECONDS,
+    CIRCUIT_BREAKER_SLOW_CALL_SECONDS,
+    CIRCUIT_BREAKER_WINDOW,
+    RESULT_CACHE_ENABLED,
+    RESULT_CACHE_MAX_ENTRIES,
+    RESULT_CACHE_NEGATIVE_TTL,
+    RESULT_CACHE_PLATFORM_TTLS,
+    RESULT_CACHE_TTL,
+    RESULT_STORE_ENABLED,
+    RESULT_STORE_MAX_BYTES,
+    RESULT_STORE_PATH,
+    ROUTER_HANDLER_TIMEOUT,
+    ROUTER_MAX_CONCURRENCY,
+    ROUTER_MAX_URLS_PER_MESSAGE,
+    ROUTER_MULTI_URL,
+    ROUTER_REQUEST_TIMEOUT,
+    SCHEDULER_CHAT_BACKLOG,
+    SCHEDULER_CHAT_CONCURRENCY,
+    SCHEDULER_INLINE_RESERVED,
+    SCHEDULER_SLOTS,
     TELEGRAM_ACCESS_STATE_PATH,
     TELEGRAM_ALLOWED_CHAT_IDS,
     TELEGRAM_ALLOWED_USER_IDS,
     TELEGRAM_OWNER_ID,
 )
+from core.admission import AdmissionController, LoadSignal, LoopLagMonitor
+from core.circuit_breaker import CircuitBreaker
+from core.fair_queue import FairQueue
 from core.registry import build_handlers
+from core.result_cache import ResultCache, TtlPolicy
 from core.router import MessageRouter
-from handlers.commands import load_commands, setup_bot_menu
+from core.scheduler import Lane, LaneScheduler
+from handlers.commands import StatsSource, load_commands, setup_bot_menu
 from handlers.errors import handle_error
+from handlers.media_extractors import MediaExtractor
 from handlers.messages import handle_telegram_message, inline_query, leave_unapproved_group
 from services.access_control import AccessControl
 from services.http import init_http_client, shutdown_http_client
+from services.parse_pool import init_parse_pool, shutdown_parse_pool
+from services.media_delivery import download_bytes_in_flight
+from services.result_store import ResultStore, ResultStoreError
 from utils.logging import setup_logging
 
 setup_logging()
@@ -41,12 +81,90 @@ def main() -> None:
     if TELEGRAM_OWNER_ID <= 0:
         raise ValueError("Please set telegram.owner_id in config.toml to your numeric Telegram user ID")
 
-    handlers = build_handlers()
+    ttl_policy = TtlPolicy(
+        default_ttl=RESULT_CACHE_TTL,
+        negative_ttl=RESULT_CACHE_NEGATIVE_TTL,
+        ttls=RESULT_CACHE_PLATFORM_TTLS,
+    )
+    cache = ResultCache(max_entries=RESULT_CACHE_MAX_ENTRIES, ttl_policy=ttl_policy) if RESULT_CACHE_ENABLED else None
+    # The store also holds extractor state, such as Facebook redirects, so it does not depend on the cache.
+    store = None
+    if RESULT_STORE_ENABLED:
+        try:
+            store = ResultStore(RESULT_STORE_PATH, max_bytes=RESULT_STORE_MAX_BYTES)
+        except ResultStoreError as e:
+            logger.warning("%s; continuing without persistent state.", e)
+
+    handlers = build_handlers(store=store)
 
     if not handlers:
         logger.warning("No handlers were loaded.")
 
-    router = MessageRouter(handlers)
+    breakers = (
+        {
+            handler.name: CircuitBreaker(
+                handler.name,
+                window=CIRCUIT_BREAKER_WINDOW,
+                min_calls=CIRCUIT_BREAKER_MIN_CALLS,
+                failure_rate=CIRCUIT_BREAKER_FAILURE_RATE,
+                slow_call_seconds=CIRCUIT_BREAKER_SLOW_CALL_SECONDS,
+                open_seconds=CIRCUIT_BREAKER_OPEN_SECONDS,
+                half_open_probes=CIRCUIT_BREAKER_HALF_OPEN_PROBES,
+            )
+            for handler in handlers
+            if isinstance(handler, MediaExtractor)
+        }
+        if CIRCUIT_BREAKER_ENABLED
+        else {}
+    )
+    router = MessageRouter(
+        handlers,
+        multi_url=ROUTER_MULTI_URL,
+        max_urls_per_message=ROUTER_MAX_URLS_PER_MESSAGE,
+        max_concurrency=ROUTER_MAX_CONCURRENCY,
+        handler_timeout=ROUTER_HANDLER_TIMEOUT,
+        request_timeout=ROUTER_REQUEST_TIMEOUT,
+        breakers=breakers,
+        cache=cache,
+        store=store,
+        ttl_policy=ttl_policy,
+    )
+    # Inline queries have a hard answer deadline, so they are served first and keep reserved slots.
+    scheduler = LaneScheduler(
+        SCHEDULER_SLOTS,
+        [Lane("inline", reserved=SCHEDULER_INLINE_RESERVED), Lane("message")],
+    )
+    # Messages take turns per chat before entering the message lane, which they can never fill past this size.
+    fair_queue = FairQueue(
+        SCHEDULER_SLOTS - SCHEDULER_INLINE_RESERVED,
+        per_chat_limit=SCHEDULER_CHAT_CONCURRENCY,
+        max_backlog=SCHEDULER_CHAT_BACKLOG,
+    )
+    loop_lag = LoopLagMonitor()
+    admission = AdmissionController(
+        [
+            LoadSignal(
+                "extractions",
+                lambda: router.in_flight,
+                ADMISSION_DEGRADE_EXTRACTIONS,
+                ADMISSION_SHED_EXTRACTIONS,
+            ),
+            LoadSignal(
+                "download_bytes",
+                download_bytes_in_flight,
+                ADMISSION_DEGRADE_DOWNLOAD_BYTES,
+                ADMISSION_SHED_DOWNLOAD_BYTES,
+            ),
+            LoadSignal(
+                "loop_lag",
+                lambda: loop_lag.lag,
+                ADMISSION_DEGRADE_LOOP_LAG,
+                ADMISSION_SHED_LOOP_LAG,
+            ),
+        ]
+        if ADMISSION_ENABLED
+        else []
+    )
     access_control = AccessControl.load(
         owner_id=TELEGRAM_OWNER_ID,
         path=TELEGRAM_ACCESS_STATE_PATH,
@@ -58,19 +176,44 @@ def main() -> None:
 
     async def post_init(app) -> None:
         await init_http_client(app)
+        await init_parse_pool(app)
         await setup_bot_menu(app, access_control)
+        if ADMISSION_ENABLED:
+            loop_lag.start()
+
+    async def post_shutdown(app) -> None:
+        await loop_lag.stop()
+        await shutdown_http_client(app)
+        await shutdown_parse_pool(app)
+        if store is not None:
+            store.close()
 
     # Build application
-    app = ApplicationBuilder().token(token).post_init(post_init).post_shutdown(shutdown_http_client).build()
+    # Updates run concurrently so the scheduler, not arrival order, decides which work goes first.
+    app = (
+        ApplicationBuilder()
+        .token(token)
+        .concurrent_updates(True)
+        .post_init(post_init)
+        .post_shutdown(post_shutdown)
+        .build()
+    )
 
     # Load commands
-    load_commands(app, access_control)
+    stats_sources = [router, scheduler, fair_queue, admission]
+    stats_sources.extend(handler for handler in handlers if isinstance(handler, StatsSource))
+    load_commands(app, access_control, stats_sources)
     app.add_error_handler(handle_error)
 
     # Message handlers
     app.add_handler(MessageHandler(filters.ChatType.GROUPS, leave_unapproved_group(access_control)), group=-1)
-    app.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, handle_telegram_message(router, access_control)))
-    app.add_handler(InlineQueryHandler(inline_query(router, access_control)))
+    app.add_handler(
+        MessageHandler(
+            filters.TEXT & ~filters.COMMAND,
+            handle_telegram_message(router, access_control, scheduler, fair_queue, admission),
+        )
+    )
+    app.add_handler(InlineQueryHandler(inline_query(router, access_control, scheduler, admission)))
 
     logger.info("Bot ready with %d handlers: %s.", len(handlers), handler_names)
     app.run_polling()
@@ -1,9 +1,10 @@
 """Telegram media download and delivery helpers."""
 
+import asyncio
 import logging
 import os
 import uuid
-from collections.abc import Sequence
+from collections.abc import Mapping, Sequence
 from dataclasses import dataclass
 from urllib.parse import parse_qs, unquote, urlparse
 
@@ -12,6 +13,7 @@ from telegram import InputMediaPhoto, InputMediaVideo, Message
 from telegram.error import BadRequest
 
 from config import HTTP_TIMEOUT, TELEGRAM_MAX_MEDIA_BYTES
+from core.types import MediaRendition
 from services.http import get_client
 
 logger = logging.getLogger(__name__)
@@ -21,6 +23,9 @@ MEDIA_GROUP_LIMIT = 10
 TELEGRAM_UPLOAD_TIMEOUT = 120.0
 DOWNLOAD_ATTEMPTS = 3
 
+# Bytes downloaded to TEMP_DIR and not yet cleaned up, for admission control.
+_download_bytes_in_flight = 0
+
 
 class MediaTooLargeError(ValueError):
     """Raised when a media response exceeds the configured download cap."""
@@ -35,14 +40,28 @@ class DownloadedMedia:
     size_bytes: int
 
 
+def download_bytes_in_flight() -> int:
+    """Return how many downloaded media bytes are waiting in temp files."""
+    return _download_bytes_in_flight
+
+
+def _track_download_bytes(size_bytes: int) -> None:
+    global _download_bytes_in_flight
+    _download_bytes_in_flight += size_bytes
+
+
 async def deliver_media(
     message: Message,
     urls: Sequence[str],
     caption: str | None,
     reply_to: int | None,
     parse_mode: str | None = None,
+    renditions: Mapping[str, Sequence[MediaRendition]] | None = None,
 ) -> bool:
-    """Download media URLs, upload them to Telegram, and clean up temp files."""
+    """Download media URLs, upload them to Telegram, and clean up temp files.
+
+    URLs with several known renditions download the best one that fits the size limit.
+    """
     os.makedirs(TEMP_DIR, exist_ok=True)
     client = get_client()
     media_files: list[DownloadedMedia] = []
@@ -52,7 +71,11 @@ async def deliver_media(
         for index, media_url in enumerate(urls, start=1):
             try:
                 logger.debug("Downloading media %d/%d from %s.", index, len(urls), media_url)
-                media_file = await download_media(media_url, client)
+                choices = renditions.get(media_url) if renditions else None
+                if choices and len(choices) > 1:
+                    media_file = await download_rendition(choices, client)
+                else:
+                    media_file = await download_media(media_url, client)
                 media_files.append(media_file)
                 logger.debug(
                     "Downloaded media %d/%d from %s as %s (%d bytes).",
@@ -74,6 +97,7 @@ async def deliver_media(
         return True
     finally:
         for media_file in media_files:
+            _track_download_bytes(-media_file.size_bytes)
             if os.path.exists(media_file.path):
                 try:
                     os.remove(media_file.path)
@@ -101,6 +125,58 @@ async def download_media(media_url: str, client: httpx.AsyncClient | None = None
             await request_client.aclose()
 
 
+async def download_rendition(
+    renditions: Sequence[MediaRendition], client: httpx.AsyncClient | None = None
+) -> DownloadedMedia:
+    """Download the best rendition that fits the media size limit.
+
+    Sizes come from bandwidth and duration where known. Unless the best
+    rendition is already known to fit, the others are probed in parallel with
+    one-byte range requests, and renditions known to be too large are never
+    downloaded. A rendition that still turns out too large falls through to
+    the next one.
+    """
+    sizes = [rendition.estimated_bytes for rendition in renditions]
+    if sizes[0] is None or sizes[0] > TELEGRAM_MAX_MEDIA_BYTES:
+        probe_client = client or get_client()
+        if probe_client is not None:
+            unknown = [index for index, size in enumerate(sizes) if size is None]
+            probed = await asyncio.gather(*(_probe_size(renditions[index].url, probe_client) for index in unknown))
+            for index, size in zip(unknown, probed, strict=True):
+                sizes[index] = size
+
+    last_error: Exception | None = None
+    for rendition, size in zip(renditions, sizes, strict=True):
+        if size is not None and size > TELEGRAM_MAX_MEDIA_BYTES:
+            logger.debug("Skipping %d-byte rendition over the media size limit.", size)
+            continue
+        try:
+            return await download_media(rendition.url, client)
+        except (MediaTooLargeError, httpx.HTTPError) as e:
+            last_error = e
+            logger.debug("Media rendition download failed: %s.", type(e).__name__)
+    if last_error:
+        raise last_error
+    raise MediaTooLargeError(f"no rendition fits the configured limit of {TELEGRAM_MAX_MEDIA_BYTES} bytes")
+
+
+async def _probe_size(media_url: str, client: httpx.AsyncClient) -> int | None:
+    """Return a media URL's size from a one-byte range request, or None when unknown."""
+    try:
+        async with client.stream(
+            "GET", media_url, headers={"Range": "bytes=0-0"}, follow_redirects=True, timeout=HTTP_TIMEOUT
+        ) as response:
+            response.raise_for_status()
+            total = response.headers.get("Content-Range", "").rpartition("/")[2]
+            if total.isdigit():
+                return int(total)
+            if response.status_code == 200 and (content_length := response.headers.get("Content-Length", "")).isdigit():
+                return int(content_length)
+    except httpx.HTTPError as e:
+        logger.debug("Media size probe failed: %s.", type(e).__name__)
+    return None
+
+
 async def _download_media_with_retries(urls: Sequence[str], client: httpx.AsyncClient) -> DownloadedMedia:
     """Try each candidate URL a few times before giving up."""
     last_error: Exception | None = None
@@ -126,8 +202,8 @@ async def _download_media_with_retries(urls: Sequence[str], client: httpx.AsyncC
 async def _download_media_once(media_url: str, client: httpx.AsyncClient) -> DownloadedMedia:
     """Stream one media URL attempt to a temp file."""
     file_path: str | None = None
+    size_bytes = 0
     try:
-        size_bytes = 0
         async with client.stream("GET", media_url, follow_redirects=True) as response:
             response.raise_for_status()
             _raise_if_content_too_large(response)
@@ -138,11 +214,13 @@ async def _download_media_once(media_url: str, client: httpx.AsyncClient) -> Dow
             with open(file_path, "wb") as output:
                 async for chunk in response.aiter_bytes():
                     size_bytes += len(chunk)
+                    _track_download_bytes(len(chunk))
                     if size_bytes > TELEGRAM_MAX_MEDIA_BYTES:
                         raise MediaTooLargeError(f"media exceeds configured limit of {TELEGRAM_MAX_MEDIA_BYTES} bytes")
                     output.write(chunk)
         return DownloadedMedia(file_path, is_video, size_bytes)
-    except Exception:
+    except BaseException:
+        _track_download_bytes(-size_bytes)
         if file_path and os.path.exists(file_path):
             os.remove(file_path)
         raise
@@ -0,0 +1,52 @@
+"""Executor for CPU-bound page parsing."""
+
+import asyncio
+import logging
+from collections.abc import Callable
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, TypeVar
+
+from config import FACEBOOK_PARSE_EXECUTOR, FACEBOOK_PARSE_WORKERS
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Global parse executor; None parses on the event loop
+_EXECUTOR: Executor | None = None
+
+
+async def init_parse_pool(app) -> None:
+    """Start the parse workers on bot startup."""
+    global _EXECUTOR
+    if FACEBOOK_PARSE_WORKERS == 0:
+        return
+    if FACEBOOK_PARSE_EXECUTOR == "process":
+        _EXECUTOR = ProcessPoolExecutor(max_workers=FACEBOOK_PARSE_WORKERS)
+    else:
+        _EXECUTOR = ThreadPoolExecutor(max_workers=FACEBOOK_PARSE_WORKERS, thread_name_prefix="parse")
+    logger.debug("Started %d %s parse workers.", FACEBOOK_PARSE_WORKERS, FACEBOOK_PARSE_EXECUTOR)
+
+
+async def shutdown_parse_pool(app) -> None:
+    """Stop the parse workers on bot shutdown."""
+    global _EXECUTOR
+    if _EXECUTOR:
+        logger.debug("Stopped parse workers.")
+        _EXECUTOR.shutdown(wait=False, cancel_futures=True)
+        _EXECUTOR = None
+
+
+def get_parse_executor() -> Executor | None:
+    """Get the parse executor, or None when parsing runs on the event loop."""
+    return _EXECUTOR
+
+
+async def run_parse(func: Callable[..., T], *args: Any) -> T:
+    """Run func(*args) on a parse worker, or inline when no workers are running.
+
+    With a process pool, func, its arguments and its result must be picklable.
+    """
+    if _EXECUTOR is None:
+        return func(*args)
+    return await asyncio.get_running_loop().run_in_executor(_EXECUTOR, func, *args)
@@ -0,0 +1,286 @@
+"""Persistent extraction result store shared by bot processes."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import sqlite3
+import time
+import zlib
+from pathlib import Path
+from threading import Lock
+from typing import Any
+
+from core.redirect_cache import Redirect
+from core.result_cache import CachedResult
+from core.strategy_stats import StrategyScore
+from core.types import HandlerResult, MediaMetadata, MediaRendition, MediaResult
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA_VERSION = 2
+_EVICTION_BATCH = 64
+_NEGATIVE_PAYLOAD = b""
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    key TEXT PRIMARY KEY,
+    payload BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    expires_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS results_expires_at ON results (expires_at);
+CREATE INDEX IF NOT EXISTS results_accessed_at ON results (accessed_at);
+CREATE TABLE IF NOT EXISTS redirects (
+    key TEXT PRIMARY KEY,
+    target TEXT NOT NULL,
+    hops INTEGER NOT NULL,
+    expires_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS strategies (
+    name TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    strategy TEXT NOT NULL,
+    attempts INTEGER NOT NULL,
+    success_rate REAL NOT NULL,
+    latency REAL NOT NULL,
+    PRIMARY KEY (name, kind, strategy)
+);
+"""
+
+
+class ResultStoreError(RuntimeError):
+    """Raised when the result store cannot be opened."""
+
+
+class ResultStore:
+    """SQLite-backed result store with TTL expiry and an LRU byte budget.
+
+    The database runs in WAL mode so several bot processes can share it. Calls
+    are serialized on one connection and run in a worker thread.
+    """
+
+    def __init__(self, path: Path, *, max_bytes: int) -> None:
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+        self._lock = Lock()
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self._connection = sqlite3.connect(path, timeout=5.0, check_same_thread=False, isolation_level=None)
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA synchronous=NORMAL")
+            self._connection.executescript(_SCHEMA)
+        except (OSError, sqlite3.Error) as exc:
+            raise ResultStoreError(f"Cannot open result store at {path}: {exc}") from exc
+
+    async def get(self, key: tuple[str, str]) -> CachedResult | None:
+        """Return a fresh stored result for key, or None on a miss."""
+        return await asyncio.to_thread(self._get, key)
+
+    async def put(self, key: tuple[str, str], result: HandlerResult | None, ttl: float) -> None:
+        """Store a result for ttl seconds, evicting least recently used rows over the byte budget."""
+        if ttl <= 0 or (result is not None and not isinstance(result, MediaResult)):
+            return
+        await asyncio.to_thread(self._put, key, result, ttl)
+
+    async def get_redirect(self, key: tuple[str, str]) -> tuple[Redirect, float] | None:
+        """Return a fresh stored redirect for key with its remaining TTL, or None."""
+        return await asyncio.to_thread(self._get_redirect, key)
+
+    async def put_redirect(self, key: tuple[str, str], redirect: Redirect, ttl: float) -> None:
+        """Store redirect for ttl seconds, or delete it when ttl is not positive."""
+        await asyncio.to_thread(self._put_redirect, key, redirect, ttl)
+
+    async def load_strategies(self, name: str) -> dict[tuple[str, str], StrategyScore]:
+        """Return every stored strategy score recorded under name."""
+        return await asyncio.to_thread(self._load_strategies, name)
+
+    async def put_strategy(self, name: str, key: tuple[str, str], score: StrategyScore) -> None:
+        """Store the latest score for one kind and strategy."""
+        await asyncio.to_thread(self._put_strategy, name, key, score)
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            entries, stored_bytes = self._connection.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results"
+            ).fetchone()
+        return {
+            "entries": entries,
+            "bytes": stored_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "writes": self.writes,
+            "evictions": self.evictions,
+        }
+
+    def _get(self, key: tuple[str, str]) -> CachedResult | None:
+        now = time.time()
+        store_key = _store_key(key)
+        with self._lock:
+            try:
+                row = self._connection.execute(
+                    "SELECT payload, expires_at FROM results WHERE key = ? AND expires_at > ?",
+                    (store_key, now),
+                ).fetchone()
+                if row:
+                    self._connection.execute("UPDATE results SET accessed_at = ? WHERE key = ?", (now, store_key))
+            except sqlite3.Error as e:
+                logger.warning("Result store read failed: %r.", e)
+                row = None
+        if not row:
+            self.misses += 1
+            return None
+        try:
+            result = decode_result(row[0])
+        except (ValueError, TypeError, zlib.error) as e:
+            logger.warning("Discarding unreadable stored result: %r.", e)
+            self.misses += 1
+            return None
+        self.hits += 1
+        return CachedResult(result, ttl=row[1] - now)
+
+    def _put(self, key: tuple[str, str], result: MediaResult | None, ttl: float) -> None:
+        now = time.time()
+        payload = encode_result(result)
+        with self._lock:
+            try:
+                self._connection.execute("BEGIN IMMEDIATE")
+                self._connection.execute(
+                    "INSERT OR REPLACE INTO results (key, payload, size, expires_at, accessed_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (_store_key(key), payload, len(payload), now + ttl, now),
+                )
+                self._connection.execute("DELETE FROM results WHERE expires_at <= ?", (now,))
+                self._evict_over_budget()
+                self._connection.execute("COMMIT")
+                self.writes += 1
+            except sqlite3.Error as e:
+                logger.warning("Result store write failed: %r.", e)
+                if self._connection.in_transaction:
+                    self._connection.execute("ROLLBACK")
+
+    def _get_redirect(self, key: tuple[str, str]) -> tuple[Redirect, float] | None:
+        now = time.time()
+        with self._lock:
+            try:
+                row = self._connection.execute(
+                    "SELECT target, hops, expires_at FROM redirects WHERE key = ? AND expires_at > ?",
+                    (_store_key(key), now),
+                ).fetchone()
+            except sqlite3.Error as e:
+                logger.warning("Result store redirect read failed: %r.", e)
+                return None
+        if not row:
+            return None
+        target, hops, expires_at = row
+        return Redirect(target, hops), expires_at - now
+
+    def _put_redirect(self, key: tuple[str, str], redirect: Redirect, ttl: float) -> None:
+        now = time.time()
+        store_key = _store_key(key)
+        with self._lock:
+            try:
+                self._connection.execute("BEGIN IMMEDIATE")
+                if ttl > 0:
+                    self._connection.execute(
+                        "INSERT OR REPLACE INTO redirects (key, target, hops, expires_at) VALUES (?, ?, ?, ?)",
+                        (store_key, redirect.target, redirect.hops, now + ttl),
+                    )
+                else:
+                    self._connection.execute("DELETE FROM redirects WHERE key = ?", (store_key,))
+                self._connection.execute("DELETE FROM redirects WHERE expires_at <= ?", (now,))
+                self._connection.execute("COMMIT")
+            except sqlite3.Error as e:
+                logger.warning("Result store redirect write failed: %r.", e)
+                if self._connection.in_transaction:
+                    self._connection.execute("ROLLBACK")
+
+    def _load_strategies(self, name: str) -> dict[tuple[str, str], StrategyScore]:
+        with self._lock:
+            try:
+                rows = self._connection.execute(
+                    "SELECT kind, strategy, attempts, success_rate, latency FROM strategies WHERE name = ?",
+                    (name,),
+                ).fetchall()
+            except sqlite3.Error as e:
+                logger.warning("Result store strategy read failed: %r.", e)
+                return {}
+        return {(kind, strategy): StrategyScore(*score) for kind, strategy, *score in rows}
+
+    def _put_strategy(self, name: str, key: tuple[str, str], score: StrategyScore) -> None:
+        kind, strategy = key
+        with self._lock:
+            try:
+                self._connection.execute(
+                    "INSERT OR REPLACE INTO strategies (name, kind, strategy, attempts, success_rate, latency) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (name, kind, strategy, score.attempts, score.success_rate, score.latency),
+                )
+            except sqlite3.Error as e:
+                logger.warning("Result store strategy write failed: %r.", e)
+
+    def _evict_over_budget(self) -> None:
+        (stored_bytes,) = self._connection.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()
+        while stored_bytes > self.max_bytes:
+            rows = self._connection.execute(
+                "SELECT key, size FROM results ORDER BY accessed_at LIMIT ?",
+                (_EVICTION_BATCH,),
+            ).fetchall()
+            if not rows:
+                return
+            for store_key, size in rows:
+                if stored_bytes <= self.max_bytes:
+                    return
+                self._connection.execute("DELETE FROM results WHERE key = ?", (store_key,))
+                stored_bytes -= size
+                self.evictions += 1
+
+
+def encode_result(result: MediaResult | None) -> bytes:
+    """Serialize a media result as compressed positional JSON."""
+    if result is None:
+        return _NEGATIVE_PAYLOAD
+    metadata = result.metadata
+    payload = [
+        _SCHEMA_VERSION,
+        list(result.urls),
+        metadata.original_url,
+        metadata.thumbnail,
+        metadata.caption,
+        metadata.title,
+        [
+            [[rendition.url, rendition.bandwidth, rendition.duration] for rendition in group]
+            for group in result.renditions
+        ],
+    ]
+    return zlib.compress(json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode())
+
+
+def decode_result(payload: bytes) -> MediaResult | None:
+    """Deserialize a payload written by encode_result."""
+    if payload == _NEGATIVE_PAYLOAD:
+        return None
+    data: Any = json.loads(zlib.decompress(payload))
+    if not isinstance(data, list) or not data or data[0] != _SCHEMA_VERSION:
+        raise ValueError("unsupported stored result version")
+    _, urls, original_url, thumbnail, caption, title, renditions = data
+    return MediaResult(
+        urls=tuple(urls),
+        metadata=MediaMetadata(original_url=original_url, thumbnail=thumbnail, caption=caption, title=title),
+        renditions=tuple(tuple(MediaRendition(*rendition) for rendition in group) for group in renditions),
+    )
+
+
+def _store_key(key: tuple[str, str]) -> str:
+    handler_name, url = key
+    return f"{handler_name} {url}"
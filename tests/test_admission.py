@@ -0,0 +1,68 @@
+"""Regression tests for admission control."""
+
+import asyncio
+import unittest
+
+from core.admission import AdmissionController, LoadLevel, LoadSignal, LoopLagMonitor
+
+
+class AdmissionControllerTests(unittest.TestCase):
+    def setUp(self):
+        self.extractions = 0
+        self.download_bytes = 0
+        self.controller = AdmissionController(
+            [
+                LoadSignal("extractions", lambda: self.extractions, 4, 8),
+                LoadSignal("download_bytes", lambda: self.download_bytes, 100, 200),
+            ]
+        )
+
+    def test_worst_signal_sets_the_level(self):
+        self.assertEqual(self.controller.level(), LoadLevel.NORMAL)
+
+        self.download_bytes = 150
+        self.assertEqual(self.controller.level(), LoadLevel.DEGRADED)
+
+        self.extractions = 8
+        self.assertEqual(self.controller.level(), LoadLevel.SHEDDING)
+
+    def test_degraded_load_keeps_inline_but_stops_media(self):
+        self.extractions = 4
+
+        self.assertFalse(self.controller.allow_media())
+        self.assertTrue(self.controller.allow_inline())
+        self.assertEqual(self.controller.stats()["admission"]["degraded_replies"], 1)
+
+    def test_shedding_drops_inline_and_recovers_when_load_falls(self):
+        self.download_bytes = 500
+        self.assertFalse(self.controller.allow_inline())
+
+        self.download_bytes = 0
+        self.assertTrue(self.controller.allow_inline())
+        self.assertTrue(self.controller.allow_media())
+        self.assertEqual(self.controller.stats()["admission"]["shed_inline_queries"], 1)
+
+
+class LoopLagMonitorTests(unittest.IsolatedAsyncioTestCase):
+    async def test_measures_late_wakeups(self):
+        woke = asyncio.Event()
+        reads = 0
+
+        def clock() -> float:
+            nonlocal reads
+            reads += 1
+            if reads == 2:
+                woke.set()
+            # The sleeper is woken 50 ms after its 10 ms interval, as if the loop had been blocked.
+            return 0.0 if reads == 1 else 0.06
+
+        monitor = LoopLagMonitor(interval=0.01, clock=clock)
+        monitor.start()
+        await asyncio.wait_for(woke.wait(), timeout=1)
+        await monitor.stop()
+
+        self.assertAlmostEqual(monitor.lag, 0.05)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,154 @@
+"""Regression tests for per-extractor circuit breakers."""
+
+import unittest
+from types import SimpleNamespace
+
+from core.admission import AdmissionController
+from core.circuit_breaker import BreakerState, CircuitBreaker
+from core.result_cache import ResultCache, TtlPolicy
+from core.router import MessageRouter
+from core.types import MediaMetadata, MediaResult
+from handlers.messages import _reply_with_result
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class _CountingExtractor:
+    name = "media"
+    domains = ("example.com",)
+
+    def __init__(self, succeed: bool, error: Exception | None = None):
+        self.succeed = succeed
+        self.error = error
+        self.calls = 0
+
+    def match_url(self, text: str) -> str | None:
+        return text
+
+    async def extract(self, url: str):
+        self.calls += 1
+        if self.error:
+            raise self.error
+        return MediaResult(urls=(url,), metadata=MediaMetadata(original_url=url)) if self.succeed else None
+
+    async def handle(self, text: str):
+        return await self.extract(text)
+
+
+class _Message:
+    message_id = 1
+    chat_id = 1
+
+    def __init__(self):
+        self.replies: list[str] = []
+
+    async def reply_text(self, text: str, **kwargs):
+        self.replies.append(text)
+
+
+def _breaker(clock: _Clock) -> CircuitBreaker:
+    return CircuitBreaker("media", window=4, min_calls=4, failure_rate=0.5, open_seconds=30, clock=clock)
+
+
+class CircuitBreakerTests(unittest.TestCase):
+    def test_opens_once_failure_rate_is_reached(self):
+        breaker = _breaker(_Clock())
+        for succeeded in (True, True, False):
+            breaker.record(succeeded, 0.1)
+        self.assertEqual(breaker.state, BreakerState.CLOSED)
+
+        breaker.record(False, 0.1)
+
+        self.assertEqual(breaker.state, BreakerState.OPEN)
+        self.assertFalse(breaker.allow())
+        self.assertEqual(breaker.rejected, 1)
+
+    def test_slow_calls_count_as_failures(self):
+        breaker = CircuitBreaker("media", window=2, min_calls=2, failure_rate=1.0, slow_call_seconds=1.0)
+
+        breaker.record(True, 5.0)
+        breaker.record(True, 5.0)
+
+        self.assertEqual(breaker.state, BreakerState.OPEN)
+
+    def test_half_open_probe_closes_or_reopens(self):
+        clock = _Clock()
+        breaker = _breaker(clock)
+        for _ in range(4):
+            breaker.record(False, 0.1)
+
+        clock.now = 30
+        self.assertTrue(breaker.allow())
+        self.assertFalse(breaker.allow())
+        breaker.record(False, 0.1)
+        self.assertEqual(breaker.state, BreakerState.OPEN)
+
+        clock.now = 60
+        self.assertTrue(breaker.allow())
+        breaker.record(True, 0.1)
+        self.assertEqual(breaker.state, BreakerState.CLOSED)
+
+    def test_cancelled_probe_frees_its_slot(self):
+        clock = _Clock()
+        breaker = _breaker(clock)
+        for _ in range(4):
+            breaker.record(False, 0.1)
+        clock.now = 30
+
+        self.assertTrue(breaker.allow())
+        breaker.release()
+
+        self.assertTrue(breaker.allow())
+
+
+class RouterBreakerTests(unittest.IsolatedAsyncioTestCase):
+    def _breaker(self) -> CircuitBreaker:
+        return CircuitBreaker("media", window=2, min_calls=2, failure_rate=0.5, open_seconds=30, clock=_Clock())
+
+    async def _open_router(self, cache: ResultCache | None = None) -> tuple[MessageRouter, _CountingExtractor]:
+        extractor = _CountingExtractor(succeed=False, error=RuntimeError("down"))
+        router = MessageRouter([extractor], cache=cache, breakers={"media": self._breaker()})
+        await router.handle("https://example.com/a")
+        await router.handle("https://example.com/b")
+        return router, extractor
+
+    async def test_open_breaker_fails_fast_to_an_uncached_link_only_result(self):
+        cache = ResultCache(max_entries=8, ttl_policy=TtlPolicy(default_ttl=60, negative_ttl=0.001))
+        router, extractor = await self._open_router(cache)
+
+        result = await router.handle("https://example.com/c")
+
+        self.assertEqual(extractor.calls, 2)
+        self.assertEqual(result, MediaResult(urls=(), metadata=MediaMetadata(original_url="https://example.com/c")))
+        self.assertIsNone(cache.get(("media", "https://example.com/c")))
+        self.assertIn("open", router.stats()["circuit_breakers"]["media"])
+
+    async def test_open_breaker_still_replies_with_the_source_link(self):
+        router, _ = await self._open_router()
+        message = _Message()
+        update = SimpleNamespace(message=message, effective_user=None)
+
+        await _reply_with_result(update, await router.handle("https://example.com/c"), AdmissionController([]))
+
+        self.assertEqual(message.replies, ['<a href="https://example.com/c">Source</a>'])
+
+    async def test_links_without_media_do_not_open_the_breaker(self):
+        breaker = self._breaker()
+        extractor = _CountingExtractor(succeed=False)
+        router = MessageRouter([extractor], breakers={"media": breaker})
+
+        for name in ("a", "b", "c"):
+            self.assertIsNone(await router.handle(f"https://example.com/{name}"))
+
+        self.assertEqual(extractor.calls, 3)
+        self.assertEqual(breaker.state, BreakerState.CLOSED)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,8 +1,25 @@
 """Regression tests for Facebook media extraction scoping."""
 
+import asyncio
+import json
+import tempfile
+import threading
+import time
 import unittest
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from unittest.mock import patch
 
-from handlers.media_extractors.facebook import _extract_media_candidates
+import httpx
+
+from core.redirect_cache import RedirectCache
+from core.registry import build_handlers
+from core.types import MediaMetadata, MediaResult
+from handlers.media_extractors import facebook
+from handlers.media_extractors.facebook import StoryTokenIndex, _extract_facebook_media, _extract_media_candidates
+from services import parse_pool
+from services.result_store import ResultStore
+from utils.json_index import JsonIndex
 
 
 def _story_document(story_token: str, media_id: str = "photo-1") -> dict:
@@ -103,5 +120,433 @@ class FacebookStoryExtractionTests(unittest.TestCase):
         self.assertEqual([candidate.url for candidate in candidates], ["https://video.example/target-video-high.mp4"])
 
 
+class ExtractionPlanTests(unittest.TestCase):
+    def test_plans_anchor_each_query_at_its_first_field(self):
+        self.assertEqual(facebook._STORY_ATTACHMENT_PLAN.anchors, ("node_v2", "all_subattachments"))
+        self.assertEqual(facebook._PHOTO_PLAN.anchors, ("currMedia",))
+
+    def test_photo_media_is_found_only_at_current_media_nodes(self):
+        documents = [
+            {"media": {"currMedia": {"id": "7", "image": {"uri": "https://scontent.example/7.jpg"}}}},
+            {"image": {"uri": "https://scontent.example/unanchored.jpg"}, "id": "7"},
+        ]
+
+        candidates = _extract_media_candidates(documents, "https://www.facebook.com/photo/?fbid=7")
+
+        self.assertEqual([candidate.url for candidate in candidates], ["https://scontent.example/7.jpg"])
+
+
+class StoryTokenIndexTests(unittest.TestCase):
+    def test_looks_up_story_nodes_by_any_token_in_document_order(self):
+        documents = [_story_document("first-story"), _story_video_document("second-story")]
+        story_index = StoryTokenIndex(JsonIndex(documents))
+
+        self.assertEqual(story_index.nodes_for("second-story"), [documents[1], documents[1]["node_v2"]])
+        self.assertEqual(
+            story_index.nodes_for_any(("second-story", "first-story")),
+            [documents[0], documents[0]["node_v2"], documents[1], documents[1]["node_v2"]],
+        )
+        self.assertEqual(story_index.nodes_for("missing-story"), [])
+
+    def test_url_fields_are_keyed_by_path_segments_and_query_values(self):
+        node = {"url": "https://www.facebook.com/permalink.php?story_fbid=123&id=4", "www_url": "/example/posts/abc/"}
+        story_index = StoryTokenIndex(JsonIndex([node]))
+
+        self.assertEqual(story_index.nodes_for("123"), [node])
+        self.assertEqual(story_index.nodes_for("abc"), [node])
+        self.assertEqual(story_index.nodes_for("missing"), [])
+
+    def test_tokens_inside_a_field_fall_back_to_a_substring_scan(self):
+        prefixed = {"story_token": "S:_I4:123:VK:456"}
+        encoded = {"url": "https://l.facebook.com/l.php?u=https%3A%2F%2Fwww.facebook.com%2Fexample%2Fposts%2Fpfbid0abc"}
+        story_index = StoryTokenIndex(JsonIndex([prefixed, encoded]))
+
+        self.assertEqual(story_index.nodes_for("456"), [prefixed])
+        self.assertEqual(story_index.nodes_for("pfbid0abc"), [encoded])
+        self.assertEqual(story_index.nodes_for_any(("pfbid0abc", "123")), [prefixed, encoded])
+
+
+class ParsedPageTests(unittest.TestCase):
+    def test_page_scripts_are_decoded_once_for_every_stage(self):
+        route = {"__bbox": {"result": {"initialRouteInfo": {"route": {"params": {"story_token": "resolved-story"}}}}}}
+        media = {"__bbox": {"result": _story_document("resolved-story")}}
+        page = facebook._parse_page(f"<html><body>{_script(route)}{_script(media)}</body></html>")
+
+        with patch.object(facebook, "_decode_script", wraps=facebook._decode_script) as decode_script:
+            result = _extract_facebook_media(page, "https://www.facebook.com/share/p/1JE8AhF9Fj/")
+            album_info = facebook._find_story_album_info(
+                page.media, "https://www.facebook.com/share/p/1JE8AhF9Fj/", page.story_tokens
+            )
+
+        self.assertEqual(result.urls, ("https://scontent.example/photo-1.jpg",))
+        self.assertIsNone(album_info)
+        self.assertEqual(page.story_tokens, ("resolved-story",))
+        self.assertEqual(decode_script.call_count, 2)
+
+    def test_story_token_index_is_built_once_per_page(self):
+        media = {"__bbox": {"result": _story_document("target-story")}}
+        page = facebook._parse_page(f"<html><body>{_script(media)}</body></html>")
+        url = "https://www.facebook.com/example/posts/target-story"
+
+        with patch.object(facebook, "StoryTokenIndex", wraps=StoryTokenIndex) as story_token_index:
+            results = [_extract_facebook_media(page, url) for _ in range(2)]
+
+        self.assertEqual(results[0], results[1])
+        self.assertEqual(story_token_index.call_count, 1)
+
+    def test_only_scripts_mentioning_the_linked_media_are_decoded(self):
+        feed = [{"__bbox": {"node_v2": {"id": f"feed-{index}"}}} for index in range(3)]
+        photo = {
+            "__bbox": {
+                "currMedia": {
+                    "id": "42",
+                    "image": {"uri": "https://scontent.example/42.jpg"},
+                    "creation_story": {"message": {"text": "Caption"}},
+                }
+            }
+        }
+        scripts = "".join(_script(document) for document in (feed[0], photo, *feed[1:]))
+        page = facebook._parse_page(f"<html><body>{scripts}</body></html>")
+
+        result = _extract_facebook_media(page, "https://www.facebook.com/photo/?fbid=42")
+
+        self.assertEqual(result.urls, ("https://scontent.example/42.jpg",))
+        self.assertEqual(result.metadata.caption, "Caption")
+        self.assertEqual(page.media_scripts.decoded, 1)
+
+    def test_story_video_in_a_script_without_the_story_token_is_still_found(self):
+        story = _story_video_document("target-story", "target-video")
+        del story["all_video_dash_prefetch_representations"]
+        video = {
+            "id": "target-video",
+            "videoDeliveryLegacyFields": {"browser_native_hd_url": "https://video.example/target-video-hd.mp4"},
+        }
+        scripts = _script({"__bbox": story}) + _script({"__bbox": {"video": video}})
+        page = facebook._parse_page(f"<html><body>{scripts}</body></html>")
+
+        result = _extract_facebook_media(page, "https://www.facebook.com/groups/example/permalink/target-story")
+
+        self.assertEqual(result.urls, ("https://video.example/target-video-hd.mp4",))
+
+
+class RenditionTests(unittest.TestCase):
+    def test_video_keeps_every_rendition_best_first(self):
+        video = {
+            "id": "7",
+            "playable_duration_in_ms": 20_000,
+            "videoDeliveryLegacyFields": {
+                "browser_native_hd_url": "https://video.example/hd.mp4",
+                "browser_native_sd_url": "https://video.example/sd.mp4",
+            },
+            "dash": [
+                {"mime_type": "video/mp4", "base_url": "https://video.example/low.mp4", "bandwidth": 400_000},
+                {"mime_type": "video/mp4", "base_url": "https://video.example/high.mp4", "bandwidth": 900_000},
+            ],
+        }
+        index = JsonIndex([video])
+
+        candidate = facebook._extract_video_playback_from_node(index, video, "7")
+
+        self.assertEqual(candidate.url, "https://video.example/hd.mp4")
+        self.assertEqual(
+            [rendition.url for rendition in candidate.renditions],
+            [f"https://video.example/{name}.mp4" for name in ("hd", "sd", "high", "low")],
+        )
+        self.assertEqual(candidate.renditions[2].estimated_bytes, 2_250_000)
+
+
+def _script(document: dict) -> str:
+    return f'<script type="application/json" data-sjs>{json.dumps(document)}</script>'
+
+
+class StreamedPageTests(unittest.IsolatedAsyncioTestCase):
+    async def _fetch_photo_page(self) -> tuple[MediaResult | None, int, int]:
+        route = {"__bbox": {"result": {"initialRouteInfo": {"route": {"meta": {"title": "A photo"}}}}}}
+        photo = {"__bbox": {"currMedia": {"id": "42", "image": {"uri": "https://scontent.example/42.jpg"}}}}
+        chunks = [
+            f"<html><head></head><body>{_script(route)}".encode(),
+            _script(photo).encode(),
+            *(b"<div>feed</div>" * 1000 for _ in range(5)),
+            b"</body></html>",
+        ]
+        sent = []
+
+        async def body():
+            for chunk in chunks:
+                sent.append(chunk)
+                yield chunk
+                # Network pacing; gives a parse worker time to catch up.
+                await asyncio.sleep(0.01)
+
+        transport = httpx.MockTransport(lambda request: httpx.Response(200, content=body()))
+        async with httpx.AsyncClient(transport=transport) as client:
+            with patch.object(facebook, "FACEBOOK_STREAMING", True):
+                result = await facebook._fetch_facebook(client, "https://www.facebook.com/photo/?fbid=42")
+
+        return result, len(sent), len(chunks)
+
+    def _assert_stopped_early(self, result: MediaResult | None, sent: int, total: int) -> None:
+        self.assertEqual(result.urls, ("https://scontent.example/42.jpg",))
+        self.assertEqual(result.metadata.title, "A photo")
+        self.assertLess(sent, total)
+
+    async def test_stream_stops_once_linked_media_and_route_arrived(self):
+        self._assert_stopped_early(*await self._fetch_photo_page())
+
+    async def test_thread_pool_parses_the_stream_off_the_event_loop(self):
+        executor = ThreadPoolExecutor(max_workers=1)
+        self.addCleanup(executor.shutdown)
+        threads = []
+
+        def extract_page(*args):
+            threads.append(threading.current_thread())
+            return extract(*args)
+
+        extract = facebook._extract_page
+        with patch.object(parse_pool, "_EXECUTOR", executor), patch.object(facebook, "_extract_page", extract_page):
+            self._assert_stopped_early(*await self._fetch_photo_page())
+
+        self.assertEqual(len(threads), 1)
+        self.assertIsNot(threads[0], threading.main_thread())
+
+    async def test_stalled_stream_does_not_hold_a_parse_worker(self):
+        executor = ThreadPoolExecutor(max_workers=1)
+        self.addCleanup(executor.shutdown)
+        photo = {"__bbox": {"currMedia": {"id": "42", "image": {"uri": "https://scontent.example/42.jpg"}}}}
+        release = asyncio.Event()
+
+        async def body():
+            yield b"<html><body><div>feed</div>"
+            await release.wait()
+            yield f"{_script(photo)}</body></html>".encode()
+
+        transport = httpx.MockTransport(lambda request: httpx.Response(200, content=body()))
+        async with httpx.AsyncClient(transport=transport) as client:
+            with patch.object(parse_pool, "_EXECUTOR", executor), patch.object(facebook, "FACEBOOK_STREAMING", True):
+                fetch = asyncio.create_task(facebook._fetch_facebook(client, "https://www.facebook.com/photo/?fbid=42"))
+                await asyncio.sleep(0.01)
+                parsed = await asyncio.wait_for(parse_pool.run_parse(str.upper, "free"), timeout=1)
+                release.set()
+                result = await fetch
+
+        self.assertEqual(parsed, "FREE")
+        self.assertEqual(result.urls, ("https://scontent.example/42.jpg",))
+
+
+class RedirectCacheTests(unittest.IsolatedAsyncioTestCase):
+    async def test_repeated_share_link_fetches_the_final_page_directly(self):
+        photo = {"__bbox": {"currMedia": {"id": "42", "image": {"uri": "https://scontent.example/42.jpg"}}}}
+        requested = []
+
+        def respond(request: httpx.Request) -> httpx.Response:
+            requested.append(request.url.path)
+            if request.url.path.startswith("/share/"):
+                return httpx.Response(302, headers={"Location": "/photo/?fbid=42"})
+            return httpx.Response(200, text=f"<html><body>{_script(photo)}</body></html>")
+
+        redirects = RedirectCache("facebook_redirects", max_entries=10, ttl=60)
+        async with httpx.AsyncClient(transport=httpx.MockTransport(respond)) as client:
+            for _ in range(2):
+                result = await facebook._fetch_facebook(
+                    client, "https://www.facebook.com/share/p/abc/", redirects=redirects
+                )
+                self.assertEqual(result.urls, ("https://scontent.example/42.jpg",))
+
+        self.assertEqual(requested, ["/share/p/abc/", "/photo/", "/photo/"])
+        self.assertEqual(redirects.stats()["facebook_redirects"]["hops_saved"], 1)
+
+    async def test_redirect_survives_a_new_extractor_through_the_store(self):
+        photo = {"__bbox": {"currMedia": {"id": "42", "image": {"uri": "https://scontent.example/42.jpg"}}}}
+        requested = []
+
+        def respond(request: httpx.Request) -> httpx.Response:
+            requested.append(request.url.path)
+            if request.url.path.startswith("/share/"):
+                return httpx.Response(302, headers={"Location": "/photo/?fbid=42"})
+            return httpx.Response(200, text=f"<html><body>{_script(photo)}</body></html>")
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir) / "results.sqlite3"
+            async with httpx.AsyncClient(transport=httpx.MockTransport(respond)) as client:
+                for _ in range(2):
+                    # Each pass builds the handlers from a reopened store, like a restarted bot.
+                    store = ResultStore(path, max_bytes=1 << 20)
+                    try:
+                        extractor = build_handlers(store=store)[0]
+                        result = await extractor._fetch_public(client, "https://www.facebook.com/share/p/abc/")
+                    finally:
+                        store.close()
+                    self.assertEqual(result.urls, ("https://scontent.example/42.jpg",))
+
+        self.assertEqual(requested, ["/share/p/abc/", "/photo/", "/photo/"])
+        self.assertEqual(extractor.stats()["facebook_redirects"]["store_hits"], 1)
+
+
+def _album_page(photo_ids: list[int], cursor: str | None = None) -> str:
+    photos = [
+        {"__typename": "Photo", "id": str(i), "image": {"uri": f"https://scontent.example/{i}.jpg"}} for i in photo_ids
+    ]
+    connection = {
+        "edges": [{"node": photo} for photo in photos],
+        "page_info": {"has_next_page": bool(cursor), "end_cursor": cursor},
+    }
+    return f"<html><body>{_script({'__bbox': {'attachments': connection}})}</body></html>"
+
+
+class AlbumExpansionTests(unittest.IsolatedAsyncioTestCase):
+    async def test_follows_cursors_until_the_album_count_is_reached(self):
+        pages = {None: _album_page([1, 2], "c1"), "c1": _album_page([2, 3, 4], "c2"), "c2": _album_page([5])}
+        requested = []
+
+        def respond(request: httpx.Request) -> httpx.Response:
+            cursor = request.url.params.get("cursor")
+            requested.append(cursor)
+            return httpx.Response(200, text=pages[cursor])
+
+        embedded = MediaResult(urls=("https://scontent.example/1.jpg",), metadata=MediaMetadata(original_url="post"))
+        async with httpx.AsyncClient(transport=httpx.MockTransport(respond)) as client:
+            result = await facebook._expand_story_album(
+                client, embedded, facebook.StoryAlbumInfo("a.1", 4), "https://www.facebook.com/groups/1/posts/2/", None
+            )
+
+        self.assertEqual(result.urls, tuple(f"https://scontent.example/{i}.jpg" for i in range(1, 5)))
+        self.assertEqual(requested, [None, "c1"])
+
+    async def test_pages_advertised_together_are_fetched_concurrently(self):
+        pages = {None: _album_page([1], "c1") + _album_page([1], "c2"), "c1": _album_page([2]), "c2": _album_page([3])}
+        active = peak = 0
+
+        async def respond(request: httpx.Request) -> httpx.Response:
+            nonlocal active, peak
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.01)
+            active -= 1
+            return httpx.Response(200, text=pages[request.url.params.get("cursor")])
+
+        embedded = MediaResult(urls=("https://scontent.example/1.jpg",), metadata=MediaMetadata(original_url="post"))
+        async with httpx.AsyncClient(transport=httpx.MockTransport(respond)) as client:
+            result = await facebook._expand_story_album(
+                client, embedded, facebook.StoryAlbumInfo("a.1", 3), "https://www.facebook.com/groups/1/posts/2/", None
+            )
+
+        self.assertEqual(len(result.urls), 3)
+        self.assertEqual(peak, 2)
+
+    async def test_expired_session_keeps_the_pages_already_merged(self):
+        pages = {None: _album_page([1, 2], "c1") + _album_page([2], "c2"), "c2": _album_page([3])}
+        cancelled = []
+
+        async def respond(request: httpx.Request) -> httpx.Response:
+            cursor = request.url.params.get("cursor")
+            if request.url.path.startswith("/login"):
+                return httpx.Response(200, text="<html></html>")
+            if cursor == "c1":
+                return httpx.Response(302, headers={"Location": "https://www.facebook.com/login/"})
+            try:
+                await asyncio.sleep(1 if cursor == "c2" else 0)
+            except asyncio.CancelledError:
+                cancelled.append(cursor)
+                raise
+            return httpx.Response(200, text=pages[cursor])
+
+        embedded = MediaResult(urls=("https://scontent.example/1.jpg",), metadata=MediaMetadata(original_url="post"))
+        transport = httpx.MockTransport(respond)
+        async with httpx.AsyncClient(transport=transport, follow_redirects=True) as client:
+            result = await facebook._expand_story_album(
+                client, embedded, facebook.StoryAlbumInfo("a.1", 4), "https://www.facebook.com/groups/1/posts/2/", None
+            )
+
+        self.assertEqual(result.urls, ("https://scontent.example/1.jpg", "https://scontent.example/2.jpg"))
+        self.assertEqual(cancelled, ["c2"])
+
+
+def _result(source: str) -> MediaResult:
+    return MediaResult(urls=(f"https://scontent.example/{source}.jpg",), metadata=MediaMetadata(original_url=source))
+
+
+class HedgedFetchTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.extractor = facebook.FacebookExtractor()
+        self.started: list[str] = []
+        self.cancelled: list[str] = []
+        patcher = patch.multiple(facebook, FACEBOOK_HEDGE_DELAY=0.05, FACEBOOK_HEDGE_AUTH_GRACE=0.05)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _fetcher(self, source: str, delay: float, result: MediaResult | None):
+        async def fetch(*args):
+            self.started.append(source)
+            try:
+                await asyncio.sleep(delay)
+            except asyncio.CancelledError:
+                self.cancelled.append(source)
+                raise
+            return result
+
+        return fetch
+
+    async def _hedge(self, url: str, auth_delay: float, public_delay: float, auth_result=None, public_first=False):
+        self.extractor._fetch_authenticated = self._fetcher("auth", auth_delay, auth_result)
+        self.extractor._fetch_public = self._fetcher("public", public_delay, _result("public"))
+        cookies = httpx.Cookies({"c_user": "1"})
+        return await self.extractor._fetch_hedged(None, url, cookies, public_first=public_first)
+
+    async def test_slow_auth_loses_to_public_after_the_hedge_delay(self):
+        result = await self._hedge("https://www.facebook.com/groups/1/permalink/2/", 1.0, 0.0, _result("auth"))
+
+        self.assertEqual(result, _result("public"))
+        self.assertEqual(self.cancelled, ["auth"])
+        self.assertEqual(self.extractor.stats()["facebook_fetches"], {"hedged": 1, "public_hedge_wins": 1})
+
+    async def test_auth_within_grace_window_is_preferred(self):
+        result = await self._hedge("https://www.facebook.com/reel/1", 0.02, 0.0, _result("auth"), public_first=True)
+
+        self.assertEqual(result, _result("auth"))
+        self.assertEqual(self.started, ["auth", "public"])
+
+    async def test_fast_auth_never_starts_public_fetch(self):
+        result = await self._hedge("https://www.facebook.com/groups/1/permalink/2/", 0.0, 0.0, _result("auth"))
+
+        self.assertEqual(result, _result("auth"))
+        self.assertEqual(self.started, ["auth"])
+
+    async def test_learned_failing_public_path_is_skipped(self):
+        url = "https://www.facebook.com/stories/1/2/"
+        for _ in range(facebook.FACEBOOK_STRATEGY_MIN_ATTEMPTS):
+            await self.extractor.strategies.record("story_card", "auth", True, 1.0)
+            await self.extractor.strategies.record("story_card", "public", False, 0.5)
+        self.extractor._fetch_authenticated = self._fetcher("auth", 0.1, _result("auth"))
+        self.extractor._fetch_public = self._fetcher("public", 0.0, _result("public"))
+
+        with patch.object(facebook, "get_facebook_cookies", return_value=httpx.Cookies({"c_user": "1"})):
+            result = await self.extractor._extract_with_fallback(None, url)
+
+        self.assertEqual(result, _result("auth"))
+        self.assertEqual(self.started, ["auth"])
+
+    async def test_learned_fetch_order_survives_a_restart_through_the_store(self):
+        url = "https://www.facebook.com/groups/1/permalink/2/"
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir) / "results.sqlite3"
+            store = ResultStore(path, max_bytes=1 << 20)
+            try:
+                extractor = build_handlers(store=store)[0]
+                for _ in range(facebook.FACEBOOK_STRATEGY_MIN_ATTEMPTS):
+                    await extractor._record(url, "auth", time.monotonic(), None)
+                    await extractor._record(url, "public", time.monotonic(), _result("public"))
+            finally:
+                store.close()
+
+            store = ResultStore(path, max_bytes=1 << 20)
+            try:
+                restarted = build_handlers(store=store)[0]
+                plan = await restarted.strategies.plan(facebook._page_kind(url), ("auth", "public"))
+            finally:
+                store.close()
+
+        self.assertEqual(plan, ("public",))
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,78 @@
+"""Regression tests for per-chat fair queuing."""
+
+import asyncio
+import unittest
+
+from core.fair_queue import FairQueue, WorkDropped
+
+
+class FairQueueTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.release = asyncio.Event()
+        self.order: list[str] = []
+
+    async def _job(self, queue: FairQueue, chat_id: int, name: str, cost: int = 1) -> None:
+        async with queue.slot(chat_id, cost):
+            self.order.append(name)
+            await self.release.wait()
+
+    async def _run_one_at_a_time(self, queue: FairQueue, tasks: list[asyncio.Task]) -> None:
+        while not all(task.done() for task in tasks):
+            self.release.set()
+            await asyncio.sleep(0)
+            self.release.clear()
+            await asyncio.sleep(0)
+
+    async def test_quiet_chat_takes_turns_with_noisy_backlog(self):
+        queue = FairQueue(1, per_chat_limit=1, max_backlog=10)
+        tasks = [asyncio.create_task(self._job(queue, 1, f"noisy-{index}")) for index in range(4)]
+        await asyncio.sleep(0)
+        tasks.append(asyncio.create_task(self._job(queue, 2, "quiet")))
+        await asyncio.sleep(0)
+
+        await self._run_one_at_a_time(queue, tasks)
+
+        self.assertEqual(self.order, ["noisy-0", "noisy-1", "quiet", "noisy-2", "noisy-3"])
+
+    async def test_per_chat_limit_leaves_capacity_for_other_chats(self):
+        queue = FairQueue(3, per_chat_limit=1, max_backlog=10)
+        tasks = [asyncio.create_task(self._job(queue, 1, f"noisy-{index}")) for index in range(3)]
+        tasks.append(asyncio.create_task(self._job(queue, 2, "quiet")))
+        await asyncio.sleep(0)
+
+        self.assertEqual(sorted(self.order), ["noisy-0", "quiet"])
+
+        self.release.set()
+        await asyncio.gather(*tasks)
+
+    async def test_expensive_messages_wait_for_their_deficit(self):
+        queue = FairQueue(1, per_chat_limit=1, max_backlog=10)
+        tasks = [asyncio.create_task(self._job(queue, 0, "holder"))]
+        await asyncio.sleep(0)
+        tasks.append(asyncio.create_task(self._job(queue, 1, "heavy", cost=3)))
+        tasks.extend(asyncio.create_task(self._job(queue, 2, f"light-{index}")) for index in range(2))
+        await asyncio.sleep(0)
+
+        await self._run_one_at_a_time(queue, tasks)
+
+        self.assertEqual(self.order, ["holder", "light-0", "light-1", "heavy"])
+
+    async def test_full_backlog_drops_the_oldest_queued_job(self):
+        queue = FairQueue(1, per_chat_limit=1, max_backlog=2)
+        holder = asyncio.create_task(self._job(queue, 1, "running"))
+        await asyncio.sleep(0)
+        queued = [asyncio.create_task(self._job(queue, 1, f"queued-{index}")) for index in range(3)]
+        await asyncio.sleep(0)
+
+        with self.assertRaises(WorkDropped):
+            await queued[0]
+        self.release.set()
+        await asyncio.gather(holder, *queued[1:])
+
+        self.assertEqual(self.order, ["running", "queued-1", "queued-2"])
+        self.assertEqual(queue.stats()["chat_fairness"]["dropped"], 1)
+        self.assertEqual(queue.active, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+"""Regression tests for the single-pass JSON index."""
+
+import unittest
+
+from utils.json_index import JsonIndex
+
+
+def _walk(value):
+    if isinstance(value, dict):
+        yield value
+        for child in value.values():
+            yield from _walk(child)
+    elif isinstance(value, list):
+        for child in value:
+            yield from _walk(child)
+
+
+class JsonIndexTests(unittest.TestCase):
+    def setUp(self):
+        self.documents = [
+            {
+                "id": 1,
+                "__typename": "Story",
+                "attachments": [{"media": {"id": "10", "__typename": "Photo"}}],
+                "params": {"story_token": "abc"},
+            },
+            [{"id": "10", "__typename": "Video", "params": None}],
+        ]
+        self.index = JsonIndex(self.documents, keys=("params",))
+
+    def test_nodes_follow_recursive_walk_order(self):
+        self.assertEqual(
+            [id(node) for node in self.index.nodes],
+            [id(node) for document in self.documents for node in _walk(document)],
+        )
+
+    def test_groups_by_id_typename_and_key(self):
+        self.assertEqual([node["__typename"] for node in self.index.with_id("10")], ["Photo", "Video"])
+        self.assertEqual(self.index.with_id("1"), [self.documents[0]])
+        self.assertEqual(len(self.index.with_typename("Photo")), 1)
+        self.assertEqual(self.index.with_key("params"), [self.documents[0], self.documents[1][0]])
+
+    def test_unconfigured_keys_and_subtrees(self):
+        story = self.documents[0]
+
+        self.assertEqual(self.index.with_key("media"), [story["attachments"][0]])
+        self.assertEqual(self.index.with_key("id", within=story["attachments"][0]), [story["attachments"][0]["media"]])
+        self.assertEqual(len(self.index.subtree(story)), 4)
+        self.assertEqual(self.index.with_any_key(("media", "story_token")), [story["attachments"][0], story["params"]])
+
+
+if __name__ == "__main__":
+    unittest.main()
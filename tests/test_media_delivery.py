@@ -0,0 +1,58 @@
+"""Regression tests for size-aware media rendition downloads."""
+
+import os
+import unittest
+from unittest.mock import patch
+
+import httpx
+
+from core.types import MediaRendition
+from services import media_delivery
+
+_SIZES = {"/hd.mp4": 5000, "/sd.mp4": 800, "/dash.mp4": 600}
+
+
+class RenditionDownloadTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.downloads: list[str] = []
+        self.probes: list[str] = []
+        patcher = patch.object(media_delivery, "TELEGRAM_MAX_MEDIA_BYTES", 1000)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _respond(self, request: httpx.Request) -> httpx.Response:
+        size = _SIZES[request.url.path]
+        if request.headers.get("Range") == "bytes=0-0":
+            self.probes.append(request.url.path)
+            return httpx.Response(206, headers={"Content-Range": f"bytes 0-0/{size}"}, content=b"\0")
+        self.downloads.append(request.url.path)
+        return httpx.Response(200, headers={"Content-Type": "video/mp4"}, content=b"\0" * size)
+
+    async def _download(self, *renditions: MediaRendition) -> media_delivery.DownloadedMedia:
+        async with httpx.AsyncClient(transport=httpx.MockTransport(self._respond)) as client:
+            media_file = await media_delivery.download_rendition(renditions, client)
+        self.addCleanup(os.remove, media_file.path)
+        return media_file
+
+    async def test_probes_unknown_sizes_and_downloads_the_best_fit(self):
+        media_file = await self._download(
+            MediaRendition("https://cdn.example/hd.mp4"), MediaRendition("https://cdn.example/sd.mp4")
+        )
+
+        self.assertEqual(media_file.size_bytes, 800)
+        self.assertEqual(sorted(self.probes), ["/hd.mp4", "/sd.mp4"])
+        self.assertEqual(self.downloads, ["/sd.mp4"])
+
+    async def test_known_fitting_rendition_downloads_without_probes(self):
+        media_file = await self._download(
+            MediaRendition("https://cdn.example/dash.mp4", bandwidth=480, duration=10),
+            MediaRendition("https://cdn.example/sd.mp4"),
+        )
+
+        self.assertEqual(media_file.size_bytes, 600)
+        self.assertEqual(self.probes, [])
+        self.assertEqual(self.downloads, ["/dash.mp4"])
+
+
+if __name__ == "__main__":
+    unittest.main()
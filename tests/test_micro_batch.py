@@ -0,0 +1,81 @@
+"""Regression tests for micro-batched lookups."""
+
+import asyncio
+import unittest
+
+from core.deadline import deadline_scope, remaining
+from core.micro_batch import MicroBatcher
+
+
+class MicroBatcherTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.batches: list[list[str]] = []
+
+    async def _resolve(self, keys):
+        self.batches.append(list(keys))
+        if "boom" in keys:
+            raise RuntimeError("batch failed")
+        return {key: key.upper() for key in keys if key != "missing"}
+
+    async def test_lookups_in_one_window_share_a_batch(self):
+        batcher = MicroBatcher("batches", self._resolve, window=0.01, max_batch=10)
+
+        values = await asyncio.gather(*(batcher.get(key) for key in ("a", "b", "a", "missing")))
+
+        self.assertEqual(values, ["A", "B", "A", None])
+        self.assertEqual(self.batches, [["a", "b", "missing"]])
+        self.assertEqual(batcher.stats()["batches"], {"batches": 1, "keys": 3, "errors": 0, "size_3_to_4": 1})
+
+    async def test_full_batch_is_sent_without_waiting_for_the_window(self):
+        batcher = MicroBatcher("batches", self._resolve, window=10, max_batch=2)
+
+        values = await asyncio.wait_for(asyncio.gather(batcher.get("a"), batcher.get("b")), timeout=1)
+
+        self.assertEqual(values, ["A", "B"])
+
+    async def test_failed_batch_raises_to_every_caller(self):
+        batcher = MicroBatcher("batches", self._resolve, window=0.01, max_batch=10)
+
+        results = await asyncio.gather(batcher.get("a"), batcher.get("boom"), return_exceptions=True)
+
+        self.assertTrue(all(isinstance(result, RuntimeError) for result in results))
+        self.assertEqual(batcher.stats()["batches"]["errors"], 1)
+
+    async def test_batch_runs_under_the_tightest_caller_deadline(self):
+        budgets: list[float | None] = []
+
+        async def resolve(keys):
+            budgets.append(remaining())
+            return {}
+
+        async def get(key: str, budget: float | None):
+            with deadline_scope(budget):
+                return await batcher.get(key)
+
+        batcher = MicroBatcher("batches", resolve, window=0.01, max_batch=10)
+        await asyncio.gather(get("a", 30), get("b", 5), get("c", None))
+        await get("d", None)
+
+        self.assertTrue(0 < budgets[0] <= 5)
+        self.assertIsNone(budgets[1])
+
+    async def test_cancelled_batch_releases_every_caller(self):
+        started = asyncio.Event()
+
+        async def resolve(keys):
+            started.set()
+            await asyncio.sleep(10)
+
+        batcher = MicroBatcher("batches", resolve, window=0.01, max_batch=10)
+        callers = asyncio.gather(batcher.get("a"), batcher.get("b"), return_exceptions=True)
+        await started.wait()
+        for flush in batcher._flushes:
+            flush.cancel()
+
+        results = await asyncio.wait_for(callers, timeout=1)
+
+        self.assertTrue(all(isinstance(result, RuntimeError) for result in results))
+
+
+if __name__ == "__main__":
+    unittest.main()
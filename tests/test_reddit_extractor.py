@@ -0,0 +1,144 @@
+"""Regression tests for Reddit post JSON fetching."""
+
+import asyncio
+import json
+import unittest
+from unittest.mock import patch
+
+import httpx
+
+from handlers.media_extractors import reddit
+
+_URL = "https://www.reddit.com/r/pics/comments/abc/a_title/"
+
+
+def _post(image: str, post_id: str = "abc") -> dict:
+    return {
+        "id": post_id,
+        "title": "A title",
+        "permalink": f"/r/pics/comments/{post_id}/a_title/",
+        "url": image,
+        "post_hint": "image",
+    }
+
+
+def _listing(image: str) -> list:
+    return [{"data": {"children": [{"data": _post(image)}]}}, {}]
+
+
+class HedgedRedditFetchTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.extractor = reddit.RedditExtractor()
+        self.extractor.posts = None
+        self.requests: list[tuple[str, bool]] = []
+        self.cancelled: list[str] = []
+        patcher = patch.multiple(reddit, REDDIT_HEDGE_DELAY=0.05, get_reddit_cookies=self._cookies)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def _cookies(self):
+        return httpx.Cookies({"reddit_session": "1"})
+
+    async def _fetch(self, delays: dict[tuple[str, bool], float], statuses=None):
+        statuses = statuses or {}
+
+        async def respond(request: httpx.Request) -> httpx.Response:
+            key = (request.url.path, "reddit_session" in request.headers.get("Cookie", ""))
+            self.requests.append(key)
+            try:
+                await asyncio.sleep(delays.get(key, 0))
+            except asyncio.CancelledError:
+                self.cancelled.append(request.url.path)
+                raise
+            image = "https://i.redd.it/cookie.jpg" if key[1] else "https://i.redd.it/public.jpg"
+            return httpx.Response(statuses.get(key, 200), json=_listing(image))
+
+        async with httpx.AsyncClient(transport=httpx.MockTransport(respond)) as client:
+            return await self.extractor._fetch_reddit(client, _URL)
+
+    async def test_slow_endpoint_is_hedged_by_the_next_one(self):
+        result = await self._fetch({("/r/pics/comments/abc/a_title/.json", True): 1.0})
+
+        self.assertEqual(result.urls, ("https://i.redd.it/cookie.jpg",))
+        self.assertEqual(self.requests, [("/r/pics/comments/abc/a_title/.json", True), ("/comments/abc.json", True)])
+        self.assertEqual(self.cancelled, ["/r/pics/comments/abc/a_title/.json"])
+        stats = self.extractor.stats()["reddit_endpoints"]
+        self.assertEqual(stats["cookie_compact"], "1/1 wins")
+        self.assertEqual(stats["hedged_requests"], 1)
+
+    async def test_failed_endpoint_starts_the_next_without_waiting(self):
+        failing = {("/r/pics/comments/abc/a_title/.json", True): 403, ("/comments/abc.json", True): 403}
+
+        with patch.object(reddit, "REDDIT_HEDGE_DELAY", 10):
+            result = await asyncio.wait_for(self._fetch({}, failing), timeout=1)
+
+        self.assertEqual(result.urls, ("https://i.redd.it/public.jpg",))
+        self.assertEqual(self.requests[-1], ("/comments/abc.json", False))
+        self.assertEqual(self.extractor.stats()["reddit_endpoints"]["hedged_requests"], 0)
+
+
+class BatchedPostLookupTests(unittest.IsolatedAsyncioTestCase):
+    async def test_concurrent_links_resolve_with_one_info_call(self):
+        requested = []
+
+        def respond(request: httpx.Request) -> httpx.Response:
+            requested.append(request.url)
+            ids = request.url.params["id"].split(",")
+            children = [
+                {"kind": "t3", "data": _post(f"https://i.redd.it/{post_id[3:]}.jpg", post_id[3:])} for post_id in ids
+            ]
+            return httpx.Response(200, json={"kind": "Listing", "data": {"children": children}})
+
+        extractor = reddit.RedditExtractor()
+        client = httpx.AsyncClient(transport=httpx.MockTransport(respond))
+        self.addAsyncCleanup(client.aclose)
+        with patch.multiple(reddit, get_client=lambda: client, get_reddit_cookies=self._no_cookies):
+            results = await asyncio.gather(
+                extractor._fetch_reddit(client, "https://redd.it/abc"),
+                extractor._fetch_reddit(client, "https://www.reddit.com/r/pics/comments/DEF/title/"),
+            )
+
+        self.assertEqual(
+            [result.urls for result in results], [("https://i.redd.it/abc.jpg",), ("https://i.redd.it/def.jpg",)]
+        )
+        self.assertEqual(len(requested), 1)
+        self.assertEqual(requested[0].path, "/api/info.json")
+        self.assertEqual(extractor.stats()["reddit_batches"]["size_2"], 1)
+
+    async def _no_cookies(self):
+        return httpx.Cookies()
+
+
+class PostListingTests(unittest.IsolatedAsyncioTestCase):
+    async def test_comment_listing_is_not_downloaded(self):
+        post = _listing("https://i.redd.it/a.jpg")[0]
+        body = json.dumps([post, {"data": {"children": [{"body": "x" * 1000}] * 100}}]).encode()
+        chunks = [body[index : index + 256] for index in range(0, len(body), 256)]
+        sent = []
+        requested = []
+
+        async def stream():
+            for chunk in chunks:
+                sent.append(chunk)
+                yield chunk
+
+        def respond(request: httpx.Request) -> httpx.Response:
+            requested.append(request.url)
+            return httpx.Response(200, content=stream())
+
+        endpoint = reddit._reddit_endpoints(_URL, None)[0]
+        async with httpx.AsyncClient(transport=httpx.MockTransport(respond)) as client:
+            metadata = await reddit._fetch_reddit_endpoint(client, endpoint)
+
+        self.assertEqual(metadata.media_urls, ("https://i.redd.it/a.jpg",))
+        self.assertLess(len(sent), len(chunks) // 10)
+        self.assertEqual(dict(requested[0].params), {"raw_json": "1", "limit": "1", "depth": "1"})
+
+    async def test_non_array_body_is_decoded_whole(self):
+        response = httpx.Response(200, content=b'{"error": 404}')
+
+        self.assertEqual(await reddit._read_post_listing(response), {"error": 404})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+"""Regression tests for the redirect chain cache."""
+
+import tempfile
+import unittest
+from pathlib import Path
+
+from core.redirect_cache import Redirect, RedirectCache
+from services.result_store import ResultStore
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class RedirectCacheTests(unittest.IsolatedAsyncioTestCase):
+    async def test_hits_count_the_hops_they_save_until_expiry(self):
+        clock = _Clock()
+        cache = RedirectCache("redirects", max_entries=10, ttl=60, clock=clock)
+        key = ("public", "https://www.facebook.com/share/p/abc/")
+
+        self.assertIsNone(await cache.get(key))
+        await cache.put(key, Redirect("https://www.facebook.com/groups/1/permalink/2/", 3))
+        self.assertEqual((await cache.get(key)).hops, 3)
+
+        clock.now = 61
+        self.assertIsNone(await cache.get(key))
+        self.assertEqual(
+            cache.stats()["redirects"], {"entries": 0, "hits": 1, "store_hits": 0, "misses": 2, "hops_saved": 3}
+        )
+
+    async def test_evicts_least_recently_used_entries(self):
+        cache = RedirectCache("redirects", max_entries=2, ttl=60)
+        for index in range(3):
+            await cache.put(("public", str(index)), Redirect(f"target-{index}", 1))
+
+        self.assertIsNone(await cache.get(("public", "0")))
+        self.assertEqual(len(cache), 2)
+
+    async def test_store_keeps_redirects_across_restarts_until_forgotten(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir) / "results.sqlite3"
+            key = ("auth", "https://www.facebook.com/share/r/abc/")
+            store = ResultStore(path, max_bytes=1 << 20)
+            await RedirectCache("redirects", max_entries=10, ttl=60, store=store).put(key, Redirect("target", 2))
+            store.close()
+
+            store = ResultStore(path, max_bytes=1 << 20)
+            try:
+                cache = RedirectCache("redirects", max_entries=10, ttl=60, store=store)
+                self.assertEqual(await cache.get(key), Redirect("target", 2))
+                await cache.forget(key)
+                self.assertIsNone(await store.get_redirect(key))
+            finally:
+                store.close()
+
+        self.assertEqual(cache.stats()["redirects"]["store_hits"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+"""Regression tests for the extraction result cache."""
+
+import unittest
+
+from core.result_cache import ResultCache, TtlPolicy
+from core.types import MediaMetadata, MediaResult
+
+
+class _Clock:
+    def __init__(self, now: float = 0.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _media(url: str = "https://cdn.example/a.jpg") -> MediaResult:
+    return MediaResult(urls=(url,), metadata=MediaMetadata(original_url="https://example.com/post"))
+
+
+class ResultCacheTests(unittest.TestCase):
+    def test_expires_by_platform_ttl(self):
+        clock = _Clock()
+        cache = ResultCache(
+            max_entries=4, ttl_policy=TtlPolicy(default_ttl=100, negative_ttl=5, ttls={"reddit": 10}), clock=clock
+        )
+        cache.put(("reddit", "a"), _media())
+        cache.put(("instagram", "a"), _media())
+
+        clock.now = 11
+
+        self.assertIsNone(cache.get(("reddit", "a")))
+        self.assertIsNotNone(cache.get(("instagram", "a")))
+        self.assertEqual(cache.stats()["expirations"], 1)
+
+    def test_negative_entries_use_short_ttl(self):
+        clock = _Clock()
+        cache = ResultCache(max_entries=4, ttl_policy=TtlPolicy(default_ttl=100, negative_ttl=5), clock=clock)
+        cache.put(("facebook", "a"), None)
+
+        cached = cache.get(("facebook", "a"))
+        clock.now = 6
+
+        self.assertIsNotNone(cached)
+        self.assertIsNone(cached.result)
+        self.assertIsNone(cache.get(("facebook", "a")))
+        self.assertEqual(cache.stats()["negative_hits"], 1)
+
+    def test_evicts_least_recently_used(self):
+        cache = ResultCache(max_entries=2, ttl_policy=TtlPolicy(default_ttl=100, negative_ttl=5), clock=_Clock())
+        cache.put(("x", "a"), _media())
+        cache.put(("x", "b"), _media())
+        cache.get(("x", "a"))
+        cache.put(("x", "c"), _media())
+
+        self.assertIsNone(cache.get(("x", "b")))
+        self.assertIsNotNone(cache.get(("x", "a")))
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+    def test_signed_facebook_urls_cap_ttl(self):
+        policy = TtlPolicy(default_ttl=3600, negative_ttl=5, wall_clock=lambda: 1000.0)
+        expires_at = 1000 + 300
+        result = _media(f"https://scontent.example/a.jpg?oh=sig&oe={expires_at:X}")
+
+        self.assertEqual(policy.ttl_for("facebook", result), 300 - 60)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+"""Regression tests for the persistent extraction result store."""
+
+import tempfile
+import unittest
+from dataclasses import replace
+from pathlib import Path
+
+from core.types import MediaMetadata, MediaRendition, MediaResult
+from services.result_store import ResultStore, decode_result, encode_result
+
+
+def _media(index: int = 0) -> MediaResult:
+    return MediaResult(
+        urls=(f"https://cdn.example/{index}.jpg", f"https://cdn.example/{index}.mp4"),
+        metadata=MediaMetadata(
+            original_url=f"https://example.com/post/{index}",
+            thumbnail=f"https://cdn.example/{index}.jpg",
+            caption="Caption with ünïcode",
+            title=None,
+        ),
+    )
+
+
+class ResultStoreTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.path = Path(self.temp_dir.name) / "results.sqlite3"
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_serialization_round_trips(self):
+        self.assertEqual(decode_result(encode_result(_media())), _media())
+        renditions = (
+            (
+                MediaRendition("https://cdn.example/hd.mp4"),
+                MediaRendition("https://cdn.example/dash.mp4", 800_000, 12.5),
+            ),
+        )
+        with_renditions = replace(_media(), renditions=renditions)
+        self.assertEqual(decode_result(encode_result(with_renditions)), with_renditions)
+        self.assertIsNone(decode_result(encode_result(None)))
+
+    async def test_results_survive_reopening_the_store(self):
+        store = ResultStore(self.path, max_bytes=1 << 20)
+        await store.put(("reddit", "https://reddit.com/a"), _media(), ttl=60)
+        await store.put(("reddit", "https://reddit.com/missing"), None, ttl=60)
+        store.close()
+
+        reopened = ResultStore(self.path, max_bytes=1 << 20)
+        try:
+            cached = await reopened.get(("reddit", "https://reddit.com/a"))
+            negative = await reopened.get(("reddit", "https://reddit.com/missing"))
+        finally:
+            reopened.close()
+
+        self.assertEqual(cached.result, _media())
+        self.assertIsNotNone(negative)
+        self.assertIsNone(negative.result)
+
+    async def test_expired_rows_are_misses(self):
+        store = ResultStore(self.path, max_bytes=1 << 20)
+        try:
+            await store.put(("reddit", "a"), _media(), ttl=-1)
+            self.assertIsNone(await store.get(("reddit", "a")))
+        finally:
+            store.close()
+
+    async def test_evicts_least_recently_used_rows_over_byte_budget(self):
+        entry_size = len(encode_result(_media()))
+        store = ResultStore(self.path, max_bytes=entry_size * 2 + entry_size // 2)
+        try:
+            await store.put(("x", "0"), _media(0), ttl=60)
+            await store.put(("x", "1"), _media(1), ttl=60)
+            await store.get(("x", "0"))
+            await store.put(("x", "2"), _media(2), ttl=60)
+
+            self.assertIsNotNone(await store.get(("x", "0")))
+            self.assertIsNone(await store.get(("x", "1")))
+            self.assertEqual(store.stats()["evictions"], 1)
+        finally:
+            store.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,308 @@
+"""Regression tests for message routing."""
+
+import asyncio
+import tempfile
+import unittest
+from pathlib import Path
+
+from core.deadline import deadline_scope, remaining, request_timeout
+from core.host_index import HostIndex
+from core.result_cache import ResultCache, TtlPolicy
+from core.router import MessageRouter
+from core.single_flight import SingleFlight
+from core.types import LinkFixResult, MediaMetadata, MediaResult
+from services.result_store import ResultStore
+
+
+class _RecordingHandler:
+    def __init__(self, name: str, domains: tuple[str, ...], result: str | None = None):
+        self.name = name
+        self.domains = domains
+        self.result = result
+        self.calls: list[str] = []
+
+    async def handle(self, text: str):
+        self.calls.append(text)
+        return LinkFixResult(self.result) if self.result else None
+
+
+class _DelayedExtractor:
+    def __init__(self, name: str, domains: tuple[str, ...], delays: dict[str, float]):
+        self.name = name
+        self.domains = domains
+        self.delays = delays
+        self.active = 0
+        self.max_active = 0
+        self.calls = 0
+
+    def match_url(self, text: str) -> str | None:
+        return text if any(key in text for key in self.delays) else None
+
+    async def extract(self, url: str):
+        self.calls += 1
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            await asyncio.sleep(next(delay for key, delay in self.delays.items() if key in url))
+        finally:
+            self.active -= 1
+        return MediaResult(urls=(url,), metadata=MediaMetadata(original_url=url))
+
+    async def handle(self, text: str):
+        url = self.match_url(text)
+        return await self.extract(url) if url else None
+
+
+class HostIndexTests(unittest.TestCase):
+    def test_matches_domain_and_subdomains_only(self):
+        index = HostIndex()
+        index.add("reddit.com", 0)
+        index.add("redd.it", 1)
+
+        self.assertEqual(index.lookup("www.reddit.com"), (0,))
+        self.assertEqual(index.lookup("reddit.com"), (0,))
+        self.assertEqual(index.lookup("redd.it"), (1,))
+        self.assertEqual(index.lookup("notreddit.com"), ())
+        self.assertEqual(index.lookup("com"), ())
+
+
+class MessageRouterTests(unittest.IsolatedAsyncioTestCase):
+    async def test_plain_text_skips_every_domain_handler(self):
+        handler = _RecordingHandler("facebook", ("facebook.com",), "fixed")
+        router = MessageRouter([handler])
+
+        self.assertIsNone(await router.handle("no links here, just facebook.com chatter"))
+        self.assertEqual(handler.calls, [])
+
+    async def test_only_matching_handlers_run(self):
+        facebook = _RecordingHandler("facebook", ("facebook.com",))
+        reddit = _RecordingHandler("reddit", ("reddit.com",), "reddit")
+        router = MessageRouter([facebook, reddit])
+
+        result = await router.handle("see https://old.reddit.com/r/x/comments/abc/")
+
+        self.assertEqual(result, LinkFixResult("reddit"))
+        self.assertEqual(facebook.calls, [])
+
+    async def test_keeps_configured_priority_between_matches(self):
+        first = _RecordingHandler("first", ("example.com",), "first")
+        second = _RecordingHandler("second", ("example.org",), "second")
+        router = MessageRouter([first, second])
+
+        result = await router.handle("https://example.org/a https://www.example.com/b")
+
+        self.assertEqual(result, LinkFixResult("first"))
+
+    async def test_handlers_without_domains_see_every_message(self):
+        generic = _RecordingHandler("generic", (), "generic")
+        router = MessageRouter([generic])
+
+        self.assertEqual(await router.handle("hello"), LinkFixResult("generic"))
+
+
+class MultiUrlRouterTests(unittest.IsolatedAsyncioTestCase):
+    async def test_streams_every_url_in_completion_order(self):
+        extractor = _DelayedExtractor("media", ("example.com",), {"slow": 0.05, "fast": 0.0})
+        router = MessageRouter([extractor], multi_url=True)
+
+        routed = [
+            item
+            async for item in router.stream(
+                "https://example.com/slow https://example.com/fast https://example.com/slow"
+            )
+        ]
+
+        self.assertEqual([item.index for item in routed], [1, 0])
+        self.assertEqual([item.url for item in routed], ["https://example.com/fast", "https://example.com/slow"])
+
+    async def test_caps_concurrent_extractions_per_message(self):
+        extractor = _DelayedExtractor("media", ("example.com",), {"item": 0.01})
+        router = MessageRouter([extractor], multi_url=True, max_concurrency=2)
+        text = " ".join(f"https://example.com/item{index}" for index in range(6))
+
+        routed = [item async for item in router.stream(text)]
+
+        self.assertEqual(len(routed), 6)
+        self.assertEqual(extractor.max_active, 2)
+
+    async def test_link_fixers_contribute_one_whole_text_result(self):
+        extractor = _DelayedExtractor("media", ("example.com",), {"item": 0.0})
+        fixer = _RecordingHandler("fixer", ("example.org",), "fixed")
+        router = MessageRouter([extractor, fixer], multi_url=True)
+
+        routed = [item async for item in router.stream("https://example.org/a https://example.com/item")]
+
+        self.assertEqual(sorted(item.index for item in routed), [0, 1])
+        self.assertIn(LinkFixResult("fixed"), [item.result for item in routed])
+        self.assertEqual(fixer.calls, ["https://example.org/a https://example.com/item"])
+
+
+class _FallbackExtractor:
+    """Tries an authenticated fetch, then a public one, like the platform extractors."""
+
+    name = "fallback"
+    domains = ("example.com",)
+
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.attempts: list[str] = []
+        self.budgets: list[float | None] = []
+
+    def match_url(self, text: str) -> str | None:
+        return text
+
+    async def extract(self, url: str):
+        for mode in ("auth", "public"):
+            timeout = request_timeout(10.0)
+            self.attempts.append(mode)
+            self.budgets.append(remaining())
+            try:
+                await asyncio.wait_for(asyncio.sleep(self.delay), timeout)
+            except TimeoutError:
+                continue
+
+    async def handle(self, text: str):
+        return await self.extract(text)
+
+
+class CachedRouterTests(unittest.IsolatedAsyncioTestCase):
+    async def test_repeated_link_is_served_from_a_fresh_cache(self):
+        extractor = _DelayedExtractor("media", ("example.com",), {"item": 0.0})
+        cache = ResultCache(max_entries=8, ttl_policy=TtlPolicy(default_ttl=60, negative_ttl=60))
+        router = MessageRouter([extractor], cache=cache)
+
+        first = await router.handle("https://example.com/item")
+        second = await router.handle("https://example.com/item")
+
+        self.assertEqual(extractor.calls, 1)
+        self.assertIs(second, first)
+        self.assertEqual(router.stats()["cache"]["hits"], 1)
+
+    async def test_result_survives_a_restart_through_the_store(self):
+        extractor = _DelayedExtractor("media", ("example.com",), {"item": 0.0})
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir) / "results.sqlite3"
+            for _ in range(2):
+                # Each pass builds a fresh cache and reopens the store, like a restarted process.
+                cache = ResultCache(max_entries=8, ttl_policy=TtlPolicy(default_ttl=60, negative_ttl=60))
+                store = ResultStore(path, max_bytes=1 << 20)
+                router = MessageRouter([extractor], cache=cache, store=store)
+                try:
+                    result = await router.handle("https://example.com/item")
+                finally:
+                    store.close()
+
+        self.assertEqual(extractor.calls, 1)
+        self.assertEqual(result.urls, ("https://example.com/item",))
+
+    async def test_store_works_without_the_in_memory_cache(self):
+        extractor = _DelayedExtractor("media", ("example.com",), {"item": 0.0})
+        with tempfile.TemporaryDirectory() as temp_dir:
+            store = ResultStore(Path(temp_dir) / "results.sqlite3", max_bytes=1 << 20)
+            router = MessageRouter([extractor], store=store, ttl_policy=TtlPolicy(default_ttl=60, negative_ttl=60))
+            try:
+                await router.handle("https://example.com/item")
+                result = await router.handle("https://example.com/item")
+            finally:
+                store.close()
+
+        self.assertEqual(extractor.calls, 1)
+        self.assertEqual(result.urls, ("https://example.com/item",))
+
+
+class DeadlineTests(unittest.IsolatedAsyncioTestCase):
+    async def test_handler_timeout_is_counted_and_not_cached(self):
+        extractor = _DelayedExtractor("media", ("example.com",), {"item": 1.0})
+        cache = ResultCache(max_entries=8, ttl_policy=TtlPolicy(default_ttl=60, negative_ttl=60))
+        router = MessageRouter([extractor], cache=cache, handler_timeout=0.01)
+
+        self.assertIsNone(await router.handle("https://example.com/item"))
+
+        self.assertEqual(router.stats()["extractions"], {"failures": 0, "timeouts": 1})
+        self.assertEqual(len(cache), 0)
+
+    async def test_spent_budget_stops_fallbacks_before_new_requests(self):
+        extractor = _FallbackExtractor(delay=1.0)
+        router = MessageRouter([extractor], request_timeout=0.05)
+
+        self.assertIsNone(await router.handle("https://example.com/post"))
+
+        self.assertEqual(extractor.attempts, ["auth"])
+        self.assertEqual(router.stats()["extractions"]["timeouts"], 1)
+
+    async def test_shared_extraction_runs_under_the_handler_budget(self):
+        extractor = _FallbackExtractor(delay=0.0)
+        router = MessageRouter([extractor], handler_timeout=30, request_timeout=5)
+
+        await router.handle("https://example.com/post")
+
+        self.assertTrue(all(budget is not None and 5 < budget <= 30 for budget in extractor.budgets))
+
+    async def test_joiner_with_more_time_outlives_the_first_callers_budget(self):
+        extractor = _DelayedExtractor("media", ("example.com",), {"item": 0.05})
+        router = MessageRouter([extractor], handler_timeout=30)
+
+        async def handle(budget: float):
+            with deadline_scope(budget):
+                return await router.handle("https://example.com/item")
+
+        first, second = await asyncio.gather(handle(0.01), handle(5))
+
+        self.assertIsNone(first)
+        self.assertEqual(second.urls, ("https://example.com/item",))
+        self.assertEqual(extractor.calls, 1)
+        self.assertEqual(router.stats()["extractions"]["timeouts"], 1)
+
+
+class SingleFlightTests(unittest.IsolatedAsyncioTestCase):
+    async def test_concurrent_requests_for_one_link_share_one_extraction(self):
+        extractor = _DelayedExtractor("media", ("example.com",), {"item": 0.01})
+        router = MessageRouter([extractor])
+
+        results = await asyncio.gather(
+            router.handle("https://example.com/item?utm_source=a"),
+            router.handle("https://www.example.com/item/"),
+        )
+
+        self.assertEqual(extractor.calls, 1)
+        self.assertIs(results[0], results[1])
+
+    async def test_cancelled_waiter_does_not_cancel_shared_work(self):
+        flight: SingleFlight[str] = SingleFlight()
+        release = asyncio.Event()
+
+        async def work() -> str:
+            await release.wait()
+            return "done"
+
+        first = asyncio.create_task(flight.run("key", work))
+        second = asyncio.create_task(flight.run("key", work))
+        await asyncio.sleep(0)
+        first.cancel()
+        await asyncio.sleep(0)
+        release.set()
+
+        self.assertEqual(await second, "done")
+        self.assertTrue(first.cancelled())
+        self.assertEqual(flight.stats()["started"], 1)
+
+    async def test_last_waiter_leaving_cancels_shared_work(self):
+        flight: SingleFlight[None] = SingleFlight()
+        started = asyncio.Event()
+
+        async def work() -> None:
+            started.set()
+            await asyncio.sleep(10)
+
+        waiter = asyncio.create_task(flight.run("key", work))
+        await started.wait()
+        waiter.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await waiter
+        await asyncio.sleep(0)
+
+        self.assertEqual(flight.in_flight, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
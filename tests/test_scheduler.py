@@ -0,0 +1,81 @@
+"""Regression tests for lane scheduling."""
+
+import asyncio
+import unittest
+
+from core.scheduler import Lane, LaneScheduler
+
+
+def _scheduler(slots: int = 2, inline_reserved: int = 1) -> LaneScheduler:
+    return LaneScheduler(slots, [Lane("inline", reserved=inline_reserved), Lane("message")])
+
+
+class LaneSchedulerTests(unittest.IsolatedAsyncioTestCase):
+    async def test_message_lane_cannot_take_reserved_inline_slots(self):
+        scheduler = _scheduler()
+        release = asyncio.Event()
+        order: list[str] = []
+
+        async def job(lane: str, name: str) -> None:
+            async with scheduler.slot(lane):
+                order.append(name)
+                await release.wait()
+
+        first = asyncio.create_task(job("message", "message-1"))
+        second = asyncio.create_task(job("message", "message-2"))
+        await asyncio.sleep(0)
+        inline = asyncio.create_task(job("inline", "inline"))
+        await asyncio.sleep(0)
+
+        self.assertEqual(order, ["message-1", "inline"])
+        self.assertEqual(scheduler.stats()["message_lane"]["queued"], 1)
+
+        release.set()
+        await asyncio.gather(first, second, inline)
+        self.assertEqual(order, ["message-1", "inline", "message-2"])
+
+    async def test_released_slot_goes_to_waiting_inline_work_first(self):
+        scheduler = _scheduler(slots=1, inline_reserved=0)
+        release = asyncio.Event()
+        order: list[str] = []
+
+        async def job(lane: str, name: str) -> None:
+            async with scheduler.slot(lane):
+                order.append(name)
+                await release.wait()
+
+        tasks = [asyncio.create_task(job("message", "message-1"))]
+        await asyncio.sleep(0)
+        tasks.append(asyncio.create_task(job("message", "message-2")))
+        tasks.append(asyncio.create_task(job("inline", "inline")))
+        await asyncio.sleep(0)
+        release.set()
+        await asyncio.gather(*tasks)
+
+        self.assertEqual(order, ["message-1", "inline", "message-2"])
+        self.assertEqual(scheduler.stats()["inline_lane"]["granted"], 1)
+
+    async def test_cancelled_waiter_leaves_the_queue(self):
+        scheduler = _scheduler(slots=1, inline_reserved=0)
+        release = asyncio.Event()
+
+        async def hold() -> None:
+            async with scheduler.slot("message"):
+                await release.wait()
+
+        holder = asyncio.create_task(hold())
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(hold())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await waiter
+        release.set()
+        await holder
+
+        self.assertEqual(scheduler.active, 0)
+        self.assertEqual(scheduler.stats()["message_lane"]["queued"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
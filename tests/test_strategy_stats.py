@@ -0,0 +1,62 @@
+"""Regression tests for learned strategy ordering."""
+
+import tempfile
+import unittest
+from pathlib import Path
+
+from core.strategy_stats import StrategyStats
+from services.result_store import ResultStore
+
+
+def _stats(**kwargs) -> StrategyStats:
+    return StrategyStats("strategies", weight=0.5, min_attempts=2, skip_below=0.1, probe_interval=3, **kwargs)
+
+
+class StrategyStatsTests(unittest.IsolatedAsyncioTestCase):
+    async def _record(self, stats: StrategyStats, kind: str, strategy: str, success: bool, latency: float, times=2):
+        for _ in range(times):
+            await stats.record(kind, strategy, success, latency)
+
+    async def test_default_order_holds_until_every_strategy_has_attempts(self):
+        stats = _stats()
+        await self._record(stats, "reel", "public", True, 0.2)
+
+        self.assertEqual(await stats.plan("reel", ("auth", "public")), ("auth", "public"))
+
+        await self._record(stats, "reel", "auth", True, 1.0)
+        self.assertEqual(await stats.plan("reel", ("auth", "public")), ("public", "auth"))
+        self.assertEqual(stats.stats()["strategies"]["reordered"], 1)
+
+    async def test_failing_strategy_is_skipped_except_for_probes(self):
+        stats = _stats()
+        await self._record(stats, "story_card", "auth", True, 1.0)
+        await self._record(stats, "story_card", "public", False, 0.1)
+
+        plans = [await stats.plan("story_card", ("auth", "public")) for _ in range(3)]
+
+        self.assertEqual(plans, [("auth",), ("auth",), ("auth", "public")])
+        self.assertEqual(stats.stats()["strategies"]["skipped"], 2)
+        self.assertEqual(stats.stats()["strategies"]["probes"], 1)
+
+    async def test_scores_survive_restarts_through_the_store(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir) / "results.sqlite3"
+            store = ResultStore(path, max_bytes=1 << 20)
+            stats = _stats(store=store)
+            await self._record(stats, "story", "auth", True, 1.0)
+            await self._record(stats, "story", "public", True, 0.5)
+            store.close()
+
+            reopened = ResultStore(path, max_bytes=1 << 20)
+            try:
+                restored = _stats(store=reopened)
+                plan = await restored.plan("story", ("auth", "public"))
+            finally:
+                reopened.close()
+
+        self.assertEqual(plan, ("public", "auth"))
+        self.assertEqual(restored.score("story", "auth"), stats.score("story", "auth"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+"""Single-pass index over decoded JSON documents."""
+
+from bisect import bisect_left
+from collections.abc import Iterable
+from typing import Any
+
+
+class JsonIndex:
+    """Pre-order index of every JSON object in a set of documents.
+
+    The documents are walked once. Objects are kept in the same order a
+    recursive walk would yield them and grouped by ``id``, ``__typename`` and
+    the presence of selected keys, so lookups read lists instead of walking the
+    tree again. Each object also knows where its subtree ends, so subtree scans
+    are slices of the same list.
+    """
+
+    def __init__(self, documents: Iterable[Any], keys: Iterable[str] = ()) -> None:
+        self.documents = list(documents)
+        self.nodes: list[dict[str, Any]] = []
+        self._ends: list[int] = []
+        self._positions: dict[int, int] = {}
+        self._by_id: dict[str, list[int]] = {}
+        self._by_typename: dict[str, list[int]] = {}
+        self._by_key: dict[str, list[int]] = {key: [] for key in keys}
+        self._build()
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+    def with_id(self, node_id: str) -> list[dict[str, Any]]:
+        """Return objects whose ``id`` renders as node_id, in document order."""
+        return self._select(self._by_id.get(node_id, ()))
+
+    def with_typename(self, typename: str) -> list[dict[str, Any]]:
+        """Return objects with the given ``__typename``, in document order."""
+        return self._select(self._by_typename.get(typename, ()))
+
+    def with_key(self, key: str, within: dict[str, Any] | None = None) -> list[dict[str, Any]]:
+        """Return objects that have key, optionally only inside one indexed subtree."""
+        positions = self._key_positions(key)
+        if within is None:
+            return self._select(positions)
+        start, end = self._span(within)
+        return self._select(positions[bisect_left(positions, start) : bisect_left(positions, end)])
+
+    def with_any_key(self, keys: Iterable[str]) -> list[dict[str, Any]]:
+        """Return objects that have at least one of keys, in document order."""
+        positions: set[int] = set()
+        for key in keys:
+            positions.update(self._key_positions(key))
+        return self._select(sorted(positions))
+
+    def subtree(self, node: dict[str, Any]) -> list[dict[str, Any]]:
+        """Return an indexed object followed by every object nested in it."""
+        start, end = self._span(node)
+        return self.nodes[start:end]
+
+    def _build(self) -> None:
+        stack: list[tuple[Any, bool]] = [(document, False) for document in reversed(self.documents)]
+        while stack:
+            value, closing = stack.pop()
+            if closing:
+                self._ends[value] = len(self.nodes)
+                continue
+            if isinstance(value, dict):
+                position = len(self.nodes)
+                self.nodes.append(value)
+                self._ends.append(position + 1)
+                self._positions[id(value)] = position
+                self._index(value, position)
+                stack.append((position, True))
+                children = value.values()
+            elif isinstance(value, list):
+                children = value
+            else:
+                continue
+            stack.extend((child, False) for child in reversed(children) if isinstance(child, dict | list))
+
+    def _index(self, node: dict[str, Any], position: int) -> None:
+        if "id" in node:
+            self._by_id.setdefault(str(node["id"]), []).append(position)
+        typename = node.get("__typename")
+        if isinstance(typename, str):
+            self._by_typename.setdefault(typename, []).append(position)
+        for key, positions in self._by_key.items():
+            if key in node:
+                positions.append(position)
+
+    def _key_positions(self, key: str) -> list[int]:
+        if key not in self._by_key:
+            self._by_key[key] = [position for position, node in enumerate(self.nodes) if key in node]
+        return self._by_key[key]
+
+    def _span(self, node: dict[str, Any]) -> tuple[int, int]:
+        position = self._positions[id(node)]
+        return position, self._ends[position]
+
+    def _select(self, positions: Iterable[int]) -> list[dict[str, Any]]:
+        return [self.nodes[position] for position in positions]
@@ -1,4 +1,4 @@
-from urllib.parse import parse_qs, urlencode, urlparse, urlunparse
+from urllib.parse import parse_qs, parse_qsl, urlencode, urlparse, urlunparse
 
 from config import FACEBOOK_PARAMS_TO_KEEP
 
@@ -24,3 +24,18 @@ def strip_url_params(
 def strip_url_tracking(url: str) -> str:
     """Remove tracking parameters from URL, keeping only essential Facebook params."""
     return strip_url_params(url, keep_only=FACEBOOK_PARAMS_TO_KEEP)
+
+
+_CANONICAL_HOST_PREFIXES = ("www.", "m.", "touch.", "old.", "new.")
+
+
+def canonical_url(url: str) -> str:
+    """Return a stable key for a source URL regardless of mobile hosts and tracking params."""
+    parsed = urlparse(url.strip())
+    hostname = (parsed.hostname or "").lower()
+    for prefix in _CANONICAL_HOST_PREFIXES:
+        if hostname.startswith(prefix):
+            hostname = hostname[len(prefix) :]
+            break
+    query = urlencode(sorted((key, value) for key, value in parse_qsl(parsed.query) if key in FACEBOOK_PARAMS_TO_KEEP))
+    return urlunparse(("https", hostname, parsed.path.rstrip("/") or "/", "", query, ""))